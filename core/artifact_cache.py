@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import weakref
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+from core.cache import get_state_dir, module_source_digest, _file_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，退化为无锁（仅依赖原子 rename）
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存上限：10 GB
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+# 元数据中表示"缓存目录内文件"的标记
+_FILE_MARKER = '__artifact_file__'
+
+
+# 淘汰时删除到上限的该比例以下，避免每次写入都触发全量扫描
+_EVICT_LOW_WATER = 0.9
+
+
+def cacheable(inputs: Iterable[str] = (), outputs: Iterable[str] = (), config: Iterable[str] = (),
+              version: str = ''):
+    """
+    Step 类装饰器：声明 Step 的产物可以被缓存
+
+    Args:
+        inputs: 影响产物的 Context 数据 key（如 model_path），本地文件按内容哈希
+        outputs: Step 写入 Context 的产物 key（如 engine_path），命中缓存时直接恢复
+        config: 影响产物的 Context 配置 key（如 precision）
+        version: 产物版本，Step 依赖的外部工具（如编译器）升级时修改以使旧产物失效；
+            Step 所在模块的源码变化时产物自动失效
+    """
+    def wrapper(cls):
+        cls.cache_inputs = tuple(inputs)
+        cls.cache_outputs = tuple(outputs)
+        cls.cache_config = tuple(config)
+        cls.cache_version = str(version)
+        return cls
+    return wrapper
+
+
+def _tree_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+class ArtifactCache:
+    """
+    内容寻址的 Step 产物缓存，位于 <cache_dir>/artifacts：
+
+        objects/<key[:2]>/<key>/meta.json   产物的 Context 值（本地文件替换为缓存内的相对路径）
+        objects/<key[:2]>/<key>/files/...   被缓存的本地文件
+        locks/<key>.lock                    同一个 key 只计算一次（跨进程）
+        pins/<key>.lock                     命中的条目在使用期间持有共享锁，淘汰时跳过
+        size                                所有条目的总字节数（写入时累加，淘汰时按扫描结果校正）
+
+    key 由 step_type、Step 的代码版本（cache_version 及模块源码哈希）、规范化的 Step 参数、
+    声明的配置项和输入产物的哈希共同决定。
+    meta.json 的 mtime 作为最近访问时间；写入只累加 size 计数，超过 max_bytes 时才扫描全部条目，
+    按 LRU 淘汰到上限的 90% 以下，并删除被淘汰条目的锁文件。
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(get_state_dir(), 'artifacts')
+        self.max_bytes = max_bytes
+        # {(abs_path, mtime_ns, size): digest}，避免重复计算大文件的哈希
+        self._digest_memo: Dict[Tuple[str, int, int], str] = {}
+
+    def _object_dir(self, key: str) -> str:
+        return os.path.join(self.root, 'objects', key[:2], key)
+
+    def _value_digest(self, value: Any) -> Any:
+        """输入值的哈希：本地文件按内容，其余按 JSON 值"""
+        if isinstance(value, str) and os.path.isfile(value):
+            stat = os.stat(value)
+            memo_key = (os.path.abspath(value), stat.st_mtime_ns, stat.st_size)
+            digest = self._digest_memo.get(memo_key)
+            if digest is None:
+                digest = self._digest_memo[memo_key] = _file_digest(value)
+            return {'file': digest}
+        return value
+
+    def make_key(self, step_type: str, step_args: Dict, config: Dict, inputs: Dict, code: str = '') -> str:
+        """code 为 Step 的代码版本（见 step_code_version），Step 实现变化时 key 随之变化"""
+        payload = {
+            'step': step_type,
+            'code': code,
+            'args': step_args,
+            'config': config,
+            'inputs': {k: self._value_digest(v) for k, v in inputs.items()},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def step_code_version(step_cls) -> str:
+        return f"{getattr(step_cls, 'cache_version', '')}:{module_source_digest(step_cls.__module__)}"
+
+    @contextmanager
+    def _flock(self, path: str):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lock(self, key: str):
+        """
+        key 级别的跨进程互斥锁：并行 Worker 同时需要同一产物时，只有一个执行 Step，其余等待后命中缓存
+        """
+        return self._flock(os.path.join(self.root, 'locks', f'{key}.lock'))
+
+    @asynccontextmanager
+    async def alock(self, key: str):
+        """
+        lock 的异步版本：在线程中等待锁，不阻塞事件循环
+        """
+        lock = self.lock(key)
+        acquire = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # 等待期间被取消（如 Step 超时）：线程拿到锁后立即释放，避免其他 Worker 一直等待
+            acquire.add_done_callback(
+                lambda f: f.cancelled() or f.exception() is not None or lock.__exit__(None, None, None))
+            raise
+        try:
+            yield
+        finally:
+            lock.__exit__(None, None, None)
+
+    def _pin(self, key: str) -> Optional[int]:
+        """对条目加共享锁（evict 对被固定的条目加排他锁失败时跳过），返回持有锁的 fd"""
+        if fcntl is None:
+            return None
+        path = os.path.join(self.root, 'pins', f'{key}.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                # 等待期间锁文件被 evict 删除（之后可能重新创建）时，锁住的是旧文件，需要重新打开
+                if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            except OSError:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    @staticmethod
+    def _unpin(fd: Optional[int]):
+        if fd is not None:
+            os.close(fd)
+
+    def get(self, key: str, owner: Any = None) -> Optional[Dict]:
+        """
+        命中时返回产物 {context_key: value}，并刷新最近访问时间
+
+        产物中的文件路径指向缓存目录内部：传入 owner（如 Case 的 TestContext）时，
+        条目在 owner 被释放前一直被固定，其他 Worker 或 Plan 的 evict 不会删除这些文件。
+        """
+        pin = self._pin(key) if owner is not None else None
+        outputs = self._read(key)
+        if outputs is None:
+            self._unpin(pin)
+        elif pin is not None:
+            weakref.finalize(owner, self._unpin, pin)
+        return outputs
+
+    def _read(self, key: str) -> Optional[Dict]:
+        meta_path = os.path.join(self._object_dir(key), 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        outputs = {}
+        object_dir = self._object_dir(key)
+        for name, value in meta['outputs'].items():
+            if isinstance(value, dict) and _FILE_MARKER in value:
+                path = os.path.join(object_dir, value[_FILE_MARKER])
+                if not os.path.exists(path):
+                    return None
+                value = path
+            outputs[name] = value
+        return outputs
+
+    @contextmanager
+    def _try_lock_exclusive(self, path: str):
+        """对锁文件加非阻塞排他锁，锁被其他人持有（条目正在被使用或计算）时返回 False"""
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            yield True
+            return
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            os.close(fd)
+
+    def _remove_entry(self, key: str, object_dir: str) -> bool:
+        """删除条目及其锁文件（需持有淘汰锁），条目被固定时跳过并返回 False"""
+        pin_path = os.path.join(self.root, 'pins', f'{key}.lock')
+        with self._try_lock_exclusive(pin_path) as evictable:
+            if not evictable:
+                return False
+            shutil.rmtree(object_dir, ignore_errors=True)
+            # 持有排他锁时删除锁文件：之后打开旧文件的 _pin 会发现 inode 变化并重新打开
+            self._unlink(pin_path)
+        lock_path = os.path.join(self.root, 'locks', f'{key}.lock')
+        with self._try_lock_exclusive(lock_path) as unused:
+            # 正在计算该 key 的 Worker 仍持有计算锁时保留锁文件
+            if unused:
+                self._unlink(lock_path)
+        return True
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _size_path(self) -> str:
+        return os.path.join(self.root, 'size')
+
+    def _read_size(self) -> Optional[int]:
+        try:
+            with open(self._size_path(), 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, size: int):
+        tmp_path = f"{self._size_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(max(0, size)))
+        os.replace(tmp_path, self._size_path())
+
+    def _add_size(self, delta: int) -> Optional[int]:
+        """累加 size 计数并返回新的总大小（需持有淘汰锁），计数不存在时返回 None"""
+        size = self._read_size()
+        if size is None:
+            return None
+        size += delta
+        self._write_size(size)
+        return size
+
+    def put(self, key: str, outputs: Dict):
+        """
+        保存产物：本地文件复制到缓存目录，其余值以 JSON 保存。先写入临时目录再 rename，保证读者看到完整的条目
+        """
+        object_dir = self._object_dir(key)
+        if os.path.exists(object_dir):
+            return
+        os.makedirs(os.path.dirname(object_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(object_dir), prefix='.tmp_')
+        try:
+            meta_outputs = {}
+            for name, value in outputs.items():
+                if isinstance(value, str) and os.path.isfile(value):
+                    rel_path = os.path.join('files', name, os.path.basename(value))
+                    os.makedirs(os.path.join(tmp_dir, 'files', name))
+                    shutil.copy2(value, os.path.join(tmp_dir, rel_path))
+                    meta_outputs[name] = {_FILE_MARKER: rel_path}
+                else:
+                    meta_outputs[name] = value
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'created': time.time(), 'outputs': meta_outputs}, f, default=str)
+            entry_size = _tree_size(tmp_dir)
+            os.rename(tmp_dir, object_dir)
+        except OSError:
+            # 其他进程已写入同一个 key
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(object_dir):
+                raise
+            return
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # 只累加计数，超过上限（或计数尚不存在）时才扫描并淘汰
+        with self._flock(os.path.join(self.root, '.evict.lock')):
+            total = self._add_size(entry_size)
+        if total is None or total > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        扫描所有条目并校正 size 计数；总大小超过 max_bytes 时按最近访问时间淘汰最旧的条目，
+        直到低于上限的 90%（正在被使用的条目跳过）
+        """
+        objects_root = os.path.join(self.root, 'objects')
+        with self._flock(os.path.join(self.root, '.evict.lock')):
+            entries = []
+            total = 0
+            for shard in os.listdir(objects_root) if os.path.isdir(objects_root) else []:
+                shard_dir = os.path.join(objects_root, shard)
+                for key in os.listdir(shard_dir):
+                    if key.startswith('.tmp_'):
+                        continue
+                    object_dir = os.path.join(shard_dir, key)
+                    try:
+                        atime = os.stat(os.path.join(object_dir, 'meta.json')).st_mtime
+                    except OSError:
+                        continue
+                    size = _tree_size(object_dir)
+                    entries.append((atime, size, key, object_dir))
+                    total += size
+
+            if total > self.max_bytes:
+                low_water = self.max_bytes * _EVICT_LOW_WATER
+                for atime, size, key, object_dir in sorted(entries):
+                    if not self._remove_entry(key, object_dir):
+                        # 正在被某个 Case 使用的条目跳过，下次淘汰时再处理
+                        continue
+                    total -= size
+                    logger.info(f"Evicted artifact cache entry {key} ({size} bytes)")
+                    if total <= low_water:
+                        break
+            self._write_size(total)
+
+
+# 进程内共享的产物缓存，首次使用时按当前缓存目录创建
+_artifact_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    global _artifact_cache
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache()
+    return _artifact_cache
+
+
+def set_artifact_cache(cache: Optional[ArtifactCache]):
+    """替换进程内共享的产物缓存，传入 None 时下次使用会按当前缓存目录重新创建"""
+    global _artifact_cache
+    _artifact_cache = cache
@@ -0,0 +1,103 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+from core.interface import AsyncBaseStep
+from core.step_factory import StepFactory
+from core.context import TestContext
+from core.timeout import CaseTimeoutError
+from core.runner import (CaseRunner, _new_case_result, _create_case_context,
+                         _complete_case_result, _fail_case_result)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCaseRunner(CaseRunner):
+    """
+    在 asyncio 事件循环中执行单个 Case 的 Pipeline，失败处理与 CaseRunner 一致：
+
+    - AsyncBaseStep 直接在事件循环中 await，等待 I/O 时不占用线程
+    - 普通同步 Step 交给线程池执行，避免阻塞事件循环
+    """
+    def __init__(self, context: TestContext, step_factory: Optional[StepFactory] = None,
+                 executor: Optional[Executor] = None,
+                 step_timeout: Optional[float] = None, case_timeout: Optional[float] = None):
+        super().__init__(context, step_factory, step_timeout=step_timeout, case_timeout=case_timeout)
+        self.executor = executor
+
+    async def arun(self, pipeline_cfg: List[Dict]):
+        logger.info(f"Starting Case Execution (async)...")
+        self._reset()
+        loop = asyncio.get_running_loop()
+
+        for step_cfg in pipeline_cfg:
+            step_type = step_cfg.get('type')
+            step = self._build_step(step_cfg)
+            if step is None:
+                break # 构建都失败了，后续无法继续
+            if not self._prepare_step(step, step_type):
+                continue
+
+            try:
+                timeout, reason = self._step_timeout(step, step_cfg)
+                self._report_deadline(timeout, reason)
+                with self._step_scope(step_type):
+                    if isinstance(step, AsyncBaseStep):
+                        await self._aprocess_step(step, timeout, reason)
+                    else:
+                        await loop.run_in_executor(self.executor, self._process_step, step, timeout, reason)
+                self._check_step_status(step, step_type)
+            except Exception as e:
+                self._handle_step_error(step, step_type, e)
+
+        self._report_deadline(None, None)
+        self._finish()
+
+    async def _aprocess_step(self, step: AsyncBaseStep, timeout: Optional[float], reason: str):
+        """
+        异步 Step 超时时直接取消协程，并设置 Context 的取消标记
+        """
+        if not timeout:
+            await step.aprocess(self.context)
+            return
+        try:
+            await asyncio.wait_for(step.aprocess(self.context), timeout)
+        except asyncio.TimeoutError:
+            logger.error(reason)
+            self.context.cancel(reason)
+            raise CaseTimeoutError(reason) from None
+
+
+async def execute_case_async(global_config: Dict, case_file: str, suite_path: str,
+                             executor: Optional[Executor] = None,
+                             case_timeout: Optional[float] = None, step_timeout: Optional[float] = None) -> Dict:
+    """
+    _execute_case 的异步版本，返回相同结构的 case_result
+    """
+    case_result = _new_case_result(case_file, suite_path)
+    ctx = None
+    loop = asyncio.get_running_loop()
+
+    try:
+        # 配置加载可能需要解析 Python 文件，放到线程池中执行
+        case_cfg, ctx = await loop.run_in_executor(
+            executor, _create_case_context, global_config, case_file, case_result)
+        runner = AsyncCaseRunner(ctx, executor=executor, step_timeout=step_timeout,
+                                 case_timeout=case_cfg.get('timeout', case_timeout))
+
+        start_time = time.time()
+        try:
+            await runner.arun(case_cfg.pipeline)
+        finally:
+            case_result['duration'] = time.time() - start_time
+
+        _complete_case_result(case_result, ctx)
+
+    except Exception as e:
+        _fail_case_result(case_result, ctx, e)
+    finally:
+        if 'duration' not in case_result:
+            case_result['duration'] = 0.0
+
+    return case_result
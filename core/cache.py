@@ -0,0 +1,185 @@
+import os
+import sys
+import pickle
+import inspect
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from mmengine.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 默认的磁盘缓存目录（相对于当前工作目录）
+DEFAULT_CACHE_DIR = '.holmes_cache'
+
+# 全局磁盘缓存目录，None 表示不启用磁盘缓存
+_cache_dir: Optional[str] = None
+
+
+def set_cache_dir(cache_dir: Optional[str]):
+    """
+    设置全局磁盘缓存目录，传入 None 关闭磁盘缓存
+    """
+    global _cache_dir
+    _cache_dir = cache_dir
+    _default_config_cache.cache_dir = cache_dir
+
+
+def get_cache_dir() -> Optional[str]:
+    """
+    获取全局磁盘缓存目录，未启用时返回 None
+    """
+    return _cache_dir
+
+
+def get_state_dir() -> str:
+    """
+    显式启用的功能（增量执行、产物缓存、镜像索引、run.py index 构建的索引）保存持久状态的目录：
+    启用了磁盘缓存时为缓存目录，否则为 DEFAULT_CACHE_DIR
+    """
+    return _cache_dir or DEFAULT_CACHE_DIR
+
+
+def _file_digest(path: str) -> str:
+    """计算文件内容的 sha256 哈希"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+# {module_name: digest}，同一进程内模块源码视为不变
+_module_digests: Dict[str, str] = {}
+
+
+def module_source_digest(module_name: str) -> str:
+    """模块的版本号（__version__）及源码文件哈希，源码不可用时退化为模块名"""
+    digest = _module_digests.get(module_name)
+    if digest is None:
+        module = sys.modules.get(module_name)
+        version = getattr(module, '__version__', '')
+        try:
+            digest = f'{version}:{_file_digest(inspect.getsourcefile(module))}'
+        except (TypeError, OSError):
+            digest = f'{version}:{module_name}'
+        _module_digests[module_name] = digest
+    return digest
+
+
+class ConfigCache:
+    """
+    已解析配置的缓存，键为文件路径，按 mtime/size 失效，
+    可选地将解析结果持久化到磁盘（按内容哈希校验），避免重复执行 Config.fromfile。
+
+    注意：返回的 Config 对象在多个调用方之间共享，调用方应将其视为只读；
+    如需修改请先 copy.deepcopy。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        # {abs_path: ((mtime_ns, size), Config)}
+        self._memory: Dict[str, Tuple[Tuple[int, int], Config]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Config:
+        """
+        加载配置文件，优先命中内存缓存，其次命中磁盘缓存，最后才真正解析
+        """
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._memory.get(abs_path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        cfg = self._load_from_disk(abs_path, stamp)
+        if cfg is None:
+            cfg = Config.fromfile(path)
+            self._save_to_disk(abs_path, stamp, cfg)
+
+        with self._lock:
+            self._memory[abs_path] = (stamp, cfg)
+        return cfg
+
+    def clear(self):
+        """清空内存缓存"""
+        with self._lock:
+            self._memory.clear()
+
+    def _disk_path(self, abs_path: str) -> str:
+        key = hashlib.sha256(abs_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'configs', key[:2], f'{key}.pkl')
+
+    def _load_from_disk(self, abs_path: str, stamp: Tuple[int, int]) -> Optional[Config]:
+        if not self.cache_dir:
+            return None
+
+        disk_path = self._disk_path(abs_path)
+        if not os.path.exists(disk_path):
+            return None
+
+        try:
+            with open(disk_path, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.debug(f"Ignore broken config cache entry {disk_path}: {e}")
+            return None
+
+        if entry.get('path') != abs_path:
+            return None
+
+        # mtime/size 一致直接命中；否则用内容哈希兜底（如 git checkout 只改变了 mtime）
+        if tuple(entry.get('stamp', ())) != stamp:
+            if entry.get('digest') != _file_digest(abs_path):
+                return None
+            entry['stamp'] = stamp
+            self._write_entry(disk_path, entry)
+
+        return entry.get('config')
+
+    def _save_to_disk(self, abs_path: str, stamp: Tuple[int, int], cfg: Config):
+        if not self.cache_dir:
+            return
+
+        # 继承了其他配置文件 (_base_) 或依赖自定义导入的配置，仅凭自身内容无法判断是否失效，不落盘
+        if cfg.get('custom_imports') or '_base_' in (cfg.text or ''):
+            return
+
+        entry = {
+            'path': abs_path,
+            'stamp': stamp,
+            'digest': _file_digest(abs_path),
+            'config': cfg,
+        }
+        self._write_entry(self._disk_path(abs_path), entry)
+
+    @staticmethod
+    def _write_entry(disk_path: str, entry: Dict):
+        """原子写入缓存条目，保证并行的多个进程不会读到写了一半的文件"""
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(disk_path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, disk_path)
+        except Exception as e:
+            logger.debug(f"Failed to write config cache entry {disk_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# 进程内共享的默认缓存
+_default_config_cache = ConfigCache()
+
+
+def load_config(path: str) -> Config:
+    """
+    通过全局共享的 ConfigCache 加载配置文件
+    """
+    return _default_config_cache.load(path)
@@ -0,0 +1,173 @@
+import os
+import csv
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.cache import load_config, get_cache_dir, set_cache_dir
+from core.exec_config import extract_exec_overrides
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+# 导出的列（CSV 列顺序，JSONL / Parquet 使用相同的字段名）
+EXPORT_FIELDS = ['case ID', 'name', 'component', 'domain', 'suite', 'case path', 'labels', 'cmd', 'exec_config',
+                 'exec_config_hash']
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+# 进程池每次分发给 Worker 的 Case 数
+_CHUNK_SIZE = 64
+
+# Parquet 每个 row group 的行数
+_PARQUET_BATCH_SIZE = 10000
+
+
+def infer_export_format(path: str, default: str = 'csv') -> str:
+    """按文件扩展名推断导出格式"""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return ext if ext in EXPORT_FORMATS else default
+
+
+def load_case_row(case_file: str, suite_path: str, component: str, domain: str) -> Tuple[Dict, Dict]:
+    """
+    加载单个 Case 的元数据并生成一行导出数据，加载失败时 name 为 ERROR
+
+    Returns:
+        (row, exec_overrides): exec_overrides 为 Case 定义的执行配置字段，
+        exec_config 列由调用方按 Case > Suite > Plan 解析后填入
+    """
+    row = {
+        # 自动生成 Case ID
+        'case ID': generate_case_id(case_file),
+        'name': 'ERROR',
+        'component': component,
+        'domain': domain,
+        'suite': suite_path,
+        'case path': case_file,
+        'labels': '',
+        'cmd': f"python run.py case {case_file}",
+        'exec_config': '',
+        # 执行配置的内容哈希：相同哈希的 Case 可以调度到同一个运行环境
+        'exec_config_hash': '',
+    }
+    exec_overrides = {}
+    try:
+        case_cfg = load_config(case_file)
+        labels = case_cfg.get('labels', [])
+        row['name'] = case_cfg.get('metadata', {}).get('name', '')
+        row['labels'] = '|'.join(labels) if isinstance(labels, list) else str(labels)
+        exec_overrides = extract_exec_overrides(case_cfg)
+    except Exception as e:
+        logger.error(f"Failed to load details for case {case_file}: {e}")
+    return row, exec_overrides
+
+
+def _load_case_row_args(args: Tuple) -> Tuple[Dict, Dict]:
+    return load_case_row(*args)
+
+
+def _init_export_worker(cache_dir: Optional[str]):
+    set_cache_dir(cache_dir)
+
+
+def iter_case_rows(cases: Iterable[Tuple], jobs: int = 1,
+                   resolve_exec_config: Optional[Callable[[str, Dict], Tuple[str, str]]] = None,
+                   cmd_options: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    按输入顺序逐行产出导出数据
+
+    Args:
+        cases: [(case_file, suite_path, component, domain), ...]
+        jobs: 并行解析 Case 配置的进程数，1 表示在当前进程内串行解析
+        resolve_exec_config: resolve(suite_path, exec_overrides) -> (exec_config, exec_config_hash)，
+            在当前进程内调用（解析结果的缓存和 YAML 写出不跨进程）
+        cmd_options: 追加到 cmd 列的命令行参数（如 Plan 的默认超时）
+    """
+    cmd_suffix = ''.join(f" {option}" for option in cmd_options or [])
+    if jobs <= 1:
+        entries = (load_case_row(*args) for args in cases)
+        executor = None
+    else:
+        # 配置解析是 CPU 密集的 Python 代码，使用进程池；map 保持输入顺序，结果按块返回
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_export_worker,
+                                       initargs=(get_cache_dir(),))
+        entries = executor.map(_load_case_row_args, cases, chunksize=_CHUNK_SIZE)
+
+    try:
+        for row, exec_overrides in entries:
+            row['cmd'] += cmd_suffix
+            if resolve_exec_config is not None:
+                row['exec_config'], row['exec_config_hash'] = resolve_exec_config(row['suite'], exec_overrides)
+            yield row
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+class CsvRowWriter:
+    def __init__(self, path: str):
+        self._fh = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._fh, fieldnames=EXPORT_FIELDS)
+        self._writer.writeheader()
+
+    def write(self, row: Dict):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._fh.close()
+
+
+class JsonlRowWriter:
+    def __init__(self, path: str):
+        self._fh = open(path, 'w', encoding='utf-8')
+
+    def write(self, row: Dict):
+        self._fh.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._fh.close()
+
+
+class ParquetRowWriter:
+    """按批写入 Parquet 的 row group（需要安装 pyarrow）"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow, install it with: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([(field, pa.string()) for field in EXPORT_FIELDS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._batch: List[Dict] = []
+
+    def write(self, row: Dict):
+        self._batch.append(row)
+        if len(self._batch) >= _PARQUET_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self._writer.write_table(self._pa.Table.from_pylist(self._batch, schema=self._schema))
+            self._batch = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+_WRITERS = {
+    'csv': CsvRowWriter,
+    'jsonl': JsonlRowWriter,
+    'parquet': ParquetRowWriter,
+}
+
+
+def open_row_writer(path: str, fmt: str):
+    """按格式创建流式行写入器（write(row) / close()）"""
+    output_dir = os.path.dirname(path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    return _WRITERS[fmt](path)
@@ -1,20 +1,23 @@
-
+import threading
 from typing import Dict, Any, Optional
-from mmengine.config import Config
 from core.status import CaseStatus
+from core.metrics import StepMetrics
+from core.layered_config import LayeredConfig
+from core.timeout import CaseTimeoutError
 
 class TestContext:
     """
     测试上下文，用于在 Pipeline 步骤间传递配置和数据。
     """
-    def __init__(self, global_config: Optional[Dict] = None, case_config: Optional[Dict] = None):
-        # 1. 配置合并：Case 配置优先于 Global 配置
-        # 注意：这里简单的字典合并可能不够，mmengine.Config 提供了更强大的合并功能
+    def __init__(self, global_config: Optional[Dict] = None, case_config: Optional[Dict] = None,
+                 suite_config: Optional[Dict] = None):
+        # 1. 配置分层：Case 配置 > Case global_config > Suite global_config > Plan global_config
+        # 各层按引用链式查找，不再为每个 Case 复制全局配置；写入只落在本 Context 的私有层（写时复制）
         self._raw_global_config = global_config or {}
+        self._raw_suite_config = suite_config or {}
         self._raw_case_config = case_config or {}
-        
-        # 将字典转换为 Config 对象以便于访问
-        self.config = Config(self._merge_configs(self._raw_global_config, self._raw_case_config))
+        self.config = LayeredConfig(self._raw_global_config, self._raw_suite_config,
+                                    self._raw_case_config.get('global_config') or {}, self._raw_case_config)
         
         # 2. 数据黑板：用于步骤间传递中间产物 (如 model_path, input_tensor, output_tensor)
         self.data: Dict[str, Any] = {}
@@ -22,12 +25,12 @@ class TestContext:
         # 3. 运行时状态
         self.status = CaseStatus.PENDING
 
-    def _merge_configs(self, global_cfg: Dict, case_cfg: Dict) -> Dict:
-        """简单的配置合并逻辑，Case 覆盖 Global"""
-        # 将 Config 对象转换为普通字典，避免类型不兼容问题
-        merged = dict(global_cfg).copy()
-        merged.update(dict(case_cfg))
-        return merged
+        # 4. 每个 Step 的耗时与资源记录（由 CaseRunner 和 BaseStep.process 填充）
+        self.step_metrics = StepMetrics()
+
+        # 5. 协作式取消：超时看门狗到期时设置，长时间运行的 Step 应通过 sleep / raise_if_cancelled 检查
+        self.cancel_event = threading.Event()
+        self.cancel_reason: Optional[str] = None
 
     def get(self, key: str, default: Any = None) -> Any:
         """从 data 中获取数据的快捷方法"""
@@ -36,3 +39,23 @@ class TestContext:
     def set(self, key: str, value: Any):
         """向 data 中写入数据的快捷方法"""
         self.data[key] = value
+
+    def cancel(self, reason: str):
+        """请求取消当前 Case（由超时看门狗调用）"""
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        """Case 已被取消时抛出 CaseTimeoutError"""
+        if self.cancel_event.is_set():
+            raise CaseTimeoutError(self.cancel_reason or "Case cancelled")
+
+    def sleep(self, seconds: float):
+        """可被取消的 sleep：Case 被取消时立即抛出 CaseTimeoutError"""
+        if self.cancel_event.wait(seconds):
+            self.raise_if_cancelled()
@@ -1,59 +1,483 @@
 import docker
+import io
 import os
+import re
 import sys
+import glob
+import json
+import time
+import shlex
+import fnmatch
+import tarfile
+import queue
+import hashlib
 import logging
-from typing import Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from core.cache import get_state_dir, DEFAULT_CACHE_DIR
 
 logger = logging.getLogger('EnvManager')
 
-class DockerEnvironment:
-    def __init__(self, env_config: Dict, workspace_root: str):
-        self.config = env_config
+# 容器内的工作目录及标记环境变量
+CONTAINER_WORKDIR = '/workspace'
+CONTAINER_ENVIRONMENT = {
+    # 标记已经在 Docker 中，防止无限递归
+    'IN_DOCKER': '1',
+    'PYTHONPATH': CONTAINER_WORKDIR
+}
+
+
+class DockerContainerPool:
+    """
+    预启动的容器池：从 image_tag 启动 N 个常驻容器（挂载 workspace），
+    通过 exec_run 在容器内执行 Case/Shard 命令，支持健康检查和空闲回收。
+
+    容器带有 holmes.pool 标签，keep_alive=True 时 shutdown 不删除容器，
+    下次创建相同 (image_tag, workspace_root) 的容器池时会直接复用。
+    client 可以注入，便于使用本地 Fake Docker Client 进行测试。
+    """
+    POOL_LABEL = 'holmes.pool'
+    # 等待空闲容器时重新检查池容量的间隔（秒）
+    ACQUIRE_POLL_INTERVAL = 1.0
+    # Exec 输出流中断后轮询命令是否结束的间隔（秒）
+    EXEC_POLL_INTERVAL = 1.0
+
+    def __init__(self, client, image_tag: str, workspace_root: str, size: int = 1,
+                 idle_timeout: Optional[float] = 600, keep_alive: bool = False):
+        self.client = client
+        self.image_tag = image_tag
         self.workspace_root = workspace_root
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.keep_alive = keep_alive
+        self.pool_key = hashlib.sha1(f"{image_tag}|{workspace_root}".encode('utf-8')).hexdigest()[:12]
+
+        self._idle: "queue.Queue" = queue.Queue()
+        self._last_used: Dict[str, float] = {}
+        self._containers: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动容器池：优先复用已在运行的同一容器池容器，不足的部分再启动新容器"""
+        adopted = self.client.containers.list(
+            filters={'label': f'{self.POOL_LABEL}={self.pool_key}', 'status': 'running'}
+        )
+        for container in adopted[:self.size]:
+            logger.info(f"Reusing pooled container {container.short_id}")
+            self._add(container)
+
+        while len(self._containers) < self.size:
+            self._add(self._start_container())
+
+    def _start_container(self):
+        volumes = {
+            self.workspace_root: {'bind': CONTAINER_WORKDIR, 'mode': 'rw'}
+        }
+        container = self.client.containers.run(
+            self.image_tag,
+            entrypoint=['sleep', 'infinity'],
+            volumes=volumes,
+            working_dir=CONTAINER_WORKDIR,
+            environment=CONTAINER_ENVIRONMENT,
+            labels={self.POOL_LABEL: self.pool_key},
+            detach=True,
+        )
+        logger.info(f"Started pooled container {container.short_id} from image {self.image_tag}")
+        return container
+
+    def _add(self, container):
+        with self._lock:
+            self._containers[container.id] = container
+            self._last_used[container.id] = time.monotonic()
+        self._idle.put(container)
+
+    def _discard(self, container):
+        with self._lock:
+            self._containers.pop(container.id, None)
+            self._last_used.pop(container.id, None)
         try:
-            self.client = docker.from_env()
+            container.remove(force=True)
         except Exception as e:
-            logger.warning(f"Failed to connect to Docker Daemon: {e}")
-            self.client = None
+            logger.warning(f"Failed to remove container {container.short_id}: {e}")
+
+    def is_healthy(self, container) -> bool:
+        """健康检查：容器处于 running 状态且可以正常执行命令"""
+        try:
+            container.reload()
+            if container.status != 'running':
+                return False
+            result = container.exec_run(['true'])
+            return result.exit_code == 0
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        获取一个健康的空闲容器，不健康的容器会被替换；timeout 秒内没有可用容器时抛出 TimeoutError
+        """
+        self.evict_idle()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            container = self._next_container(deadline)
+            if self.is_healthy(container):
+                return container
+
+            logger.warning(f"Container {container.short_id} is unhealthy, replacing it.")
+            self._discard(container)
+
+    def _next_container(self, deadline: Optional[float]):
+        """
+        取出一个空闲容器：池中不足 size 个时（容器被回收或替换后）按需启动新容器，否则等待其他任务归还。
+        等待按 ACQUIRE_POLL_INTERVAL 分段，期间容器被丢弃时可以及时补充，避免一直阻塞
+        """
+        while True:
+            try:
+                return self._idle.get(block=False)
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                if len(self._containers) < self.size:
+                    container = self._start_container()
+                    self._containers[container.id] = container
+                    self._last_used[container.id] = time.monotonic()
+                    return container
+
+            wait = self.ACQUIRE_POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No pooled container became available for image {self.image_tag} "
+                                       f"(pool size {self.size})")
+                wait = min(wait, remaining)
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def release(self, container):
+        """归还容器"""
+        with self._lock:
+            if container.id not in self._containers:
+                return
+            self._last_used[container.id] = time.monotonic()
+        self._idle.put(container)
+
+    def evict_idle(self):
+        """回收空闲时间超过 idle_timeout 的容器"""
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        keep = []
+        while True:
+            try:
+                container = self._idle.get(block=False)
+            except queue.Empty:
+                break
+            if now - self._last_used.get(container.id, now) > self.idle_timeout:
+                logger.info(f"Evicting idle container {container.short_id}")
+                self._discard(container)
+            else:
+                keep.append(container)
+        for container in keep:
+            self._idle.put(container)
+
+    def exec(self, cmd_args: List[str], timeout: Optional[float] = None) -> int:
+        """
+        在池中的某个容器内执行命令，流式输出日志并返回退出码
+
+        获取容器失败、输出流中断后无法确认结束状态、或拿不到退出码时均视为失败（返回 1），不会默认成功。
+        """
+        try:
+            container = self.acquire(timeout)
+        except Exception as e:
+            logger.error(f"Failed to acquire pooled container: {e}")
+            return 1
+        try:
+            api = self.client.api
+            exec_id = api.exec_create(container.id, cmd_args, workdir=CONTAINER_WORKDIR,
+                                      environment=CONTAINER_ENVIRONMENT)
+            try:
+                for chunk in api.exec_start(exec_id, stream=True):
+                    print(chunk.decode('utf-8', errors='replace'), end='')
+            except Exception as e:
+                # 输出流中断时命令可能仍在执行，下面等待其结束后再读取退出码
+                logger.error(f"Lost output stream of exec in container {container.short_id}: {e}")
+            return self._exec_exit_code(api, exec_id, container)
+        except Exception as e:
+            logger.error(f"Failed to exec in container {container.short_id}: {e}")
+            return 1
+        finally:
+            self.release(container)
+
+    def _exec_exit_code(self, api, exec_id, container) -> int:
+        """等待 exec 结束并返回其退出码，拿不到退出码时返回 1"""
+        while True:
+            info = api.exec_inspect(exec_id)
+            if not info.get('Running'):
+                break
+            time.sleep(self.EXEC_POLL_INTERVAL)
+        exit_code = info.get('ExitCode')
+        if exit_code is None:
+            logger.error(f"Exec in container {container.short_id} finished without an exit code")
+            return 1
+        return exit_code
+
+    def run_all(self, commands: List[List[str]]) -> int:
+        """并行地在池中执行多条命令（如多个 Shard），返回最大的退出码"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            exit_codes = list(executor.map(self.exec, commands))
+        return max(exit_codes) if exit_codes else 0
+
+    def shutdown(self):
+        """关闭容器池；keep_alive 时保留容器以便后续复用"""
+        if self.keep_alive:
+            logger.info(f"Keeping {len(self._containers)} pooled containers alive for reuse.")
+            return
+        for container in list(self._containers.values()):
+            self._discard(container)
+
+
+# 构建上下文默认排除的文件
+DEFAULT_BUILD_EXCLUDES = ['.git', '**/__pycache__', '**/*.pyc', DEFAULT_CACHE_DIR]
+
+
+class ImageBuildContext:
+    """
+    镜像构建上下文：只包含 Dockerfile 及其 COPY/ADD 实际引用的文件，
+    并按 .dockerignore 风格的排除规则过滤。用于计算内容哈希和生成构建上下文 tar 包。
+    """
+
+    def __init__(self, context_root: str, dockerfile: str, excludes: Optional[List[str]] = None):
+        self.context_root = os.path.abspath(context_root)
+        dockerfile_path = dockerfile if os.path.isabs(dockerfile) else os.path.join(self.context_root, dockerfile)
+        # Dockerfile 在构建上下文中的相对路径
+        self.dockerfile = os.path.relpath(dockerfile_path, self.context_root)
+        self.patterns = DEFAULT_BUILD_EXCLUDES + self._load_ignore_patterns() + list(excludes or [])
+        self.files = self._collect_files()
+
+    def _load_ignore_patterns(self) -> List[str]:
+        ignore_path = os.path.join(self.context_root, '.dockerignore')
+        if not os.path.exists(ignore_path):
+            return []
+        with open(ignore_path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+    def is_excluded(self, rel_path: str) -> bool:
+        """按 .dockerignore 语义判断文件是否被排除（后出现的规则优先，支持 ! 取反）"""
+        rel_path = rel_path.replace(os.sep, '/')
+        parts = rel_path.split('/')
+        candidates = ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+        excluded = False
+        for pattern in self.patterns:
+            negate = pattern.startswith('!')
+            pattern = pattern.lstrip('!').strip('/')
+            if pattern.startswith('**/'):
+                matched = any(fnmatch.fnmatch(c, pattern) or fnmatch.fnmatch(c, pattern[3:]) for c in candidates)
+            else:
+                matched = any(fnmatch.fnmatch(c, pattern) for c in candidates)
+            if matched:
+                excluded = not negate
+        return excluded
+
+    def _parse_sources(self) -> List[str]:
+        """解析 Dockerfile 中 COPY/ADD 指令引用的构建上下文路径"""
+        with open(os.path.join(self.context_root, self.dockerfile), 'r', encoding='utf-8') as f:
+            # 处理行尾的续行符
+            content = re.sub(r'\\\s*\n', ' ', f.read())
+
+        sources = []
+        for line in content.splitlines():
+            tokens = line.strip().split(None, 1)
+            if len(tokens) < 2 or tokens[0].upper() not in ('COPY', 'ADD'):
+                continue
+            args = tokens[1].strip()
+            if args.startswith('['):
+                try:
+                    paths = json.loads(args)
+                except ValueError:
+                    continue
+            else:
+                paths = shlex.split(args)
+            flags = [p for p in paths if p.startswith('--')]
+            # 多阶段构建中从其他 stage 复制的文件不属于构建上下文
+            if any(flag.startswith('--from') for flag in flags):
+                continue
+            paths = [p for p in paths if not p.startswith('--')]
+            for src in paths[:-1]:
+                if '://' not in src:
+                    sources.append(src)
+        return sources
+
+    def _collect_files(self) -> List[str]:
+        files = {self.dockerfile}
+        for src in self._parse_sources():
+            matches = glob.glob(os.path.join(self.context_root, src))
+            if not matches:
+                logger.warning(f"Build source '{src}' referenced by {self.dockerfile} does not exist.")
+            for match in matches:
+                if os.path.isdir(match):
+                    for root, _, names in os.walk(match):
+                        for name in names:
+                            files.add(os.path.relpath(os.path.join(root, name), self.context_root))
+                else:
+                    files.add(os.path.relpath(match, self.context_root))
+        return sorted(f for f in files if f == self.dockerfile or not self.is_excluded(f))
+
+    def content_hash(self) -> str:
+        """根据文件相对路径和内容计算构建输入的 sha256"""
+        sha = hashlib.sha256()
+        for rel_path in self.files:
+            sha.update(rel_path.replace(os.sep, '/').encode('utf-8') + b'\0')
+            with open(os.path.join(self.context_root, rel_path), 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    sha.update(chunk)
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+    def build_tarball(self) -> io.BytesIO:
+        """生成只包含所需文件的 gzip 压缩构建上下文"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            for rel_path in self.files:
+                tar.add(os.path.join(self.context_root, rel_path), arcname=rel_path.replace(os.sep, '/'))
+        buffer.seek(0)
+        return buffer
+
+
+class ImageBuildIndex:
+    """
+    本地镜像索引：记录 构建输入哈希 -> 已构建镜像 的映射
+    """
+
+    def __init__(self, workspace_root: str):
+        cache_dir = get_state_dir()
+        self.path = os.path.join(workspace_root, cache_dir, 'images.json')
+
+    def _load(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def get(self, content_hash: str) -> Optional[Dict]:
+        return self._load().get(content_hash)
+
+    def put(self, content_hash: str, tag: str, image_id: Optional[str] = None):
+        entries = self._load()
+        entry = entries.get(content_hash, {})
+        entry.update({'tag': tag, 'updated_at': time.time()})
+        if image_id:
+            entry['image_id'] = image_id
+        entries[content_hash] = entry
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=2)
+        except Exception as e:
+            logger.warning(f"Failed to update image index {self.path}: {e}")
+
+
+class DockerEnvironment:
+    def __init__(self, env_config: Dict, workspace_root: str, client=None):
+        self.config = env_config
+        self.workspace_root = workspace_root
+        if client is not None:
+            self.client = client
+        else:
+            try:
+                self.client = docker.from_env()
+            except Exception as e:
+                logger.warning(f"Failed to connect to Docker Daemon: {e}")
+                self.client = None
             
         self.image_tag = env_config.get('image_tag', 'holmes-test:latest')
         self.dockerfile = env_config.get('dockerfile')
+        # 容器池大小，大于 0 时使用常驻容器池执行命令
+        self.pool_size = env_config.get('pool_size', 0)
 
     def is_available(self):
         return self.client is not None
 
     def ensure_image(self):
-        """确保镜像存在，如果不存在且指定了 Dockerfile 则构建"""
+        """
+        确保镜像存在。
+
+        指定了 Dockerfile 时，镜像 tag 由 Dockerfile 及其引用的文件内容哈希决定，
+        只有输入变化时才会重新构建；否则检查本地镜像，不存在则拉取。
+        """
         if not self.is_available():
             raise RuntimeError("Docker is not available")
 
+        if self.dockerfile:
+            self._ensure_built_image()
+            return
+
         try:
             self.client.images.get(self.image_tag)
             logger.info(f"Docker image '{self.image_tag}' found locally.")
         except docker.errors.ImageNotFound:
             logger.info(f"Image '{self.image_tag}' not found.")
-            if self.dockerfile:
-                logger.info(f"Building image from {self.dockerfile}...")
-                try:
-                    # 使用 workspace_root 作为构建上下文
-                    self.client.images.build(
-                        path=self.workspace_root,
-                        dockerfile=self.dockerfile,
-                        tag=self.image_tag,
-                        rm=True
-                    )
-                    logger.info(f"Image '{self.image_tag}' built successfully.")
-                except Exception as e:
-                    logger.error(f"Failed to build image: {e}")
-                    raise
-            else:
-                logger.info(f"Pulling image '{self.image_tag}'...")
-                try:
-                    self.client.images.pull(self.image_tag)
-                    logger.info(f"Image '{self.image_tag}' pulled successfully.")
-                except Exception as e:
-                    logger.error(f"Failed to pull image: {e}")
-                    raise
+            logger.info(f"Pulling image '{self.image_tag}'...")
+            try:
+                self.client.images.pull(self.image_tag)
+                logger.info(f"Image '{self.image_tag}' pulled successfully.")
+            except Exception as e:
+                logger.error(f"Failed to pull image: {e}")
+                raise
+
+    def _ensure_built_image(self):
+        """按内容哈希查找或构建镜像，并将 self.image_tag 切换为内容寻址的 tag"""
+        build_context = ImageBuildContext(self.workspace_root, self.dockerfile,
+                                          excludes=self.config.get('build_excludes', []))
+        content_hash = build_context.content_hash()
+
+        # 拆分 repository 和 tag（注意 registry 地址中可能带端口号）
+        if ':' in self.image_tag.split('/')[-1]:
+            repository, configured_tag = self.image_tag.rsplit(':', 1)
+        else:
+            repository, configured_tag = self.image_tag, 'latest'
+        hashed_tag = f"{repository}:{content_hash[:16]}"
+
+        index = ImageBuildIndex(self.workspace_root)
+        entry = index.get(content_hash)
+        for candidate in [entry.get('tag') if entry else None, hashed_tag]:
+            if not candidate:
+                continue
+            try:
+                self.client.images.get(candidate)
+                logger.info(f"Docker image '{candidate}' is up to date (inputs hash {content_hash[:16]}).")
+                self.image_tag = candidate
+                index.put(content_hash, candidate)
+                return
+            except docker.errors.ImageNotFound:
+                continue
+
+        logger.info(f"Building image '{hashed_tag}' from {self.dockerfile} "
+                    f"({len(build_context.files)} files in build context)...")
+        try:
+            context_tar = build_context.build_tarball()
+            image, _ = self.client.images.build(
+                fileobj=context_tar,
+                custom_context=True,
+                encoding='gzip',
+                dockerfile=build_context.dockerfile,
+                tag=hashed_tag,
+                rm=True
+            )
+            # 同时打上配置中的 tag，保持兼容
+            image.tag(repository, tag=configured_tag)
+            logger.info(f"Image '{hashed_tag}' built successfully.")
+        except Exception as e:
+            logger.error(f"Failed to build image: {e}")
+            raise
+
+        self.image_tag = hashed_tag
+        index.put(content_hash, hashed_tag, getattr(image, 'id', None))
 
     def run(self, cmd_args: List[str]) -> int:
         """在容器内运行命令"""
@@ -62,14 +486,11 @@ class DockerEnvironment:
 
         # 挂载当前工作目录
         volumes = {
-            self.workspace_root: {'bind': '/workspace', 'mode': 'rw'}
+            self.workspace_root: {'bind': CONTAINER_WORKDIR, 'mode': 'rw'}
         }
 
         # 设置环境变量，标记已经在 Docker 中，防止无限递归
-        environment = {
-            'IN_DOCKER': '1',
-            'PYTHONPATH': '/workspace'
-        }
+        environment = dict(CONTAINER_ENVIRONMENT)
         
         # 传递用户可能设置的特定环境变量
         if 'options' in self.config:
@@ -84,7 +505,7 @@ class DockerEnvironment:
                 self.image_tag,
                 command=cmd_args,
                 volumes=volumes,
-                working_dir='/workspace',
+                working_dir=CONTAINER_WORKDIR,
                 environment=environment,
                 detach=True,
                 # 使用 host 网络模式可能方便某些调试，但这里暂保持默认
@@ -109,3 +530,27 @@ class DockerEnvironment:
         except Exception as e:
             logger.error(f"Failed to run container: {e}")
             return 1
+
+    def create_pool(self, size: Optional[int] = None) -> DockerContainerPool:
+        """根据 environment 配置创建并启动容器池"""
+        if not self.is_available():
+            raise RuntimeError("Docker is not available")
+
+        pool = DockerContainerPool(
+            self.client,
+            self.image_tag,
+            self.workspace_root,
+            size=size or self.pool_size or 1,
+            idle_timeout=self.config.get('idle_timeout', 600),
+            keep_alive=self.config.get('keep_alive', False),
+        )
+        pool.start()
+        return pool
+
+    def run_in_pool(self, commands: List[List[str]]) -> int:
+        """在容器池中并行执行多条命令，返回最大的退出码"""
+        pool = self.create_pool(min(self.pool_size or 1, len(commands)) if commands else None)
+        try:
+            return pool.run_all(commands)
+        finally:
+            pool.shutdown()
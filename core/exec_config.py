@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 执行配置相关字段（Plan / Suite / Case 均可定义，按 Case > Suite > Plan 合并）
+EXEC_CONFIG_FIELDS = ['environment', 'runtime', 'config_files', 'env_file', 'setup_script']
+
+# 内容哈希的长度（十六进制字符数），同时用作文件名和 metadata.name
+HASH_LENGTH = 16
+
+
+def exec_config_hash(spec: Dict) -> str:
+    """对规范化（键排序）后的 spec 计算稳定的内容哈希"""
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+def _to_plain(obj):
+    if isinstance(obj, dict):
+        return {k: _to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_plain(item) for item in obj]
+    return obj
+
+
+def extract_exec_overrides(cfg) -> Dict:
+    """提取配置中定义了值的执行配置字段（普通 dict，可跨进程传递）"""
+    if not cfg:
+        return {}
+    return {field: _to_plain(cfg.get(field)) for field in EXEC_CONFIG_FIELDS if cfg.get(field)}
+
+
+def _overrides_key(overrides: Optional[Dict]) -> str:
+    return exec_config_hash(overrides) if overrides else ''
+
+
+class ExecConfigStore:
+    """
+    按内容寻址的 exec_config 目录：<output_dir>/<hash>.yaml
+
+    哈希只取决于 spec（运行环境本身），内容相同的执行配置只写一个文件，
+    调度器可按 exec_config_hash 将 Case 归组到同一个 VM/容器上复用。
+    """
+
+    def __init__(self, output_dir: str, plan_name: str):
+        self.output_dir = output_dir
+        self.plan_name = plan_name or 'default'
+        # {hash: yaml_path}
+        self._written: Dict[str, str] = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def put(self, exec_config: Dict) -> Tuple[str, str]:
+        """
+        写入执行配置（内容已存在时直接复用），返回 (yaml_path, exec_config_hash)
+        """
+        spec = exec_config.get('spec', {})
+        config_hash = exec_config_hash(spec)
+        path = self._written.get(config_hash)
+        if path is not None:
+            return path, config_hash
+
+        # yaml 仅在导出 exec_config 时使用，延迟导入以加快 CLI 启动
+        import yaml
+
+        document = dict(exec_config)
+        document['metadata'] = {'name': config_hash, 'namespace': self.plan_name}
+        path = os.path.join(self.output_dir, f'{config_hash}.yaml')
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.dump(document, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        self._written[config_hash] = path
+        return path, config_hash
+
+    def __len__(self) -> int:
+        return len(self._written)
+
+
+class ExecConfigResolver:
+    """
+    按 Case > Suite > Plan 解析执行配置并写入 ExecConfigStore
+
+    合并结果按 (plan, suite, case 覆盖字段哈希) 缓存：没有覆盖字段的 Case 直接复用 Suite 级别的结果，
+    覆盖字段相同的 Case 只合并、写出一次。Suite 以其执行配置字段的哈希参与缓存键，
+    字段相同的 Suite 共享结果。
+
+    build(suite_overrides, case_overrides) 返回合并后的 exec_config 字典（Plan 配置由调用方绑定）。
+    """
+
+    def __init__(self, store: ExecConfigStore, suite_configs: Dict, build: Callable[[Dict, Dict], Dict]):
+        self.store = store
+        self._suite_configs = suite_configs
+        self._build = build
+        # {suite_path: (suite_overrides, suite_key)}
+        self._suites: Dict[Optional[str], Tuple[Dict, str]] = {}
+        # {(plan, suite_key, case_key): (yaml_path, exec_config_hash)}
+        self._resolved: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+
+    def _suite(self, suite_path: Optional[str]) -> Tuple[Dict, str]:
+        suite = self._suites.get(suite_path)
+        if suite is None:
+            overrides = extract_exec_overrides(self._suite_configs.get(suite_path)) if suite_path else {}
+            suite = self._suites[suite_path] = (overrides, _overrides_key(overrides))
+        return suite
+
+    def resolve(self, suite_path: Optional[str] = None, case_overrides: Optional[Dict] = None) -> Tuple[str, str]:
+        """返回 (yaml_path, exec_config_hash)；suite_path 为 None 时解析 Plan 级别的默认配置"""
+        suite_overrides, suite_key = self._suite(suite_path)
+        key = (self.store.plan_name, suite_key, _overrides_key(case_overrides))
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            exec_config = self._build(suite_overrides, case_overrides or {})
+            resolved = self._resolved[key] = self.store.put(exec_config)
+        return resolved
+
+    @property
+    def merges(self) -> int:
+        """实际执行的合并次数"""
+        return len(self._resolved)
@@ -0,0 +1,145 @@
+import os
+import json
+import struct
+import logging
+import tempfile
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 打包文件尾部：[index_json 长度 (8 字节)] + [魔数 (8 字节)]
+PACK_MAGIC = b'HLMGOLD1'
+PACK_ALIGNMENT = 64
+
+
+class GoldenStore:
+    """
+    目录形式的 golden 仓库：<root>/<case_id>/<output_name>.npy
+
+    读取时使用 np.load(mmap_mode='r')，Checker 只会读入实际访问的页，
+    golden 不需要预先加载到 TestContext 中。
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, case_id: str, name: str) -> str:
+        return os.path.join(self.root, case_id, f'{name}.npy')
+
+    def get(self, case_id: str, name: str) -> Optional[np.ndarray]:
+        """以只读 mmap 方式打开 golden，不存在时返回 None"""
+        path = self._path(case_id, name)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def put(self, case_id: str, name: str, value):
+        """写入（覆盖）一个 golden，先写临时文件再 rename"""
+        path = self._path(case_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(value))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def keys(self) -> Iterator[Tuple[str, str]]:
+        """遍历所有 (case_id, output_name)"""
+        if not os.path.isdir(self.root):
+            return
+        for case_id in sorted(os.listdir(self.root)):
+            case_dir = os.path.join(self.root, case_id)
+            if not os.path.isdir(case_dir):
+                continue
+            for file_name in sorted(os.listdir(case_dir)):
+                if file_name.endswith('.npy'):
+                    yield case_id, file_name[:-len('.npy')]
+
+    def pack(self, pack_path: str) -> int:
+        """
+        将目录中的所有 golden 打包为单个文件，返回打包的 golden 数量
+
+        格式：各数组的原始数据（按 64 字节对齐）+ JSON 索引 + 索引长度 + 魔数，
+        读取时用 np.memmap 按偏移映射，无需解包。
+        """
+        index = {}
+        output_dir = os.path.dirname(pack_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for case_id, name in self.keys():
+                    array = self.get(case_id, name)
+                    padding = -f.tell() % PACK_ALIGNMENT
+                    f.write(b'\0' * padding)
+                    index[f'{case_id}/{name}'] = {
+                        'offset': f.tell(),
+                        'dtype': array.dtype.str,
+                        'shape': list(array.shape),
+                        'fortran_order': bool(array.flags.f_contiguous and not array.flags.c_contiguous),
+                    }
+                    # tofile 按内存顺序写出，与记录的 fortran_order 一致
+                    array.tofile(f)
+                index_bytes = json.dumps(index, sort_keys=True).encode('utf-8')
+                f.write(index_bytes)
+                f.write(struct.pack('<Q', len(index_bytes)))
+                f.write(PACK_MAGIC)
+            os.replace(tmp_path, pack_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(index)
+
+
+class PackedGoldenStore:
+    """
+    单文件打包的 golden 仓库（由 GoldenStore.pack 生成），只读
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            f.seek(-16, os.SEEK_END)
+            tail = f.read(16)
+            if tail[8:] != PACK_MAGIC:
+                raise ValueError(f"Not a golden pack file: {path}")
+            index_size = struct.unpack('<Q', tail[:8])[0]
+            f.seek(-16 - index_size, os.SEEK_END)
+            self._index: Dict[str, Dict] = json.loads(f.read(index_size).decode('utf-8'))
+
+    def get(self, case_id: str, name: str) -> Optional[np.ndarray]:
+        entry = self._index.get(f'{case_id}/{name}')
+        if entry is None:
+            return None
+        shape = tuple(entry['shape'])
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=np.dtype(entry['dtype']))
+        return np.memmap(self.path, dtype=np.dtype(entry['dtype']), mode='r', offset=entry['offset'],
+                         shape=shape, order='F' if entry['fortran_order'] else 'C')
+
+    def keys(self) -> Iterator[Tuple[str, str]]:
+        for key in sorted(self._index):
+            case_id, name = key.split('/', 1)
+            yield case_id, name
+
+
+# 进程内已打开的 golden 仓库
+_stores: Dict[str, object] = {}
+
+
+def open_golden_store(path: str):
+    """
+    打开 golden 仓库：目录为 GoldenStore，文件为 PackedGoldenStore（进程内复用同一个实例）
+    """
+    store = _stores.get(path)
+    if store is None:
+        store = GoldenStore(path) if not os.path.isfile(path) else PackedGoldenStore(path)
+        _stores[path] = store
+    return store
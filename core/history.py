@@ -0,0 +1,155 @@
+import os
+import gzip
+import json
+import logging
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Optional
+from core.cache import get_cache_dir
+from core.status import CaseStatus
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSION = 1
+
+# 失败率的指数衰减系数：越大越偏向最近的结果
+FAIL_RATE_ALPHA = 0.3
+
+# 计入失败率的最终状态
+FINISHED_STATUSES = (CaseStatus.SUCCESS.value, CaseStatus.FAILED.value, CaseStatus.ERROR.value,
+                     CaseStatus.TIMEOUT.value)
+
+
+class CaseHistory:
+    """
+    Case 历史执行记录：
+        durations: {case_id: 最近一次耗时}
+        outcomes:  {case_id: {'fail_rate': 指数衰减失败率, 'last_failed': 最近一次是否失败}}
+
+    来源包括上一次运行生成的 JUnit XML、ResultSink 的 JSONL 结果日志，
+    以及每次 Plan 运行后自动维护的 <cache_dir>/history.json。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.durations: Dict[str, float] = {}
+        self.outcomes: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path: str):
+        """按文件类型加载历史记录，后加载的记录覆盖先前的记录"""
+        try:
+            if path.endswith(('.xml', '.xml.gz')):
+                self._load_junit(path)
+            elif path.endswith('.jsonl'):
+                self._load_jsonl(path)
+            else:
+                self._load_json(path)
+        except Exception as e:
+            logger.warning(f"Failed to load case history from {path}: {e}")
+
+    def _load_junit(self, path: str):
+        # testcase name 格式为 "<case_id>: <case_name>"，见 core.junit_writer.render_testcase
+        # 使用 iterparse 逐个读取 testcase 并释放，大报告不会整体加载到内存
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for _, testcase in ET.iterparse(f):
+                if testcase.tag != 'testcase':
+                    continue
+                case_id = testcase.get('name', '').split(': ', 1)[0]
+                if case_id and testcase.find('skipped') is None:
+                    if testcase.get('time') is not None:
+                        self.durations[case_id] = float(testcase.get('time'))
+                    failed = testcase.find('failure') is not None or testcase.find('error') is not None
+                    self.update_outcome(case_id, failed)
+                testcase.clear()
+
+    def _load_jsonl(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                case_id = record.get('case_id') or generate_case_id(record.get('case_file'))
+                if record.get('duration'):
+                    self.durations[case_id] = float(record['duration'])
+                if record.get('status') in FINISHED_STATUSES:
+                    self.update_outcome(case_id, record['status'] != CaseStatus.SUCCESS.value)
+
+    def _load_json(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != HISTORY_VERSION:
+            return
+        self.durations.update({k: float(v) for k, v in data.get('durations', {}).items()})
+        self.outcomes.update(data.get('outcomes', {}))
+
+    def update(self, case_id: str, duration: float):
+        """记录某个 Case 最近一次的耗时"""
+        self.durations[case_id] = duration
+
+    def update_outcome(self, case_id: str, failed: bool):
+        """记录某个 Case 最近一次的执行结果，失败率按指数衰减更新"""
+        outcome = self.outcomes.get(case_id)
+        if outcome is None:
+            fail_rate = 1.0 if failed else 0.0
+        else:
+            fail_rate = (1 - FAIL_RATE_ALPHA) * outcome['fail_rate'] + FAIL_RATE_ALPHA * (1.0 if failed else 0.0)
+        self.outcomes[case_id] = {'fail_rate': fail_rate, 'last_failed': failed}
+
+    def record(self, record: Dict):
+        """根据一条 Case 结果记录更新历史（跳过的 Case 不计入）"""
+        if record.get('duration'):
+            self.update(record['case_id'], record['duration'])
+        if record.get('status') in FINISHED_STATUSES and not record.get('cached'):
+            self.update_outcome(record['case_id'], record['status'] != CaseStatus.SUCCESS.value)
+
+    def get(self, case_id: str) -> Optional[float]:
+        """最近一次耗时，没有记录时返回 None"""
+        return self.durations.get(case_id)
+
+    def get_outcome(self, case_id: str) -> Optional[Dict]:
+        """最近的执行结果统计，没有记录时返回 None"""
+        return self.outcomes.get(case_id)
+
+    def save(self):
+        """原子写入 history.json，未指定 path 时不落盘"""
+        if not self.path:
+            return
+        output_dir = os.path.dirname(self.path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': HISTORY_VERSION, 'durations': self.durations, 'outcomes': self.outcomes},
+                          f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def get_history_path() -> Optional[str]:
+    """自动维护的历史记录文件路径，未启用缓存目录时返回 None"""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return os.path.join(cache_dir, 'history.json')
+
+
+def load_case_history(paths: Iterable[str] = (), include_auto: bool = True) -> CaseHistory:
+    """
+    加载自动维护的历史记录，并叠加命令行指定的 JUnit/JSONL 结果文件
+
+    include_auto 为 False 时只加载指定的文件（不落盘）：分片需要各节点使用相同的输入，
+    而自动维护的 history.json 是每个节点本地的状态
+    """
+    history = CaseHistory(get_history_path() if include_auto else None)
+    for path in paths:
+        history.load(path)
+    return history
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Optional
+from core.cache import get_state_dir, load_config, module_source_digest, _file_digest
+from core.status import CaseStatus
+from core.step_factory import StepFactory, default_step_factory
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+# Step 配置中被视为输入产物的字段，指向本地文件/目录时计入指纹
+INPUT_ARTIFACT_KEYS = ('uri',)
+
+
+def _json_digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class CaseFingerprinter:
+    """
+    计算 Case 的输入指纹，任一输入变化都会得到不同的指纹：
+
+    - Case 文件内容及解析后的配置（包含 _base_ 继承的内容）
+    - Plan 及 Suite 的 global_config
+    - Pipeline 引用的 Step 插件模块源码
+    - Step 声明的输入产物（uri 等指向本地路径时按内容计算，远程地址按字符串计算）
+    """
+
+    def __init__(self, global_config: Dict, step_factory: Optional[StepFactory] = None):
+        self.global_config_digest = _json_digest(global_config)
+        self.step_factory = step_factory or default_step_factory
+        # {suite_path: digest}
+        self._suite_digests: Dict[str, str] = {}
+
+    def _module_digest(self, step_type) -> str:
+        step_cls = self.step_factory.resolve(step_type) if isinstance(step_type, str) else step_type
+        if step_cls is None:
+            return f'unresolved:{step_type}'
+
+        return module_source_digest(step_cls.__module__)
+
+    @staticmethod
+    def _artifact_digest(value) -> str:
+        if not isinstance(value, str) or not os.path.exists(value):
+            return str(value)
+        if os.path.isfile(value):
+            return _file_digest(value)
+        # 目录：按相对路径和文件内容计算
+        sha = hashlib.sha256()
+        for root, dirs, files in os.walk(value):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                sha.update(os.path.relpath(path, value).encode('utf-8'))
+                sha.update(_file_digest(path).encode('utf-8'))
+        return sha.hexdigest()
+
+    def _suite_digest(self, suite_path: Optional[str]) -> str:
+        if not suite_path:
+            return ''
+        digest = self._suite_digests.get(suite_path)
+        if digest is None:
+            suite_global = load_config(suite_path).get('global_config')
+            digest = self._suite_digests[suite_path] = _json_digest(suite_global.to_dict() if suite_global else {})
+        return digest
+
+    def fingerprint(self, case_file: str, suite_path: Optional[str] = None) -> str:
+        case_cfg = load_config(case_file)
+        sha = hashlib.sha256()
+        sha.update(_file_digest(case_file).encode('utf-8'))
+        sha.update(_json_digest(case_cfg.to_dict()).encode('utf-8'))
+        sha.update(self.global_config_digest.encode('utf-8'))
+        sha.update(self._suite_digest(suite_path).encode('utf-8'))
+        for step_cfg in case_cfg.get('pipeline', []):
+            sha.update(self._module_digest(step_cfg.get('type')).encode('utf-8'))
+            for key in INPUT_ARTIFACT_KEYS:
+                if key in step_cfg:
+                    sha.update(self._artifact_digest(step_cfg[key]).encode('utf-8'))
+        return sha.hexdigest()
+
+
+class IncrementalResultStore:
+    """
+    增量模式的结果仓库：<cache_dir>/results/<case_id>.json，
+    只保存 PASSED 的记录及其输入指纹，指纹一致时可直接复用。
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(get_state_dir(), 'results')
+
+    def _path(self, case_id: str) -> str:
+        return os.path.join(self.root, f'{case_id}.json')
+
+    def get(self, case_file: str, fingerprint: str) -> Optional[Dict]:
+        """指纹一致时返回上一次的 PASSED 记录，否则返回 None"""
+        path = self._path(generate_case_id(case_file))
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read incremental result {path}: {e}")
+            return None
+        if entry.get('fingerprint') != fingerprint or entry.get('record', {}).get('case_file') != case_file:
+            return None
+        return entry['record']
+
+    def put(self, fingerprint: str, record: Dict):
+        """保存一条 PASSED 记录；非 PASSED 的记录会删除旧结果，保证下次重新执行"""
+        path = self._path(record['case_id'])
+        if record.get('status') != CaseStatus.SUCCESS.value:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'record': record}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -1,23 +1,94 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
 from core.context import TestContext
 from core.status import CaseStatus
+from core.artifact_cache import ArtifactCache, get_artifact_cache
+
+logger = logging.getLogger(__name__)
 
 class BaseStep(ABC):
     """
     所有测试步骤的基类。
     """
+    # 是否为无状态、可跨 Case 复用的 Step（为 True 时相同类型和参数的实例会被 StepFactory 复用）
+    # 注意：复用的 Step 不应在 load_context/action 中保存依赖 Case 的状态
+    reusable = False
+
+    # 产物缓存（见 core.artifact_cache.cacheable）：cache_outputs 为 None 时不缓存
+    cache_inputs = ()
+    cache_outputs = None
+    cache_config = ()
+    cache_version = ''
+
     def __init__(self, **kwargs):
+        # 记录构建参数，用于计算产物缓存的 key
+        self._step_args = dict(kwargs)
         # 允许步骤在初始化时接收特定参数
         for k, v in kwargs.items():
             setattr(self, k, v)
 
     def process(self, context: TestContext):
         """
-        模板方法：按顺序执行 load_context, action, set_context
+        模板方法：按顺序执行 load_context, action, set_context，并分阶段记录耗时。
+        声明了 cache_outputs 的 Step 会先查询产物缓存，命中时直接恢复产物并跳过执行
         """
-        self.load_context(context)
-        self.action(context)
-        self.set_context(context)
+        key = self._artifact_key(context)
+        if key is None:
+            self._run_phases(context)
+            return
+
+        cache = get_artifact_cache()
+        # 同一个 key 只由一个 Worker 执行，其余等待后直接命中
+        with cache.lock(key):
+            if self._restore_artifacts(cache, key, context):
+                return
+            self._run_phases(context)
+            self._store_artifacts(cache, key, context)
+
+    def _artifact_key(self, context: TestContext):
+        """计算产物缓存的 key，Step 未声明缓存或配置中关闭了 artifact_cache 时返回 None"""
+        if self.cache_outputs is None or not context.config.get('artifact_cache', True):
+            return None
+        step_type = f"{type(self).__module__}.{type(self).__qualname__}"
+        config = {k: context.config.get(k) for k in self.cache_config}
+        inputs = {k: context.get(k) for k in self.cache_inputs}
+        cache = get_artifact_cache()
+        return cache.make_key(step_type, getattr(self, '_step_args', {}), config, inputs,
+                              code=cache.step_code_version(type(self)))
+
+    def _restore_artifacts(self, cache: ArtifactCache, key: str, context: TestContext) -> bool:
+        try:
+            # 恢复的文件路径指向缓存目录，Case 结束（Context 释放）前不会被淘汰
+            outputs = cache.get(key, owner=context)
+        except Exception as e:
+            logger.warning(f"Failed to read artifact cache for {type(self).__name__}: {e}")
+            return False
+        if outputs is None:
+            return False
+        for name, value in outputs.items():
+            context.set(name, value)
+        context.step_metrics.annotate(cache_hit=True)
+        logger.info(f"Artifact cache hit for {type(self).__name__}: {key[:16]}")
+        return True
+
+    def _store_artifacts(self, cache: ArtifactCache, key: str, context: TestContext):
+        # 失败的 Step 不缓存
+        if context.status in [CaseStatus.FAILED, CaseStatus.ERROR]:
+            return
+        try:
+            cache.put(key, {name: context.get(name) for name in self.cache_outputs})
+        except Exception as e:
+            logger.warning(f"Failed to store artifact cache for {type(self).__name__}: {e}")
+
+    def _run_phases(self, context: TestContext):
+        metrics = context.step_metrics
+        with metrics.phase('load_context'):
+            self.load_context(context)
+        with metrics.phase('action'):
+            self.action(context)
+        with metrics.phase('set_context'):
+            self.set_context(context)
 
     def load_context(self, context: TestContext):
         """
@@ -54,4 +125,57 @@ class BaseCollector(BaseStep):
     所有结果收集器的基类。
     继承自 BaseStep，使其可以直接作为 Pipeline 的一部分运行。
     """
-    pass
\ No newline at end of file
+
+    def on_case_result(self, result, context: TestContext):
+        """
+        可选：作为 Plan Collector 时，每个 Case 结果写入结果日志后立即调用（result 为 CaseResult），
+        可用于流式输出报告；所有 Case 结束后仍会调用 process
+        """
+        pass
+
+class AsyncBaseStep(BaseStep):
+    """
+    异步步骤的基类，适用于等待 I/O 的步骤（下载、轮询远程服务、等待子进程等）。
+    子类实现 async def action，由 AsyncCaseRunner 在事件循环中直接 await；
+    load_context/set_context 仍为同步方法，应只做轻量的上下文读写。
+    """
+
+    async def aprocess(self, context: TestContext):
+        """
+        异步模板方法：按顺序执行 load_context, action, set_context，并分阶段记录耗时。
+        产物缓存的处理与 process 一致，跨进程锁在线程中等待，不阻塞事件循环
+        """
+        key = self._artifact_key(context)
+        if key is None:
+            await self._arun_phases(context)
+            return
+
+        cache = get_artifact_cache()
+        async with cache.alock(key):
+            if self._restore_artifacts(cache, key, context):
+                return
+            await self._arun_phases(context)
+            self._store_artifacts(cache, key, context)
+
+    async def _arun_phases(self, context: TestContext):
+        metrics = context.step_metrics
+        with metrics.phase('load_context'):
+            self.load_context(context)
+        with metrics.phase('action'):
+            await self.action(context)
+        with metrics.phase('set_context'):
+            self.set_context(context)
+
+    def process(self, context: TestContext):
+        """
+        在同步 CaseRunner 中运行时，使用独立的事件循环执行
+        """
+        asyncio.run(self.aprocess(context))
+
+    @abstractmethod
+    async def action(self, context: TestContext):
+        """
+        异步核心处理逻辑，子类必须实现。
+        :param context: 测试上下文，包含配置和中间数据
+        """
+        pass
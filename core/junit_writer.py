@@ -0,0 +1,201 @@
+import os
+import gzip
+import logging
+import datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+from core.status import CaseStatus
+from core.result_sink import CaseResult
+from core.result_table import SKIPPED_STATUSES
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+# 默认每累计多少个 Case 写出一次
+DEFAULT_FLUSH_EVERY = 100
+
+_CLOSING_TAG = '</testsuites>\n'
+
+# JUnit 报告中输出的 Step 指标
+_METRIC_KEYS = ('wall_time', 'cpu_time', 'rss_delta_kb')
+
+
+def _attrs(**attrs) -> str:
+    return ''.join(f' {key}={quoteattr(str(value))}' for key, value in attrs.items())
+
+
+def _truncate(text: str, max_chars: Optional[int]) -> str:
+    """保留 traceback 的末尾（异常信息所在的位置），截断开头"""
+    if not max_chars or len(text) <= max_chars:
+        return text
+    return f"... [{len(text) - max_chars} chars truncated] ...\n" + text[-max_chars:]
+
+
+def _metric_properties(prefix: str, metric: Dict) -> List[str]:
+    """将一组 wall_time/cpu_time/rss_delta_kb 指标转换为 property 节点"""
+    properties = []
+    for key in _METRIC_KEYS:
+        if key not in metric:
+            continue
+        value = metric[key]
+        value = f"{value:.6f}" if isinstance(value, float) else str(value)
+        properties.append(f'<property{_attrs(name=f"{prefix}.{key}", value=value)} />')
+    return properties
+
+
+def render_testcase(result: CaseResult, max_traceback_chars: Optional[int] = None) -> str:
+    """将一条 Case 结果渲染为 <testcase> 片段"""
+    case_file = result.case_file
+    status = result.status
+    error_msg = result.error_message if result.error_message is not None else 'Case Failed'
+    error_tb = _truncate(result.error_traceback or '', max_traceback_chars)
+
+    # testcase name 格式为 "<case_id>: <case_name>"（CaseHistory 按该格式读取 case_id）
+    case_id = result.case_id or generate_case_id(case_file)
+    case_name = result.metadata.get('name', case_file)
+
+    # Classname 为点分隔的 Case 文件路径，如 test/cases/demo/pass_case_1.py -> test.cases.demo.pass_case_1
+    if case_file:
+        classname = os.path.splitext(os.path.normpath(case_file))[0].replace(os.sep, '.')
+    else:
+        classname = "unknown.case"
+
+    parts = [f'<testcase{_attrs(name=f"{case_id}: {case_name}", classname=classname, time=f"{result.duration:.4f}")}>']
+
+    # 每个 Step 的耗时与资源指标，以 JUnit properties 的形式输出
+    properties = []
+    if result.cached:
+        properties.append(f'<property{_attrs(name="cached", value="true")} />')
+    for metric in result.step_metrics:
+        prefix = f"step.{metric.get('index')}.{metric.get('step')}"
+        properties.extend(_metric_properties(prefix, metric))
+        for phase, phase_metric in metric.get('phases', {}).items():
+            properties.extend(_metric_properties(f"{prefix}.{phase}", phase_metric))
+    if properties:
+        parts.append('<properties>' + ''.join(properties) + '</properties>')
+
+    detail = f"Status: {status}\nFile: {case_file}\n\nTraceback:\n{error_tb}"
+    if status == CaseStatus.FAILED:
+        parts.append(f'<failure{_attrs(message=error_msg)}>{escape(detail)}</failure>')
+    elif status == CaseStatus.TIMEOUT:
+        # JUnit 没有超时类型，记为 failure 并以 type 区分
+        parts.append(f'<failure{_attrs(message=error_msg, type="timeout")}>{escape(detail)}</failure>')
+    elif status == CaseStatus.ERROR:
+        parts.append(f'<error{_attrs(message=error_msg)}>{escape(detail)}</error>')
+    elif status == CaseStatus.SKIPPED:
+        parts.append(f'<skipped{_attrs(message=error_msg)} />')
+    elif status in SKIPPED_STATUSES:
+        parts.append('<skipped>Case skipped or status unknown</skipped>')
+
+    parts.append('</testcase>\n')
+    return ''.join(parts)
+
+
+class JUnitStreamWriter:
+    """
+    流式 JUnit XML 写入器：Case 结果到达时渲染为 <testcase> 片段，
+    每累计 flush_every 个 Case 按 Suite 写出一组 <testsuite> 块，内存占用与 Plan 规模无关。
+
+    - 同一个 Suite 的 Case 可能分布在多个同名 <testsuite> 块中（Jenkins/GitLab 等会按名称合并）
+    - 非压缩文件在每次写出后补上 </testsuites>，下次写出前回退覆盖，
+      因此进程中途崩溃时报告仍是合法的 XML，包含最近一次写出之前的所有 Case
+    - 路径以 .gz 结尾（或 compress=True）时输出 gzip，崩溃时可解压出最近一次写出前的内容（缺少结尾标签）
+    - max_traceback_chars: 每个 Case 保留的 traceback 字符数（保留末尾），None 表示不截断
+    """
+
+    def __init__(self, path: str, name: str = 'Plan Execution Results',
+                 max_traceback_chars: Optional[int] = None,
+                 flush_every: int = DEFAULT_FLUSH_EVERY,
+                 compress: Optional[bool] = None):
+        self.path = path
+        self.max_traceback_chars = max_traceback_chars
+        self.flush_every = max(1, flush_every)
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.count = 0
+
+        output_dir = os.path.dirname(path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        if self.compress:
+            self._fh = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self._fh = open(path, 'w', encoding='utf-8')
+
+        # {suite_path: [fragment, ...]}，以及对应 Suite 块的统计
+        self._pending: Dict[str, List[str]] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._pending_count = 0
+        self._tail_pos: Optional[int] = None
+
+        self._fh.write(f"<?xml version='1.0' encoding='utf-8'?>\n<testsuites{_attrs(name=name)}>\n")
+        self._write_tail()
+
+    def add(self, result):
+        """追加一条 Case 结果（CaseResult 或 JSON 记录）"""
+        if not isinstance(result, CaseResult):
+            result = CaseResult.from_record(result)
+        suite_path = result.suite_path or 'Unknown'
+
+        self._pending.setdefault(suite_path, []).append(render_testcase(result, self.max_traceback_chars))
+        stats = self._stats.setdefault(suite_path, {'tests': 0, 'failures': 0, 'errors': 0, 'skipped': 0, 'time': 0.0})
+        stats['tests'] += 1
+        stats['time'] += result.duration or 0.0
+        if result.status in (CaseStatus.FAILED, CaseStatus.TIMEOUT):
+            stats['failures'] += 1
+        elif result.status == CaseStatus.ERROR:
+            stats['errors'] += 1
+        elif result.status in SKIPPED_STATUSES:
+            stats['skipped'] += 1
+
+        self.count += 1
+        self._pending_count += 1
+        if self._pending_count >= self.flush_every:
+            self.flush()
+
+    def _write_tail(self):
+        """写入结尾标签并记录其位置，下次写出时从该位置覆盖"""
+        if self.compress:
+            self._fh.flush()
+            return
+        self._tail_pos = self._fh.tell()
+        self._fh.write(_CLOSING_TAG)
+        self._fh.flush()
+
+    def flush(self):
+        """将缓冲的 Case 按 Suite 写出为 <testsuite> 块"""
+        if not self._pending:
+            return
+        if self._tail_pos is not None:
+            self._fh.seek(self._tail_pos)
+            self._fh.truncate()
+
+        timestamp = datetime.datetime.now().isoformat()
+        for suite_path, fragments in self._pending.items():
+            stats = self._stats[suite_path]
+            suite_name = os.path.basename(suite_path).replace('.py', '') if suite_path != 'Unknown' else 'Unknown Suite'
+            attrs = _attrs(name=suite_name, tests=stats['tests'], failures=stats['failures'],
+                           errors=stats['errors'], skipped=stats['skipped'],
+                           time=f"{stats['time']:.4f}", timestamp=timestamp)
+            self._fh.write(f'<testsuite{attrs}>\n')
+            self._fh.writelines(fragments)
+            self._fh.write('</testsuite>\n')
+
+        self._pending.clear()
+        self._stats.clear()
+        self._pending_count = 0
+        self._write_tail()
+
+    def close(self):
+        if self._fh.closed:
+            return
+        self.flush()
+        if self.compress:
+            self._fh.write(_CLOSING_TAG)
+        self._fh.close()
+        logger.info(f"JUnit XML report generated at: {self.path} ({self.count} cases)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,196 @@
+import os
+import glob
+import json
+import logging
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Iterable
+from core.cache import load_config, get_cache_dir, get_state_dir
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = 'label_index.json'
+INDEX_VERSION = 1
+
+
+def _to_json_safe(obj):
+    """将 ConfigDict 等对象转换为可 JSON 序列化的普通结构"""
+    return json.loads(json.dumps(obj, default=str))
+
+
+class LabelIndex:
+    """
+    Case 文件 -> labels/metadata 的增量索引。
+
+    只有 mtime/size 变化的文件才会被重新解析，Suite 的 selector 过滤
+    变为对 label -> 文件集合 倒排表的集合运算。设置了 index_path 时索引会持久化到磁盘。
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = index_path
+        # {case_file: {'stamp': [mtime_ns, size], 'labels': [...], 'metadata': {...}, 'error': str|None}}
+        self._entries: Dict[str, Dict] = {}
+        # {label: {case_file, ...}}
+        self._by_label: Dict[str, Set[str]] = defaultdict(set)
+        self._dirty = False
+        self._lock = threading.Lock()
+        # 最近一次 refresh 中重新解析的文件数量
+        self.parsed_count = 0
+
+        if index_path:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load label index {self.index_path}, rebuilding: {e}")
+            return
+
+        if payload.get('version') != INDEX_VERSION:
+            return
+
+        self._entries = payload.get('entries', {})
+        for case_file, entry in self._entries.items():
+            for label in entry.get('labels', []):
+                self._by_label[label].add(case_file)
+
+    def save(self):
+        """将索引原子写入磁盘（仅在有变化且配置了 index_path 时）"""
+        if not self.index_path or not self._dirty:
+            return
+
+        tmp_path = None
+        try:
+            index_dir = os.path.dirname(self.index_path) or '.'
+            os.makedirs(index_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'entries': self._entries}, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"Failed to save label index {self.index_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, case_file: str) -> Optional[Dict]:
+        """获取 Case 的索引条目（labels, metadata 等）"""
+        return self._entries.get(case_file)
+
+    def refresh(self, case_root: str) -> List[str]:
+        """
+        扫描 case_root 下的 Case 文件，仅重新解析 mtime/size 变化的文件
+
+        Returns:
+            List[str]: case_root 下所有 Case 文件（保持 glob 顺序）
+        """
+        search_pattern = os.path.join(case_root, '**', '*.py')
+        case_files = [f for f in glob.glob(search_pattern, recursive=True)
+                      if not os.path.basename(f).startswith('__')]
+
+        self.parsed_count = 0
+        with self._lock:
+            for case_file in case_files:
+                try:
+                    stat = os.stat(case_file)
+                except OSError:
+                    continue
+                stamp = [stat.st_mtime_ns, stat.st_size]
+                entry = self._entries.get(case_file)
+                if entry is not None and entry.get('stamp') == stamp:
+                    continue
+                self._update_entry(case_file, stamp)
+                self.parsed_count += 1
+
+            # 移除已被删除的文件
+            prefix = os.path.join(case_root, '')
+            existing = set(case_files)
+            for case_file in [f for f in self._entries if f.startswith(prefix) and f not in existing]:
+                self._remove_entry(case_file)
+
+        return case_files
+
+    def _update_entry(self, case_file: str, stamp: List[int]):
+        self._remove_entry(case_file)
+        entry = {'stamp': stamp, 'labels': [], 'metadata': {}, 'error': None}
+        try:
+            case_cfg = load_config(case_file)
+            labels = case_cfg.get('labels', [])
+            if isinstance(labels, str):
+                labels = [labels]
+            entry['labels'] = [str(label) for label in labels]
+            entry['metadata'] = _to_json_safe(case_cfg.get('metadata', {}))
+        except Exception as e:
+            logger.warning(f"Failed to load case file: {case_file}. Error: {e}")
+            entry['error'] = str(e)
+
+        self._entries[case_file] = entry
+        for label in entry['labels']:
+            self._by_label[label].add(case_file)
+        self._dirty = True
+
+    def _remove_entry(self, case_file: str):
+        entry = self._entries.pop(case_file, None)
+        if entry is None:
+            return
+        for label in entry.get('labels', []):
+            self._by_label[label].discard(case_file)
+        self._dirty = True
+
+    def _files_with_any(self, labels: Iterable[str]) -> Set[str]:
+        matched = set()
+        for label in labels:
+            matched |= self._by_label.get(label, set())
+        return matched
+
+    def select(self, case_root: str, include_labels: Iterable[str] = (), exclude_labels: Iterable[str] = ()) -> List[str]:
+        """
+        按 include/exclude labels 圈选 case_root 下的 Case 文件
+
+        - 排除逻辑：包含任一 exclude label 的 Case 被排除
+        - 包含逻辑：如果指定了 include，则必须包含至少一个
+        """
+        case_files = self.refresh(case_root)
+        include_labels = set(include_labels)
+        exclude_labels = set(exclude_labels)
+
+        candidates = {f for f in case_files if not self._entries.get(f, {}).get('error')}
+        if include_labels:
+            candidates &= self._files_with_any(include_labels)
+        if exclude_labels:
+            candidates -= self._files_with_any(exclude_labels)
+
+        return [f for f in case_files if f in candidates]
+
+
+# 进程内共享的默认索引，按缓存目录区分
+_default_index: Optional[LabelIndex] = None
+
+
+def label_index_path(persist: bool = False) -> Optional[str]:
+    """
+    索引文件路径（run.py index 与 Suite 筛选使用同一规则）：
+
+    - 启用了磁盘缓存，或 persist 为 True（run.py index）时为 <state_dir>/label_index.json
+    - 否则仅当该文件已存在（之前执行过 run.py index）时使用它，不创建新的索引文件
+    """
+    index_path = os.path.join(get_state_dir(), INDEX_FILE_NAME)
+    if persist or get_cache_dir() or os.path.exists(index_path):
+        return index_path
+    return None
+
+
+def get_label_index(persist: bool = False) -> LabelIndex:
+    """
+    获取进程内共享的 LabelIndex，索引文件路径见 label_index_path
+    """
+    global _default_index
+    index_path = label_index_path(persist)
+    if _default_index is None or _default_index.index_path != index_path:
+        _default_index = LabelIndex(index_path)
+    return _default_index
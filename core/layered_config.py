@@ -0,0 +1,117 @@
+import copy
+from typing import Any, Dict, Iterator, List
+from mmengine.config import Config, ConfigDict
+
+_MISSING = object()
+
+
+def _as_mapping(layer) -> Dict:
+    """将 Config 解包为其内部的 ConfigDict，None 视为空层"""
+    if layer is None:
+        return {}
+    if isinstance(layer, Config):
+        return layer._cfg_dict
+    return layer
+
+
+def _to_plain(value: Any) -> Any:
+    return value.to_dict() if isinstance(value, ConfigDict) else value
+
+
+class LayeredConfig:
+    """
+    分层配置视图：按 Case > Suite > Plan 的优先级逐层查找，创建时不复制任何一层。
+
+    - 同名 key 取优先级最高的层，字典值整体覆盖下层（与原先 Case 覆盖 Global 的 key 级合并一致，不做深度合并）
+    - 字典值以 ConfigDict 返回，支持 context.config.engine.a 形式的属性访问
+    - get 支持点分隔的深层 key（如 get('model.input.shape')）
+    - 各层（Plan/Suite 的 global_config、缓存中的 Case 配置）在多个 Context 之间共享，
+      因此写入和对字典/列表值的访问都采用写时复制：首次访问时把该值的拷贝放入本 Context 的私有层，
+      之后的修改只影响当前 Context。创建 Context 的开销与全局配置大小无关。
+    """
+
+    def __init__(self, *layers):
+        # layers 按优先级从低到高传入，查找时从最后一层开始
+        object.__setattr__(self, '_layers', [_as_mapping(layer) for layer in layers])
+        object.__setattr__(self, '_local', {})
+
+    def _lookup(self, key: str) -> Any:
+        local = self._local
+        if key in local:
+            return local[key]
+
+        for layer in reversed(self._layers):
+            if key in layer:
+                value = layer[key]
+                break
+        else:
+            return _MISSING
+
+        if isinstance(value, (dict, list)):
+            # 写时复制：拷贝到私有层（嵌套的字典转换为 ConfigDict），避免修改共享的下层配置
+            value = local[key] = ConfigDict({key: copy.deepcopy(_to_plain(value))})[key]
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        if '.' not in key:
+            return default
+
+        # 深层 key：第一段按分层查找，其余逐级下钻
+        head, *rest = key.split('.')
+        value = self._lookup(head)
+        for part in rest:
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return default
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, key: str) -> Any:
+        if key.startswith('__'):
+            raise AttributeError(key)
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{key}'")
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._local[key] = value
+
+    def __setattr__(self, key: str, value: Any):
+        self._local[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._local or any(key in layer for layer in self._layers)
+
+    def keys(self) -> List[str]:
+        keys = dict.fromkeys(self._local)
+        for layer in reversed(self._layers):
+            keys.update(dict.fromkeys(layer))
+        return list(keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict:
+        """合并为普通 dict（会拷贝所有层，仅用于导出/调试）"""
+        return {key: copy.deepcopy(_to_plain(self[key])) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(keys={self.keys()})"
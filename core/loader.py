@@ -1,8 +1,8 @@
-import os
-import glob
 import logging
 from typing import List, Dict, Tuple, Optional
 from mmengine.config import Config
+from core.cache import load_config
+from core.label_index import get_label_index
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,7 @@ class SuiteLoader:
         """
         加载并返回 Suite 配置对象
         """
-        return Config.fromfile(suite_path)
+        return load_config(suite_path)
 
     @staticmethod
     def load_cases_with_config(suite_path: str) -> Tuple[List[str], Config]:
@@ -26,7 +26,7 @@ class SuiteLoader:
         Returns:
             Tuple[List[str], Config]: (case_files, suite_config)
         """
-        suite_cfg = Config.fromfile(suite_path)
+        suite_cfg = load_config(suite_path)
         case_files = SuiteLoader._scan_and_filter_cases(suite_cfg)
         return case_files, suite_cfg
 
@@ -37,37 +37,14 @@ class SuiteLoader:
         """
         case_root = suite_cfg.get('case_root', '.')
 
-        # 构造搜索模式
-        search_pattern = os.path.join(case_root, '**', '*.py')
-        all_case_files = glob.glob(search_pattern, recursive=True)
-
-        # 过滤逻辑 (Label 过滤)
-        valid_cases = []
+        # 过滤逻辑 (Label 过滤)：基于增量 Label 索引做集合运算，只有变化的文件才会被重新解析
         selector = suite_cfg.get('selector', {})
-        include_labels = set(selector.get('include_labels', []))
-        exclude_labels = set(selector.get('exclude_labels', []))
-
-        for case_file in all_case_files:
-            if os.path.basename(case_file).startswith('__'):
-                continue
-
-            # 读取 Case 配置判断 Label
-            try:
-                case_cfg = Config.fromfile(case_file)
-                case_labels = set(case_cfg.get('labels', []))
-
-                # 排除逻辑
-                if exclude_labels and not case_labels.isdisjoint(exclude_labels):
-                    continue
-
-                # 包含逻辑: 如果指定了 include，则必须包含至少一个
-                if include_labels and case_labels.isdisjoint(include_labels):
-                    continue
+        include_labels = selector.get('include_labels', [])
+        exclude_labels = selector.get('exclude_labels', [])
 
-                valid_cases.append(case_file)
-            except Exception as e:
-                logger.warning(f"Failed to load case file: {case_file}. Error: {e}")
-                pass
+        index = get_label_index()
+        valid_cases = index.select(case_root, include_labels, exclude_labels)
+        index.save()
 
         return valid_cases
 
@@ -76,5 +53,5 @@ class SuiteLoader:
         """
         解析 Suite 配置文件，返回需要执行的 Case 文件路径列表
         """
-        suite_cfg = Config.fromfile(suite_path)
+        suite_cfg = load_config(suite_path)
         return SuiteLoader._scan_and_filter_cases(suite_cfg)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 下没有 resource 模块，不采集 RSS
+    resource = None
+
+
+def _peak_rss_kb() -> int:
+    """当前进程的峰值 RSS（KB）"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 下 ru_maxrss 单位为字节，Linux 下为 KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class _Measure:
+    """一次测量区间：单调时钟耗时、CPU 时间、峰值 RSS 增量"""
+
+    __slots__ = ('wall_start', 'cpu_start', 'rss_start')
+
+    def __init__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.rss_start = _peak_rss_kb()
+
+    def stop(self) -> Dict:
+        return {
+            'wall_time': time.perf_counter() - self.wall_start,
+            'cpu_time': time.process_time() - self.cpu_start,
+            'rss_delta_kb': _peak_rss_kb() - self.rss_start,
+        }
+
+
+class StepMetrics:
+    """
+    Pipeline 中每个 Step 的耗时与资源记录，按 load_context/action/set_context 阶段拆分。
+
+    records 结构：
+        [{'index': 0, 'step': 'demo.ModelLoader', 'error': False,
+          'wall_time': ..., 'cpu_time': ..., 'rss_delta_kb': ...,
+          'phases': {'load_context': {...}, 'action': {...}, 'set_context': {...}}}, ...]
+    """
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self._current: Optional[Dict] = None
+
+    @contextmanager
+    def step(self, step_type: str):
+        """记录一个 Step 的整体耗时，期间的 phase 会归属到该 Step"""
+        record = {'index': len(self.records), 'step': step_type, 'error': False, 'phases': {}}
+        self.records.append(record)
+        self._current = record
+        measure = _Measure()
+        try:
+            yield record
+        except BaseException:
+            record['error'] = True
+            raise
+        finally:
+            record.update(measure.stop())
+            self._current = None
+
+    def annotate(self, **fields):
+        """为当前 Step 的记录附加字段（如 cache_hit），不在 Step 内时忽略"""
+        if self._current is not None:
+            self._current.update(fields)
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录当前 Step 的某个阶段，不在 Step 内时不做任何记录"""
+        record = self._current
+        if record is None:
+            yield
+            return
+        measure = _Measure()
+        try:
+            yield
+        finally:
+            record['phases'][name] = measure.stop()
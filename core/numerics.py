@@ -0,0 +1,132 @@
+import math
+import logging
+from typing import Dict, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 每次处理的元素个数：float64 缓冲区 512 KB/个，可常驻 CPU 缓存，峰值额外内存与张量大小无关
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# 计算相对误差时分母的下限，避免除零
+_EPS = np.finfo(np.float64).tiny
+
+
+def load_tensor(value) -> np.ndarray:
+    """
+    将张量来源统一转换为 ndarray：.npy 路径以只读 mmap 方式打开（不读入内存），
+    list/标量等转换为 ndarray，已有的 ndarray/memmap 原样返回
+    """
+    if isinstance(value, str):
+        return np.load(value, mmap_mode='r')
+    return np.asarray(value)
+
+
+def _flat(tensor: np.ndarray):
+    """
+    按 C 顺序展平，用于按分块切片：C 连续的数组（含 memmap）reshape(-1) 是视图；
+    其他布局（Fortran 顺序、切片得到的 memmap 等）reshape 会复制整个张量，
+    此时返回 flatiter，每次切片只复制该分块
+    """
+    return tensor.reshape(-1) if tensor.flags.c_contiguous else tensor.flat
+
+
+def compare_tensors(actual: Union[np.ndarray, list], golden: Union[np.ndarray, list],
+                    rtol: float = 1e-5, atol: float = 1e-8,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    分块向量化对比两个张量，语义与 np.isclose(actual, golden, rtol, atol) 一致（NaN 视为不匹配），
+    两个张量的 shape 必须相同（不做广播）
+
+    每个分块复制到预先分配的 float64 缓冲区中计算，所有中间结果写回缓冲区，
+    因此对 mmap 的大张量也不会把整个张量读入内存。
+
+    Returns:
+        Dict: {'size', 'mismatch_count', 'mismatch_ratio', 'max_abs_error', 'max_rel_error',
+               'cosine_similarity', 'nan_count', 'rtol', 'atol'}
+    """
+    actual = load_tensor(actual)
+    golden = load_tensor(golden)
+    if actual.shape != golden.shape:
+        raise ValueError(f"Tensor shape mismatch: actual {actual.shape} vs golden {golden.shape}")
+
+    size = actual.size
+    actual = _flat(actual)
+    golden = _flat(golden)
+
+    chunk_size = max(1, min(chunk_size, size))
+    buf_a = np.empty(chunk_size, dtype=np.float64)
+    buf_g = np.empty(chunk_size, dtype=np.float64)
+    buf_d = np.empty(chunk_size, dtype=np.float64)
+    buf_t = np.empty(chunk_size, dtype=np.float64)
+    mask = np.empty(chunk_size, dtype=bool)
+    mask_inf = np.empty(chunk_size, dtype=bool)
+
+    dot = norm_a = norm_g = 0.0
+    max_abs = max_rel = 0.0
+    mismatch = nan_count = 0
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        for start in range(0, size, chunk_size):
+            n = min(chunk_size, size - start)
+            a, g, d, t, m, mi = buf_a[:n], buf_g[:n], buf_d[:n], buf_t[:n], mask[:n], mask_inf[:n]
+            np.copyto(a, actual[start:start + n], casting='unsafe')
+            np.copyto(g, golden[start:start + n], casting='unsafe')
+
+            dot += float(np.dot(a, g))
+            norm_a += float(np.dot(a, a))
+            norm_g += float(np.dot(g, g))
+
+            # 绝对误差
+            np.subtract(a, g, out=d)
+            np.abs(d, out=d)
+            np.isnan(d, out=m)
+            chunk_nan = int(np.count_nonzero(m))
+            if chunk_nan:
+                # 相等的 inf 相减得到 NaN，视为误差 0
+                np.equal(a, g, out=m)
+                np.copyto(d, 0.0, where=m)
+                np.isnan(d, out=m)
+                chunk_nan = int(np.count_nonzero(m))
+            nan_count += chunk_nan
+            # 含 NaN 时使用忽略 NaN 的 fmax 归约（比 max 慢，仅在需要时使用）
+            reduce_max = np.fmax.reduce if chunk_nan else np.max
+            if chunk_nan < n:
+                max_abs = max(max_abs, float(reduce_max(d)))
+
+            # 容差：atol + rtol * |golden|（复用 a 的缓冲区）
+            np.abs(g, out=t)
+            np.multiply(t, rtol, out=a)
+            a += atol
+            np.greater(d, a, out=m)
+            # golden 为 inf 时容差也为 inf：除非与 golden 相等（误差已置 0），否则视为不匹配
+            np.isinf(a, out=mi)
+            if mi.any():
+                mi &= d > 0
+                m |= mi
+            mismatch += int(np.count_nonzero(m)) + chunk_nan
+
+            # 相对误差：|actual - golden| / |golden|
+            np.maximum(t, _EPS, out=t)
+            np.divide(d, t, out=t)
+            if chunk_nan < n:
+                max_rel = max(max_rel, float(reduce_max(t)))
+
+    if norm_a == 0.0 and norm_g == 0.0:
+        cosine = 1.0
+    elif norm_a == 0.0 or norm_g == 0.0:
+        cosine = 0.0
+    else:
+        cosine = dot / math.sqrt(norm_a * norm_g)
+
+    return {
+        'size': int(size),
+        'mismatch_count': mismatch,
+        'mismatch_ratio': mismatch / size if size else 0.0,
+        'max_abs_error': max_abs,
+        'max_rel_error': max_rel,
+        'cosine_similarity': cosine,
+        'nan_count': nan_count,
+        'rtol': rtol,
+        'atol': atol,
+    }
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import logging
+import importlib
+import importlib.util
+import threading
+from typing import Callable, Dict, List, Optional
+from core.registry import STEPS, CHECKERS, ENGINES, COLLECTORS
+
+logger = logging.getLogger(__name__)
+
+# 插件包目录下的清单文件：{"demo.ModelLoader": "sample_project.plugins.steps.sample", ...}
+MANIFEST_FILE = 'plugin_manifest.json'
+
+
+def _package_dir(package: str) -> Optional[str]:
+    spec = importlib.util.find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return list(spec.submodule_search_locations)[0]
+
+
+def manifest_path(package: str) -> Optional[str]:
+    package_dir = _package_dir(package)
+    return os.path.join(package_dir, MANIFEST_FILE) if package_dir else None
+
+
+class PluginManifest:
+    """
+    插件清单：记录已注册的 Step 类型（如 demo.ModelLoader）所在的模块，
+    Pipeline 首次引用某个类型时才导入对应模块，CLI 启动时不再导入所有插件。
+
+    插件包在 __init__.py 中通过 register_plugin_package 注册自身及 load_all 函数；
+    类型不在清单中（清单过期、新增插件未重新生成）时回退为调用 load_all 导入整个插件包。
+    """
+
+    def __init__(self):
+        # {package: load_all}
+        self._packages: Dict[str, Callable[[], None]] = {}
+        # {step_type: module_name}
+        self._entries: Dict[str, str] = {}
+        self._fully_loaded = set()
+        self._lock = threading.RLock()
+
+    def register_package(self, package: str, load_all: Callable[[], None]):
+        with self._lock:
+            self._packages[package] = load_all
+            path = manifest_path(package)
+            if not path or not os.path.exists(path):
+                logger.debug(f"No plugin manifest for {package}, plugins will be loaded on first miss")
+                return
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries.update(json.load(f))
+            except Exception as e:
+                logger.warning(f"Failed to read plugin manifest {path}: {e}")
+
+    @property
+    def packages(self) -> List[str]:
+        return list(self._packages)
+
+    def ensure(self, step_type: str) -> bool:
+        """
+        导入 step_type 所在的插件模块，返回是否导入了新的模块（调用方据此决定是否重新查找注册表）
+        """
+        with self._lock:
+            module_name = self._entries.get(step_type)
+            if module_name and module_name not in sys.modules:
+                try:
+                    importlib.import_module(module_name)
+                    return True
+                except Exception as e:
+                    logger.warning(f"Failed to import plugin module {module_name} for {step_type}: {e}")
+
+            # 回退：导入所有尚未完整加载的插件包
+            loaded = False
+            for package, load_all in self._packages.items():
+                if package in self._fully_loaded:
+                    continue
+                self._fully_loaded.add(package)
+                logger.debug(f"{step_type} not found in plugin manifest, loading all plugins of {package}")
+                load_all()
+                loaded = True
+            return loaded
+
+    def load_all(self):
+        """导入所有已注册插件包的全部模块"""
+        with self._lock:
+            for package, load_all in self._packages.items():
+                if package not in self._fully_loaded:
+                    self._fully_loaded.add(package)
+                    load_all()
+
+
+def _registered_types(registry, prefix: str = '') -> Dict[str, str]:
+    """遍历注册表（含子 Scope 注册表），返回 {step_type: module_name}"""
+    entries = {}
+    for name, obj in registry.module_dict.items():
+        module_name = getattr(obj, '__module__', None)
+        if module_name:
+            entries[f'{prefix}{name}'] = module_name
+    for scope, child in registry.children.items():
+        entries.update(_registered_types(child, f'{prefix}{scope}.'))
+    return entries
+
+
+def generate_manifest(package: str) -> str:
+    """
+    导入插件包的全部模块，并将其中注册的类型写入清单文件，返回清单路径
+    """
+    importlib.import_module(package)
+    load_all = plugin_manifest._packages.get(package)
+    if load_all is None:
+        raise ValueError(f"{package} is not a registered plugin package (missing register_plugin_package)")
+    load_all()
+
+    entries = {}
+    for registry in [STEPS, CHECKERS, ENGINES, COLLECTORS]:
+        for step_type, module_name in _registered_types(registry).items():
+            if module_name == package or module_name.startswith(package + '.'):
+                entries[step_type] = module_name
+
+    path = manifest_path(package)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(entries.items())), f, indent=2)
+        f.write('\n')
+    return path
+
+
+# 进程内共享的插件清单
+plugin_manifest = PluginManifest()
+
+
+def register_plugin_package(package: str, load_all: Callable[[], None]):
+    """插件包在 __init__.py 中调用，注册清单及导入全部模块的函数"""
+    plugin_manifest.register_package(package, load_all)
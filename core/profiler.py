@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import heapq
+import pstats
+import cProfile
+import logging
+import threading
+from types import FrameType
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class PlanProfiler:
+    """
+    Plan 级别的性能分析器，只对 Step 的执行区间进行采样，排除配置解析、插件导入等噪声。
+
+    - 每种 step_type 一个 cProfile，汇总输出为 plan.prof，并按 step_type 输出 steps/<type>.prof
+    - 采样线程记录调用栈，输出 flamegraph 工具可用的 collapsed-stack 文件（case;step;frame...）
+    - 统计最慢的 step_type 和 Case，输出 top-N 表格
+    """
+
+    def __init__(self, output_dir: str = 'profile', interval: float = 0.005, top_n: int = 20):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_n = top_n
+
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        # {step_type: [count, total_wall, max_wall]}
+        self._step_stats: Dict[str, List] = defaultdict(lambda: [0, 0.0, 0.0])
+        # 最慢的 top-N Case（小顶堆）：[(duration, case_id)]
+        self._slow_cases: List[Tuple[float, str]] = []
+        # {collapsed_stack: samples}
+        self._stacks: Dict[str, int] = defaultdict(int)
+
+        # 采样线程读取的当前作用域：(thread_id, base_frame, case_id, step_type)
+        self._scope: Optional[Tuple[int, Optional[FrameType], str, str]] = None
+        self._current_case = 'unknown'
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动采样线程"""
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='holmes-profiler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.interval):
+            scope = self._scope
+            if scope is None:
+                continue
+            thread_id, base_frame, case_id, step_type = scope
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+
+            # 只保留 base_frame 下方的调用栈，去掉进入 Step 之前的部分（CLI、PlanRunner、CaseRunner 等）
+            labels = []
+            while frame is not None and frame is not base_frame:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            stack = [case_id, step_type] + labels
+            self._stacks[';'.join(stack)] += 1
+
+    @contextmanager
+    def case(self, case_id: str):
+        """记录一个 Case 的执行区间"""
+        self._current_case = case_id
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if len(self._slow_cases) < self.top_n:
+                heapq.heappush(self._slow_cases, (duration, case_id))
+            else:
+                heapq.heappushpop(self._slow_cases, (duration, case_id))
+            self._current_case = 'unknown'
+
+    @contextmanager
+    def step(self, step_type: str, base_frame: Optional[FrameType] = None):
+        """
+        记录一个 Step 的执行区间：开启该 step_type 的 cProfile 并允许采样
+
+        base_frame 为执行 Step 的调用方栈帧（如 CaseRunner.run），采样时只保留其下方的调用栈；
+        未指定时保留完整调用栈
+        """
+        profile = self._profiles.get(step_type)
+        if profile is None:
+            profile = self._profiles[step_type] = cProfile.Profile()
+
+        self._scope = (threading.get_ident(), base_frame, self._current_case, step_type)
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            self._scope = None
+            stats = self._step_stats[step_type]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+    def finish(self):
+        """停止采样并写出所有分析结果"""
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+        steps_dir = os.path.join(self.output_dir, 'steps')
+        os.makedirs(steps_dir, exist_ok=True)
+
+        # 1. cProfile 结果：按 step_type 输出，并汇总为 plan.prof
+        aggregated = None
+        for step_type, profile in self._profiles.items():
+            safe_name = step_type.replace('/', '_')
+            profile.dump_stats(os.path.join(steps_dir, f'{safe_name}.prof'))
+            if aggregated is None:
+                aggregated = pstats.Stats(profile)
+            else:
+                aggregated.add(profile)
+        if aggregated is not None:
+            aggregated.dump_stats(os.path.join(self.output_dir, 'plan.prof'))
+
+        # 2. collapsed-stack 文件，可直接输入 flamegraph.pl / speedscope
+        with open(os.path.join(self.output_dir, 'plan.collapsed'), 'w', encoding='utf-8') as f:
+            for stack, samples in sorted(self._stacks.items()):
+                f.write(f"{stack} {samples}\n")
+
+        # 3. top-N 最慢 step_type / Case 报告
+        report = self.format_report()
+        with open(os.path.join(self.output_dir, 'top_slow.txt'), 'w', encoding='utf-8') as f:
+            f.write(report)
+        logger.info("\n" + report)
+        logger.info(f"Profile results written to: {self.output_dir}")
+
+    def format_report(self) -> str:
+        """生成 top-N 最慢 step_type 和 Case 的文本表格"""
+        lines = [f"Top {self.top_n} slowest step types (by total wall time)",
+                 f"{'step_type':<40} {'count':>8} {'total(s)':>12} {'mean(s)':>12} {'max(s)':>12}"]
+        ranked_steps = sorted(self._step_stats.items(), key=lambda item: item[1][1], reverse=True)
+        for step_type, (count, total, max_wall) in ranked_steps[:self.top_n]:
+            lines.append(f"{step_type:<40} {count:>8} {total:>12.4f} {total / count:>12.4f} {max_wall:>12.4f}")
+
+        lines += ['', f"Top {self.top_n} slowest cases",
+                  f"{'case_id':<60} {'duration(s)':>12}"]
+        for duration, case_id in sorted(self._slow_cases, reverse=True):
+            lines.append(f"{case_id:<60} {duration:>12.4f}")
+        return '\n'.join(lines) + '\n'
@@ -12,4 +12,23 @@ CHECKERS = Registry('checkers')
 ENGINES = Registry('engines')
 
 # COLLECTORS: 用于注册结果收集器插件
-COLLECTORS = Registry('collectors')
\ No newline at end of file
+COLLECTORS = Registry('collectors')
+
+def collect_plugin_modules() -> list:
+    """
+    收集当前所有注册表（含子 Scope 注册表）中已注册类所在的模块名，
+    用于在子进程中重新导入插件以触发注册。
+    """
+    modules = []
+
+    def _walk(registry):
+        for obj in registry.module_dict.values():
+            module_name = getattr(obj, '__module__', None)
+            if module_name and module_name not in modules:
+                modules.append(module_name)
+        for child in registry.children.values():
+            _walk(child)
+
+    for registry in [STEPS, CHECKERS, ENGINES, COLLECTORS]:
+        _walk(registry)
+    return modules
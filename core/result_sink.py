@@ -0,0 +1,168 @@
+import os
+import json
+import logging
+import tempfile
+from typing import Any, Dict, Iterator, Iterable, List, Optional
+from core.status import CaseStatus
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_case_result(case_result: Dict, data_keys: Iterable[str] = ()) -> Dict:
+    """
+    将 case_result 转换为紧凑的可 JSON 序列化记录，丢弃 TestContext，
+    仅保留 data_keys 指定的黑板数据
+    """
+    status = case_result.get('status', CaseStatus.UNKNOWN)
+    case_file = case_result.get('case_file')
+
+    data = {}
+    step_metrics = []
+    ctx = case_result.get('context')
+    if ctx is not None:
+        for key in data_keys:
+            if key in ctx.data:
+                data[key] = ctx.data[key]
+        step_metrics = ctx.step_metrics.records
+
+    record = {
+        'case_file': case_file,
+        'suite_path': case_result.get('suite_path'),
+        'case_id': generate_case_id(case_file),
+        'metadata': case_result.get('metadata') or {},
+        'status': status.value if isinstance(status, CaseStatus) else str(status),
+        'duration': case_result.get('duration', 0.0),
+        'error_message': case_result.get('error_message'),
+        'error_traceback': case_result.get('error_traceback'),
+        'data': data,
+        'step_metrics': step_metrics,
+        # 增量模式下复用的历史结果会被标记为 True
+        'cached': bool(case_result.get('cached', False)),
+    }
+    # 统一转换为普通 JSON 结构（ConfigDict、Tensor 等无法直接序列化的对象转为字符串）
+    return json.loads(json.dumps(record, default=str))
+
+
+class CaseResult:
+    """
+    Plan 结果日志中的一条 Case 记录（使用 __slots__，避免每条记录一个 __dict__）
+
+    保留 get / [] 的字典式访问，兼容按 dict 读取记录的 Collector。
+    """
+    __slots__ = ('case_file', 'suite_path', 'case_id', 'metadata', 'status', 'duration',
+                 'error_message', 'error_traceback', 'data', 'step_metrics', 'cached')
+
+    def __init__(self, case_file: Optional[str] = None, suite_path: Optional[str] = None,
+                 case_id: Optional[str] = None, metadata: Optional[Dict] = None,
+                 status: CaseStatus = CaseStatus.UNKNOWN, duration: float = 0.0,
+                 error_message: Optional[str] = None, error_traceback: Optional[str] = None,
+                 data: Optional[Dict] = None, step_metrics: Optional[List[Dict]] = None,
+                 cached: bool = False):
+        self.case_file = case_file
+        self.suite_path = suite_path
+        self.case_id = case_id
+        self.metadata = metadata or {}
+        self.status = status
+        self.duration = duration
+        self.error_message = error_message
+        self.error_traceback = error_traceback
+        self.data = data or {}
+        self.step_metrics = step_metrics or []
+        self.cached = cached
+
+    @classmethod
+    def from_record(cls, record: Dict) -> 'CaseResult':
+        """由 JSON 记录构建（status 还原为 CaseStatus，未知的 key 忽略）"""
+        result = cls(**{key: record[key] for key in cls.__slots__ if key in record})
+        result.status = parse_status(result.status)
+        return result
+
+    def to_record(self) -> Dict:
+        """转换为 JSON 记录（与 serialize_case_result 的结构一致）"""
+        record = {key: getattr(self, key) for key in self.__slots__}
+        record['status'] = self.status.value if isinstance(self.status, CaseStatus) else str(self.status)
+        return record
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.__slots__:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"CaseResult(case_id={self.case_id!r}, status={self.status})"
+
+
+def parse_status(status) -> CaseStatus:
+    """将记录中的状态字符串还原为 CaseStatus，无法识别时为 UNKNOWN"""
+    if isinstance(status, CaseStatus):
+        return status
+    try:
+        return CaseStatus(status)
+    except ValueError:
+        return CaseStatus.UNKNOWN
+
+
+def deserialize_record(record: Dict) -> CaseResult:
+    """
+    将磁盘记录还原为 Collector 使用的 CaseResult（status 还原为 CaseStatus）
+    """
+    return CaseResult.from_record(record)
+
+
+class ResultSink:
+    """
+    流式 Case 结果日志：每个 Case 结束后立即以 JSONL 追加写入磁盘，
+    Plan Collector 通过迭代器重新读取记录，内存占用与 Plan 规模无关。
+
+    未指定 path 时写入临时文件，close 时自动删除。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='holmes_results_', suffix='.jsonl')
+            os.close(fd)
+        else:
+            output_dir = os.path.dirname(path)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+        self.path = path
+        self._fh = open(path, 'w', encoding='utf-8')
+        self._count = 0
+
+    def write(self, record: Dict):
+        """追加一条记录并立即刷盘，保证进程崩溃时已完成的结果不丢失"""
+        self._fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._fh.flush()
+        self._count += 1
+
+    def iter_records(self) -> Iterator[CaseResult]:
+        """按写入顺序逐条读取记录"""
+        if not self._fh.closed:
+            self._fh.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield deserialize_record(json.loads(line))
+
+    def __iter__(self) -> Iterator[CaseResult]:
+        return self.iter_records()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """关闭日志文件，临时文件会被删除"""
+        if not self._fh.closed:
+            self._fh.close()
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,151 @@
+import logging
+from array import array
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+from core.status import CaseStatus
+from core.result_sink import parse_status
+
+logger = logging.getLogger(__name__)
+
+# 状态编码：ResultTable 中以 CaseStatus 在枚举中的序号保存
+STATUSES: List[CaseStatus] = list(CaseStatus)
+_STATUS_CODES: Dict[CaseStatus, int] = {status: code for code, status in enumerate(STATUSES)}
+
+# 计入 Skipped 的状态（max_failures 触发后未执行的 Case 为 SKIPPED，UNKNOWN/PENDING 视为未执行）
+SKIPPED_STATUSES = (CaseStatus.SKIPPED, CaseStatus.UNKNOWN, CaseStatus.PENDING)
+FAILED_STATUSES = (CaseStatus.FAILED, CaseStatus.ERROR, CaseStatus.TIMEOUT)
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class ResultTable:
+    """
+    Plan 级别的列式结果表：每个 Case 只保存状态码、耗时、Suite 序号和 cached 标记四列，
+    追加为 O(1)，状态计数在追加时累计，Suite 聚合和耗时分位数用 numpy 向量化计算。
+
+    完整记录（错误信息、Step 指标等）仍由 ResultSink 流式保存，二者按写入顺序一一对应。
+    """
+
+    def __init__(self):
+        self._status = array('b')
+        self._duration = array('d')
+        self._suite = array('i')
+        self._cached = array('b')
+        self.suites: List[str] = []
+        self._suite_index: Dict[str, int] = {}
+        self._counts = [0] * len(STATUSES)
+
+    def append(self, record):
+        """追加一条记录（dict 或 CaseResult）"""
+        status = parse_status(record.get('status'))
+        suite_path = record.get('suite_path') or 'Unknown'
+        suite = self._suite_index.get(suite_path)
+        if suite is None:
+            suite = self._suite_index[suite_path] = len(self.suites)
+            self.suites.append(suite_path)
+
+        code = _STATUS_CODES[status]
+        self._status.append(code)
+        self._duration.append(float(record.get('duration') or 0.0))
+        self._suite.append(suite)
+        self._cached.append(1 if record.get('cached') else 0)
+        self._counts[code] += 1
+
+    def extend(self, records: Iterable):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._status)
+
+    def count(self, *statuses: CaseStatus) -> int:
+        return sum(self._counts[_STATUS_CODES[status]] for status in statuses)
+
+    @property
+    def total(self) -> int:
+        return len(self._status)
+
+    @property
+    def passed(self) -> int:
+        return self.count(CaseStatus.SUCCESS)
+
+    @property
+    def failed(self) -> int:
+        return self.count(CaseStatus.FAILED)
+
+    @property
+    def errors(self) -> int:
+        return self.count(CaseStatus.ERROR)
+
+    @property
+    def timeouts(self) -> int:
+        return self.count(CaseStatus.TIMEOUT)
+
+    @property
+    def skipped(self) -> int:
+        return self.count(*SKIPPED_STATUSES)
+
+    @property
+    def cached(self) -> int:
+        return int(np.count_nonzero(np.frombuffer(self._cached, dtype=np.int8))) if self._cached else 0
+
+    def durations(self) -> np.ndarray:
+        """耗时列（只读视图，不复制）"""
+        return np.frombuffer(self._duration, dtype=np.float64) if self._duration else np.empty(0)
+
+    def percentiles(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        """Case 耗时的分位数 {p: seconds}"""
+        durations = self.durations()
+        if durations.size == 0:
+            return {p: 0.0 for p in percentiles}
+        return dict(zip(percentiles, (float(v) for v in np.percentile(durations, percentiles))))
+
+    def suite_stats(self) -> List[Dict]:
+        """
+        按 Suite 聚合（顺序与 Suite 首次出现的顺序一致）：
+        [{'suite_path', 'total', 'passed', 'failed', 'errors', 'timeouts', 'skipped', 'duration'}, ...]
+        """
+        if not self._status:
+            return []
+        n_suites, n_statuses = len(self.suites), len(STATUSES)
+        suite = np.frombuffer(self._suite, dtype=np.intc)
+        status = np.frombuffer(self._status, dtype=np.int8)
+
+        # 一次 bincount 得到 (suite, status) 计数矩阵
+        counts = np.bincount(suite * n_statuses + status, minlength=n_suites * n_statuses)
+        counts = counts.reshape(n_suites, n_statuses)
+        durations = np.bincount(suite, weights=self.durations(), minlength=n_suites)
+
+        def column(*statuses):
+            return counts[:, [_STATUS_CODES[s] for s in statuses]].sum(axis=1)
+
+        passed = column(CaseStatus.SUCCESS)
+        failed = column(CaseStatus.FAILED)
+        errors = column(CaseStatus.ERROR)
+        timeouts = column(CaseStatus.TIMEOUT)
+        skipped = column(*SKIPPED_STATUSES)
+        totals = counts.sum(axis=1)
+        return [{
+            'suite_path': suite_path,
+            'total': int(totals[i]),
+            'passed': int(passed[i]),
+            'failed': int(failed[i]),
+            'errors': int(errors[i]),
+            'timeouts': int(timeouts[i]),
+            'skipped': int(skipped[i]),
+            'duration': float(durations[i]),
+        } for i, suite_path in enumerate(self.suites)]
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+        """Plan 汇总：各状态计数、总耗时和耗时分位数"""
+        return {
+            'total': self.total,
+            'passed': self.passed,
+            'failed': self.failed,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'skipped': self.skipped,
+            'cached': self.cached,
+            'duration': float(self.durations().sum()),
+            'percentiles': self.percentiles(percentiles),
+        }
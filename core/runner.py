@@ -1,11 +1,31 @@
+import os
+import sys
+import queue
+import signal
+import asyncio
 import logging
-from typing import List, Dict
+import importlib
+import multiprocessing
+from contextlib import nullcontext, ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 from mmengine.config import Config
-from core.registry import STEPS, COLLECTORS, CHECKERS
+from core.registry import STEPS, COLLECTORS, collect_plugin_modules
+from core.plugin_manifest import plugin_manifest
 from core.interface import BaseCollector
 from core.context import TestContext
 from core.status import CaseStatus
 from core.utils import generate_case_id
+from core.cache import load_config, get_cache_dir, set_cache_dir
+from core.step_factory import StepFactory, default_step_factory
+from core.result_sink import ResultSink, CaseResult, serialize_case_result
+from core.result_table import ResultTable, FAILED_STATUSES
+from core.profiler import PlanProfiler
+from core.history import CaseHistory, load_case_history
+from core.sharding import shard_cases
+from core.scheduler import order_cases, ORDER_PLAN
+from core.incremental import CaseFingerprinter, IncrementalResultStore
+from core.timeout import CaseTimeoutError, deadline, KILL_GRACE
 import traceback
 import time
 
@@ -15,107 +35,373 @@ class CaseRunner:
     """
     负责执行单个 Case 的 Pipeline
     """
-    def __init__(self, context: TestContext):
+    def __init__(self, context: TestContext, step_factory: Optional[StepFactory] = None,
+                 profiler: Optional[PlanProfiler] = None,
+                 step_timeout: Optional[float] = None, case_timeout: Optional[float] = None,
+                 deadline_callback: Optional[Callable[[Optional[float], Optional[str]], None]] = None):
         self.context = context
+        self.step_factory = step_factory or default_step_factory
+        self.profiler = profiler
+        # 超时（秒）：Step 配置中的 timeout 优先于 step_timeout；case_timeout 限制整个 Pipeline（Collector 除外）
+        self.step_timeout = step_timeout
+        self.case_timeout = case_timeout
+        # 每个 Step 开始前以 (超时时间, 超时原因) 调用，Pipeline 结束时以 (None, None) 调用，
+        # 用于在进程外强制执行超时（如终止阻塞在 C 扩展中的进程池 Worker）
+        self.deadline_callback = deadline_callback
 
     def run(self, pipeline_cfg: List[Dict]):
         logger.info(f"Starting Case Execution...")
-        execution_failed = False
-        exception_to_raise = None
+        self._reset()
 
         for step_cfg in pipeline_cfg:
             step_type = step_cfg.get('type')
+            step = self._build_step(step_cfg)
+            if step is None:
+                break # 构建都失败了，后续无法继续
+            if not self._prepare_step(step, step_type):
+                continue
 
-            # 构建 Step
             try:
-                # 遍历注册表列表查找并构建 Step
-                step = None
-                registries = [STEPS, CHECKERS, COLLECTORS]
-                for registry in registries:
-                    if step_type in registry:
-                        step = registry.build(step_cfg)
-                        break
-
-                # 如果都找不到，尝试默认从 STEPS 构建以抛出明确错误
-                if step is None:
-                    step = STEPS.build(step_cfg)
-
+                timeout, reason = self._step_timeout(step, step_cfg)
+                self._report_deadline(timeout, reason)
+                with self._step_scope(step_type):
+                    self._process_step(step, timeout, reason)
+                self._check_step_status(step, step_type)
             except Exception as e:
-                logger.error(f"Failed to build step {step_type}: {e}")
-                execution_failed = True
-                exception_to_raise = e
-                self.context.status = CaseStatus.ERROR # 构建失败视为 ERROR
-                break # 构建都失败了，后续无法继续
+                self._handle_step_error(step, step_type, e)
 
-            is_collector = isinstance(step, BaseCollector)
+        self._report_deadline(None, None)
+        self._finish()
 
-            # 如果之前的步骤失败了，且当前步骤不是 Collector，则跳过
-            if execution_failed and not is_collector:
-                logger.warning(f"Skipping Step: {step_type} due to previous failure.")
-                continue
+    def _reset(self):
+        self.execution_failed = False
+        self.exception_to_raise = None
+        self._case_deadline = time.monotonic() + self.case_timeout if self.case_timeout else None
 
-            # 如果尚未失败，或者当前是 Collector，则执行
-            try:
-                # 在执行 Collector 之前，更新 Status
-                if is_collector:
-                    if execution_failed:
-                        self.context.status = CaseStatus.FAILED
-                    elif self.context.status == CaseStatus.PENDING:
-                         # 如果还没失败且状态仍为 PENDING，说明目前为止是成功的
-                         pass
-
-                logger.info(f"Running Step: {step_type}")
-                step.process(self.context)
-
-                # 如果 Step 执行后状态变为失败，且不是 Collector，则标记执行失败，以跳过后续步骤
-                if not is_collector and self.context.status in [CaseStatus.FAILED, CaseStatus.ERROR]:
-                    execution_failed = True
-                    logger.error(f"Step {step_type} failed with status: {self.context.status}")
+    def _step_timeout(self, step, step_cfg: Dict) -> Tuple[Optional[float], str]:
+        """
+        返回 Step 的超时时间及超时原因：不超过 Case 的剩余时间，Case 已超时时抛出 CaseTimeoutError
+        （Collector 不受 Case 超时限制，以便记录超时的 Case）
+        """
+        step_type = step_cfg.get('type')
+        timeout = step_cfg.get('timeout', self.step_timeout)
+        reason = f"Step {step_type} timed out after {timeout}s"
+        if self._case_deadline is None or isinstance(step, BaseCollector):
+            return timeout, reason
+
+        case_reason = f"Case timed out after {self.case_timeout}s"
+        remaining = self._case_deadline - time.monotonic()
+        if remaining <= 0:
+            raise CaseTimeoutError(case_reason)
+        if not timeout or remaining < timeout:
+            return remaining, case_reason
+        return timeout, reason
+
+    def _report_deadline(self, timeout: Optional[float], reason: Optional[str]):
+        if self.deadline_callback is None:
+            return
+        try:
+            self.deadline_callback(timeout, reason)
+        except Exception as e:
+            logger.warning(f"Failed to report step deadline: {e}")
 
-            except Exception as e:
-                logger.error(f"Step {step_cfg.get('type')} failed: {e}")
-                traceback.print_exception(type(e), e, e.__traceback__)
-                # 如果是 Collector 失败，记录日志但不中断后续 Collector（通常 Collector 失败不应影响主流程状态，但需记录）
-                # 如果是普通 Step 失败，标记失败
-                if not is_collector:
-                    execution_failed = True
-                    exception_to_raise = e
-                    self.context.status = CaseStatus.FAILED
-                else:
-                    logger.error(f"Collector {step_type} failed, but continuing...")
-
-        if not execution_failed:
+    def _process_step(self, step, timeout: Optional[float], reason: str):
+        """
+        在超时看门狗下执行同步 Step（在执行 Step 的线程中调用）
+        """
+        with deadline(self.context, timeout, reason):
+            step.process(self.context)
+        # 协作式 Step 收到取消请求后可能直接返回，同样视为超时
+        if not isinstance(step, BaseCollector):
+            self.context.raise_if_cancelled()
+
+    def _build_step(self, step_cfg: Dict):
+        """
+        构建 Step：通过 StepFactory 复用已解析的类，避免每次遍历注册表。构建失败时返回 None
+        """
+        step_type = step_cfg.get('type')
+        if 'timeout' in step_cfg:
+            # timeout 由 CaseRunner 处理，不作为 Step 的构建参数（也不影响产物缓存的 key）
+            step_cfg = {k: v for k, v in step_cfg.items() if k != 'timeout'}
+        try:
+            return self.step_factory.build(step_cfg)
+        except Exception as e:
+            logger.error(f"Failed to build step {step_type}: {e}")
+            self.execution_failed = True
+            self.exception_to_raise = e
+            self.context.status = CaseStatus.ERROR # 构建失败视为 ERROR
+            return None
+
+    def _prepare_step(self, step, step_type) -> bool:
+        """
+        判断 Step 是否需要执行，需要执行时返回 True
+        """
+        # 如果之前的步骤失败了，且当前步骤不是 Collector，则跳过
+        if self.execution_failed and not isinstance(step, BaseCollector):
+            logger.warning(f"Skipping Step: {step_type} due to previous failure.")
+            return False
+
+        # 如果尚未失败，或者当前是 Collector，则执行
+        # 在执行 Collector 之前，更新 Status
+        if isinstance(step, BaseCollector) and self.execution_failed and self.context.status != CaseStatus.TIMEOUT:
+            self.context.status = CaseStatus.FAILED
+
+        logger.info(f"Running Step: {step_type}")
+        return True
+
+    def _step_scope(self, step_type):
+        """
+        Step 执行区间：记录耗时指标，开启性能分析时同时进行采样（采样的调用栈从调用方 run 的下一层开始）
+        """
+        scope = ExitStack()
+        scope.enter_context(self.context.step_metrics.step(step_type))
+        if self.profiler is not None:
+            scope.enter_context(self.profiler.step(step_type, base_frame=sys._getframe(1)))
+        return scope
+
+    def _check_step_status(self, step, step_type):
+        # 如果 Step 执行后状态变为失败，且不是 Collector，则标记执行失败，以跳过后续步骤
+        if not isinstance(step, BaseCollector) and self.context.status in [CaseStatus.FAILED, CaseStatus.ERROR,
+                                                                           CaseStatus.TIMEOUT]:
+            self.execution_failed = True
+            logger.error(f"Step {step_type} failed with status: {self.context.status}")
+
+    def _handle_step_error(self, step, step_type, e: Exception):
+        logger.error(f"Step {step_type} failed: {e}")
+        traceback.print_exception(type(e), e, e.__traceback__)
+        # 如果是 Collector 失败，记录日志但不中断后续 Collector（通常 Collector 失败不应影响主流程状态，但需记录）
+        # 如果是普通 Step 失败，标记失败
+        if not isinstance(step, BaseCollector):
+            self.execution_failed = True
+            self.exception_to_raise = e
+            self.context.status = CaseStatus.TIMEOUT if isinstance(e, CaseTimeoutError) else CaseStatus.FAILED
+        else:
+            logger.error(f"Collector {step_type} failed, but continuing...")
+
+    def _finish(self):
+        if not self.execution_failed:
              # 如果状态仍然是 PENDING，说明没有步骤显式设置状态，默认为 SUCCESS
              if self.context.status == CaseStatus.PENDING:
                  self.context.status = CaseStatus.SUCCESS
              logger.info("Case Execution Completed Successfully.")
         else:
              logger.error("Case Execution Failed.")
-             if exception_to_raise:
-                 raise exception_to_raise
+             if self.exception_to_raise:
+                 raise self.exception_to_raise
 
 from core.loader import SuiteLoader
 
+
+def _new_case_result(case_file: str, suite_path: str) -> Dict:
+    """
+    预先定义 case_result，确保即使加载配置失败也能记录基本信息
+    """
+    return {
+        'case_file': case_file,
+        'suite_path': suite_path,
+        'metadata': {},
+        'status': CaseStatus.UNKNOWN,
+        'context': None,
+        'error_message': None,
+        'error_traceback': None
+    }
+
+
+def _create_case_context(global_config: Dict, case_file: str, case_result: Dict) -> Tuple[Config, TestContext]:
+    """
+    加载 Case 配置并构建 TestContext
+    """
+    case_cfg = load_config(case_file)
+
+    # 提取 Metadata (直接从配置字典中读取)
+    case_result['metadata'] = case_cfg.get('metadata', {})
+
+    # 注入 Global Config（Plan 与 Suite 两层）和 Case ID
+    suite_path = case_result.get('suite_path')
+    suite_config = load_config(suite_path).get('global_config') if suite_path else None
+    ctx = TestContext(global_config=global_config, case_config=case_cfg, suite_config=suite_config)
+    ctx.set('case_id', generate_case_id(case_file))
+    ctx.set('case_file', case_file)
+    return case_cfg, ctx
+
+
+def _complete_case_result(case_result: Dict, ctx: TestContext):
+    """
+    Pipeline 正常结束（未抛出异常）后记录结果
+    """
+    case_result['status'] = ctx.status
+    case_result['context'] = ctx
+
+    # 如果状态是失败但没有抛出异常（例如 Checker 设置了 FAILED），补充错误信息
+    if ctx.status in [CaseStatus.FAILED, CaseStatus.ERROR]:
+        if case_result['error_message'] is None:
+            case_result['error_message'] = f"Case finished with status {ctx.status} but no exception was raised."
+            case_result['error_traceback'] = "No traceback available. The case status was set to FAILED/ERROR during execution."
+
+
+def _fail_case_result(case_result: Dict, ctx: Optional[TestContext], e: Exception):
+    """
+    Case 执行抛出异常时记录失败结果（需在 except 块中调用以获取 traceback）
+    """
+    logger.error(f"  -> Case Failed: {case_result['case_file']} | Error: {e}")
+    case_result['status'] = CaseStatus.TIMEOUT if isinstance(e, CaseTimeoutError) else CaseStatus.FAILED
+    case_result['error_message'] = str(e)
+    case_result['error_traceback'] = traceback.format_exc()
+
+    # 注意：如果 Config.fromfile 失败，ctx 不存在
+    if ctx is not None:
+        case_result['context'] = ctx
+
+
+def _execute_case(global_config: Dict, case_file: str, suite_path: str,
+                  profiler: Optional[PlanProfiler] = None,
+                  case_timeout: Optional[float] = None, step_timeout: Optional[float] = None) -> Dict:
+    """
+    执行单个 Case 并返回 case_result，串行模式和进程池模式共用该逻辑
+    （profiler 仅在串行模式下传入；Case 配置中的 timeout 优先于 case_timeout）
+    """
+    case_result = _new_case_result(case_file, suite_path)
+    ctx = None
+
+    try:
+        case_cfg, ctx = _create_case_context(global_config, case_file, case_result)
+        deadline_callback = _deadline_reporter(case_file, suite_path) if _step_deadlines is not None else None
+        runner = CaseRunner(ctx, profiler=profiler, step_timeout=step_timeout,
+                            case_timeout=case_cfg.get('timeout', case_timeout),
+                            deadline_callback=deadline_callback)
+
+        start_time = time.time()
+        try:
+            with profiler.case(ctx.get('case_id')) if profiler else nullcontext():
+                runner.run(case_cfg.pipeline)
+        finally:
+            case_result['duration'] = time.time() - start_time
+
+        _complete_case_result(case_result, ctx)
+
+    except Exception as e:
+        _fail_case_result(case_result, ctx, e)
+    finally:
+        if 'duration' not in case_result:
+            case_result['duration'] = 0.0
+
+    return case_result
+
+
+# 进程池模式下检查 Case 超时的间隔（秒）
+_TIMEOUT_POLL_INTERVAL = 0.5
+
+# 进程池 Worker 中用于上报当前 Step 超时时间的队列（仅在进程池 Worker 中设置）
+_step_deadlines = None
+
+
+def _deadline_reporter(case_file: str, suite_path: str) -> Callable[[Optional[float], Optional[str]], None]:
+    """
+    返回 CaseRunner 的 deadline_callback：Step 开始时向主进程上报其超时时间（None 表示不限制），
+    主进程据此在 Step 超时且超过 KILL_GRACE 仍未返回时强制终止该 Worker。
+    连续不限制超时的 Step 只上报一次
+    """
+    last = [None]
+
+    def report(timeout: Optional[float], reason: Optional[str]):
+        if timeout is None and last[0] is None:
+            return
+        last[0] = timeout
+        _step_deadlines.put((case_file, suite_path, os.getpid(), timeout, reason))
+    return report
+
+
+def _init_worker(plugin_modules: List[str], cache_dir: Optional[str] = None, step_deadlines=None):
+    """
+    进程池 Worker 初始化：重新导入插件包及已加载的插件模块，保证子进程中的注册表和插件清单完整
+    （fork 模式下模块已继承，导入为空操作；spawn 模式下需要重新注册）
+    """
+    global _step_deadlines
+    _step_deadlines = step_deadlines
+    set_cache_dir(cache_dir)
+    for module_name in plugin_modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning(f"Failed to import plugin module {module_name} in worker: {e}")
+
+
+def _run_case_in_worker(global_config: Dict, case_file: str, suite_path: str, data_keys: List[str],
+                        case_timeout: Optional[float] = None, step_timeout: Optional[float] = None) -> Dict:
+    """
+    进程池 Worker 入口：每个 Worker 独立构建 TestContext 和 CaseRunner，
+    在 Worker 内完成序列化，只把紧凑记录传回主进程
+    """
+    case_result = _execute_case(global_config, case_file, suite_path,
+                                case_timeout=case_timeout, step_timeout=step_timeout)
+    return serialize_case_result(case_result, data_keys)
+
+
 class PlanRunner:
     """
     负责执行整个 Test Plan
     """
-    def __init__(self, plan_cfg: Config):
+    def __init__(self, plan_cfg: Config, workers: Optional[int] = None,
+                 profiler: Optional[PlanProfiler] = None,
+                 shard: Optional[Tuple[int, int]] = None,
+                 history: Optional[CaseHistory] = None,
+                 shard_history: Optional[CaseHistory] = None,
+                 incremental: Optional[bool] = None,
+                 order: Optional[str] = None,
+                 max_failures: Optional[int] = None,
+                 concurrency: Optional[int] = None,
+                 case_callback: Optional[Callable[[Dict], None]] = None,
+                 case_timeout: Optional[float] = None,
+                 step_timeout: Optional[float] = None):
         self.plan_cfg = plan_cfg
         self.global_config = plan_cfg.get('global_config', {})
         self.suites = plan_cfg.get('suites', [])
-
-    def run(self) -> bool:
+        # 并行度：命令行 --workers 优先，其次为 Plan 中的 parallelism 字段，默认串行
+        self.workers = workers or plan_cfg.get('parallelism', 1) or 1
+        # 需要写入结果记录的黑板数据 key（其余 Context 数据在 Case 结束后即释放）
+        self.result_data_keys = list(plan_cfg.get('result_data_keys', []))
+        # 性能分析需要在同一进程内采样，开启时强制串行
+        self.profiler = profiler
+        if self.profiler is not None and self.workers > 1:
+            logger.warning("Profiling is enabled, falling back to sequential execution.")
+            self.workers = 1
+        # 分片 (index, total)，index 从 1 开始；shard_history 只包含显式指定的历史文件，
+        # 保证各节点的切分结果一致；history 还包含本地自动维护的记录，用于优先级排序，并在运行后更新
+        self.shard = shard
+        self.shard_history = shard_history if shard_history is not None else load_case_history(include_auto=False)
+        self.history = history if history is not None else load_case_history()
+        # 增量模式：输入指纹未变化的 Case 直接复用上一次 PASSED 的结果
+        self.incremental = incremental if incremental is not None else bool(plan_cfg.get('incremental', False))
+        self._fingerprints: Dict[str, str] = {}
+        self._result_store: Optional[IncrementalResultStore] = None
+        # Plan Collectors 及其共享的 Context（run 开始时创建）
+        self._plan_collectors: List[Tuple[str, BaseCollector]] = []
+        self._plan_context: Optional[TestContext] = None
+        # Case 执行顺序（plan / priority），以及失败数达到阈值后跳过剩余 Case
+        self.order = order or plan_cfg.get('order', ORDER_PLAN)
+        self.max_failures = max_failures if max_failures is not None else plan_cfg.get('max_failures')
+        # asyncio 模式的并发 Case 数（适用于 I/O 密集的 Plan），大于 1 时优先于进程池模式
+        self.concurrency = concurrency or plan_cfg.get('async_concurrency', 1) or 1
+        if self.profiler is not None and self.concurrency > 1:
+            logger.warning("Profiling is enabled, disabling asyncio concurrency.")
+            self.concurrency = 1
+        # 默认超时（秒），Case / Step 配置中的 timeout 优先；超时的 Case 记录为 TIMEOUT，Plan 继续执行
+        self.case_timeout = case_timeout if case_timeout is not None else plan_cfg.get('case_timeout')
+        self.step_timeout = step_timeout if step_timeout is not None else plan_cfg.get('step_timeout')
+        # 每个 Case 结束后、Context 释放前调用（如 goldens update 采集输出），需要在主进程内执行
+        self.case_callback = case_callback
+        if self.case_callback is not None and self.workers > 1:
+            logger.warning("Case callback is set, falling back to in-process execution.")
+            self.workers = 1
+
+    def _collect_cases(self) -> List[Tuple[str, str]]:
         """
-        执行 Plan
-        :return: True if all cases passed, False otherwise
-        """
-        total_cases = 0
-        failed_cases = 0
-        results = [] # 收集所有 case 的结果
-
-        logger.info(f"Starting Plan Execution with {len(self.suites)} suites...")
+        按 Suite 顺序收集所有待执行的 Case
 
+        Returns:
+            List[Tuple[str, str]]: [(case_file, suite_path), ...]
+        """
+        cases = []
         for suite_path in self.suites:
             logger.info(f"Processing Suite: {suite_path}")
             # 使用 Loader 加载 Case 列表
@@ -126,105 +412,394 @@ class PlanRunner:
                 continue
 
             for case_file in case_files:
-                logger.info(f"  -> Running Case: {case_file}")
+                cases.append((case_file, suite_path))
+        return cases
 
-                # 预先定义 case_result，确保即使加载配置失败也能记录基本信息
-                case_result = {
-                    'case_file': case_file,
-                    'suite_path': suite_path,
-                    'metadata': {},
-                    'status': CaseStatus.UNKNOWN,
-                    'context': None,
-                    'error_message': None,
-                    'error_traceback': None
-                }
+    def run(self) -> bool:
+        """
+        执行 Plan
+        :return: True if all cases passed, False otherwise
+        """
+        logger.info(f"Starting Plan Execution with {len(self.suites)} suites...")
 
-                try:
-                    case_cfg = Config.fromfile(case_file)
-
-                    # 提取 Metadata (直接从配置字典中读取)
-                    case_result['metadata'] = case_cfg.get('metadata', {})
-
-                    # 注入 Global Config 和 Case ID
-                    ctx = TestContext(global_config=self.global_config, case_config=case_cfg)
-                    auto_case_id = generate_case_id(case_file)
-                    ctx.set('case_id', auto_case_id)
-                    ctx.set('case_file', case_file)
-                    runner = CaseRunner(ctx)
-
-                    start_time = time.time()
-                    try:
-                        runner.run(case_cfg.pipeline)
-                    finally:
-                        case_result['duration'] = time.time() - start_time
-
-                    # 记录成功结果
-                    case_result['status'] = ctx.status
-                    case_result['context'] = ctx
-
-                    # 如果状态是失败但没有抛出异常（例如 Checker 设置了 FAILED），补充错误信息
-                    if ctx.status in [CaseStatus.FAILED, CaseStatus.ERROR]:
-                        failed_cases += 1 # 确保失败计数正确
-                        if case_result['error_message'] is None:
-                            case_result['error_message'] = f"Case finished with status {ctx.status} but no exception was raised."
-                            case_result['error_traceback'] = "No traceback available. The case status was set to FAILED/ERROR during execution."
+        cases = self._collect_cases()
+        if self.shard is not None:
+            shard_index, shard_count = self.shard
+            cases = shard_cases(cases, shard_index, shard_count, self.shard_history)
+            logger.info(f"Running shard {shard_index}/{shard_count} with {len(cases)} cases")
+
+        # 每个 Case 结束后立即序列化为紧凑记录写入结果日志，并释放其 Context
+        sink = ResultSink(self.plan_cfg.get('result_log'))
+        # 列式结果表：状态/耗时/Suite 的统计不需要重新读取结果日志
+        self._results = ResultTable()
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            # Plan Collector 在执行前创建，以便在 Case 结果到达时调用 on_case_result（如流式写出报告）
+            self._build_plan_collectors(sink)
+            if self.incremental:
+                cases = self._reuse_cached_results(cases, sink)
+            cases = order_cases(cases, self.order, self.history)
+
+            if self.concurrency > 1 and len(cases) > 1:
+                self._run_async(cases, sink)
+            elif self.workers > 1 and len(cases) > 1:
+                self._run_parallel(cases, sink)
+            elif cases and self._needs_killable_worker(cases):
+                # 串行模式下阻塞在 C 扩展中的 Step 无法被注入的异常打断，在可强制终止的单个 Worker 中执行
+                self._run_parallel(cases, sink, workers=1)
+            else:
+                self._run_sequential(cases, sink)
+
+            # 执行 Plan 级别的 Collectors
+            self._run_plan_collectors()
+        finally:
+            sink.close()
+            self._save_history()
+            if self.profiler is not None:
+                self.profiler.finish()
 
+        logger.info("="*30)
+        failed = self._results.count(*FAILED_STATUSES)
+        logger.info(f"Plan Execution Summary: Total {self._results.total}, Failed {failed}, "
+                    f"Skipped {self._results.count(CaseStatus.SKIPPED)}")
+        return failed == 0
+
+    def _record_result(self, sink: ResultSink, record: Dict):
+        """
+        写入一条 Case 结果记录并更新统计
+        """
+        sink.write(record)
+        self._results.append(record)
+        self.history.record(record)
+        self._dispatch_case_result(record)
+        if record['status'] == CaseStatus.SKIPPED.value:
+            return
+        if self.incremental and not record.get('cached'):
+            fingerprint = self._fingerprints.get(record['case_file'])
+            if fingerprint is not None:
+                try:
+                    self._result_store.put(fingerprint, record)
                 except Exception as e:
-                    logger.error(f"  -> Case Failed: {case_file} | Error: {e}")
-                    failed_cases += 1
-                    # 记录失败结果
-                    case_result['status'] = CaseStatus.FAILED
-                    case_result['error_message'] = str(e)
-                    case_result['error_traceback'] = traceback.format_exc()
-
-                    # ctx 可能在 runner.run 中已经创建，尝试获取
-                    # 注意：如果 Config.fromfile 失败，ctx 可能不存在
-                    # 这里简单处理，如果 ctx 存在则记录
-                    if 'ctx' in locals():
-                         case_result['context'] = ctx
-                finally:
-                    if 'duration' not in case_result:
-                        case_result['duration'] = 0.0
-                    total_cases += 1
-                    results.append(case_result)
-
-        # 执行 Plan 级别的 Collectors
-        self._run_plan_collectors(results)
+                    logger.warning(f"Failed to store incremental result for {record['case_file']}: {e}")
 
-        logger.info("="*30)
-        logger.info(f"Plan Execution Summary: Total {total_cases}, Failed {failed_cases}")
-        return failed_cases == 0
+    def _reuse_cached_results(self, cases: List[Tuple[str, str]], sink: ResultSink) -> List[Tuple[str, str]]:
+        """
+        计算每个 Case 的输入指纹，命中结果仓库的 Case 直接写入缓存的记录（标记 cached），
+        返回仍需执行的 Case 列表
+        """
+        self._result_store = IncrementalResultStore()
+        fingerprinter = CaseFingerprinter(self.global_config)
 
-    def _run_plan_collectors(self, results: List[Dict]):
+        pending = []
+        for case_file, suite_path in cases:
+            try:
+                fingerprint = fingerprinter.fingerprint(case_file, suite_path)
+            except Exception as e:
+                # 指纹计算失败（如配置无法解析）时正常执行，由执行流程记录错误
+                logger.warning(f"Failed to fingerprint case {case_file}: {e}")
+                pending.append((case_file, suite_path))
+                continue
+
+            self._fingerprints[case_file] = fingerprint
+            record = self._result_store.get(case_file, fingerprint)
+            if record is None:
+                pending.append((case_file, suite_path))
+                continue
+
+            record = dict(record, suite_path=suite_path, cached=True)
+            logger.info(f"  -> Reusing Cached Result: {case_file} | Status: {record['status']}")
+            self._record_result(sink, record)
+
+        logger.info(f"Incremental mode: {len(cases) - len(pending)} cached, {len(pending)} to run")
+        return pending
+
+    def _notify_case_callback(self, case_result: Dict):
+        if self.case_callback is None:
+            return
+        try:
+            self.case_callback(case_result)
+        except Exception as e:
+            logger.error(f"Case callback failed for {case_result.get('case_file')}: {e}")
+
+    def _save_history(self):
         """
-        运行 Plan 级别的 Collectors
+        保存历史耗时（未启用缓存目录时为空操作），失败不影响 Plan 结果
+        """
+        try:
+            self.history.save()
+        except Exception as e:
+            logger.warning(f"Failed to save duration history: {e}")
+
+    def _max_failures_reached(self) -> bool:
+        return bool(self.max_failures) and self._results.count(*FAILED_STATUSES) >= self.max_failures
+
+    def _skip_case(self, sink: ResultSink, case_file: str, suite_path: str):
+        """
+        失败数达到 max_failures 后，将未执行的 Case 记录为 SKIPPED
+        """
+        self._record_result(sink, serialize_case_result({
+            'case_file': case_file,
+            'suite_path': suite_path,
+            'status': CaseStatus.SKIPPED,
+            'error_message': f"Skipped: max failures ({self.max_failures}) reached",
+            'duration': 0.0
+        }))
+
+    def _run_sequential(self, cases: List[Tuple[str, str]], sink: ResultSink):
+        """
+        串行执行所有 Case
+        """
+        for case_file, suite_path in cases:
+            if self._max_failures_reached():
+                self._skip_case(sink, case_file, suite_path)
+                continue
+            logger.info(f"  -> Running Case: {case_file}")
+            case_result = _execute_case(self.global_config, case_file, suite_path, profiler=self.profiler,
+                                        case_timeout=self.case_timeout, step_timeout=self.step_timeout)
+            self._notify_case_callback(case_result)
+            self._record_result(sink, serialize_case_result(case_result, self.result_data_keys))
+
+    def _needs_killable_worker(self, cases: List[Tuple[str, str]]) -> bool:
+        """
+        串行模式是否需要在单个 Worker 进程中执行：Plan 配置了默认超时，或有 Case / Step 配置了 timeout。
+        开启性能分析或设置了 case_callback 时需要在主进程内执行，超时只能依赖注入的异常
+        """
+        if self.case_timeout is None and self.step_timeout is None and not any(
+                self._declares_timeout(case_file) for case_file, _ in cases):
+            return False
+        if self.profiler is not None or self.case_callback is not None:
+            logger.warning("Timeouts are configured but cases run in-process, "
+                           "steps blocked in C extensions cannot be killed.")
+            return False
+        return True
+
+    @staticmethod
+    def _declares_timeout(case_file: str) -> bool:
+        try:
+            case_cfg = load_config(case_file)
+        except Exception:
+            return False
+        return 'timeout' in case_cfg or any('timeout' in step_cfg for step_cfg in case_cfg.get('pipeline', []))
+
+    def _run_parallel(self, cases: List[Tuple[str, str]], sink: ResultSink, workers: Optional[int] = None):
+        """
+        使用进程池并行执行所有 Case，结果按完成顺序流式写入结果日志
+
+        Step 超过其超时时间（Step / Case 超时中较早者）加 KILL_GRACE 后仍未返回时强制终止执行它的 Worker，
+        进程池随之失效：该 Case 记录为 TIMEOUT，其余未完成的 Case 在新的进程池中重新执行
+        """
+        workers = min(workers or self.workers, len(cases))
+        logger.info(f"Running {len(cases)} cases with {workers} workers...")
+
+        # Worker 通过该队列上报正在执行的 Step 的超时时间
+        step_deadlines = multiprocessing.Queue()
+        plugin_modules = plugin_manifest.packages + collect_plugin_modules()
+        try:
+            while cases:
+                with ProcessPoolExecutor(max_workers=min(workers, len(cases)),
+                                         initializer=_init_worker,
+                                         initargs=(plugin_modules, get_cache_dir(), step_deadlines)) as executor:
+                    cases = self._drain_process_pool(executor, cases, sink, step_deadlines)
+        finally:
+            step_deadlines.close()
+
+    def _drain_process_pool(self, executor: ProcessPoolExecutor, cases: List[Tuple[str, str]],
+                            sink: ResultSink, step_deadlines) -> List[Tuple[str, str]]:
+        """
+        提交 Case 并按完成顺序记录结果；有 Worker 因超时被终止时返回需要重新执行的 Case
+        """
+        done_queue = queue.Queue()
+        futures = {}
+        case_futures = {}
+        for case in cases:
+            future = executor.submit(_run_case_in_worker, self.global_config, case[0], case[1],
+                                     self.result_data_keys, self.case_timeout, self.step_timeout)
+            futures[future] = case
+            case_futures[case] = future
+            future.add_done_callback(done_queue.put)
+
+        # 正在执行设置了超时的 Step 的 Case：{(case_file, suite_path): (pid, timeout, reason, Step 开始时间)}
+        running = {}
+        while futures:
+            try:
+                future = done_queue.get(timeout=_TIMEOUT_POLL_INTERVAL)
+            except queue.Empty:
+                future = None
+            if future is not None and future in futures:
+                case = futures.pop(future)
+                case_futures.pop(case, None)
+                running.pop(case, None)
+                self._record_future(sink, future, *case)
+
+                # 失败数达到阈值：取消尚未开始的 Case（正在执行的 Case 会正常结束并记录）
+                if self._max_failures_reached():
+                    cancelled = sum(1 for pending in futures if pending.cancel())
+                    if cancelled:
+                        logger.warning(f"Max failures ({self.max_failures}) reached, "
+                                       f"cancelled {cancelled} pending cases.")
+
+            self._poll_step_deadlines(step_deadlines, case_futures, running)
+            now = time.monotonic()
+            expired = [case for case, (_, timeout, _, started) in running.items()
+                       if now - started > timeout + KILL_GRACE]
+            if expired:
+                return self._kill_timed_out_workers(sink, futures, case_futures, running, expired)
+        return []
+
+    @staticmethod
+    def _poll_step_deadlines(step_deadlines, case_futures: Dict, running: Dict):
+        while True:
+            try:
+                case_file, suite_path, pid, timeout, reason = step_deadlines.get_nowait()
+            except queue.Empty:
+                return
+            case = (case_file, suite_path)
+            # 结果先于上报到达的 Case 已经结束，忽略
+            future = case_futures.get(case)
+            if future is None or future.done():
+                continue
+            if timeout:
+                running[case] = (pid, timeout, reason, time.monotonic())
+            else:
+                running.pop(case, None)
+
+    def _kill_timed_out_workers(self, sink: ResultSink, futures: Dict, case_futures: Dict, running: Dict,
+                                expired: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        强制终止超时的 Worker 并记录 TIMEOUT；进程池随之失效，返回需要在新进程池中重新执行的 Case
+        """
+        for case in expired:
+            pid, timeout, reason, started = running.pop(case)
+            futures.pop(case_futures.pop(case), None)
+            logger.error(f"  -> Case Timed Out: {case[0]} | Killing worker {pid}")
+            try:
+                os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            except OSError as e:
+                logger.warning(f"Failed to kill worker {pid}: {e}")
+            self._record_result(sink, serialize_case_result({
+                'case_file': case[0],
+                'suite_path': case[1],
+                'status': CaseStatus.TIMEOUT,
+                'error_message': f"{reason}, worker {pid} killed",
+                'duration': time.monotonic() - started
+            }))
+
+        retry = []
+        for future, case in futures.items():
+            # 终止前已经返回结果的 Case 正常记录，其余重新执行
+            if future.done() and (future.cancelled() or future.exception() is None):
+                self._record_future(sink, future, *case)
+            else:
+                retry.append(case)
+        if retry:
+            logger.warning(f"Process pool terminated, resubmitting {len(retry)} unfinished cases.")
+        return retry
+
+    def _record_future(self, sink: ResultSink, future, case_file: str, suite_path: str):
+        if future.cancelled():
+            self._skip_case(sink, case_file, suite_path)
+            return
+        try:
+            record = future.result()
+        except Exception as e:
+            # Worker 进程异常退出或结果无法序列化，记录为 ERROR
+            logger.error(f"  -> Case Worker Crashed: {case_file} | Error: {e}")
+            record = serialize_case_result({
+                'case_file': case_file,
+                'suite_path': suite_path,
+                'status': CaseStatus.ERROR,
+                'error_message': str(e),
+                'error_traceback': traceback.format_exc(),
+                'duration': 0.0
+            })
+        logger.info(f"  -> Finished Case: {case_file} | Status: {record['status']}")
+        self._record_result(sink, record)
+
+    def _run_async(self, cases: List[Tuple[str, str]], sink: ResultSink):
+        """
+        在单个事件循环中并发执行 Case：最多 concurrency 个 Case 同时执行，
+        同步 Step 在同等大小的线程池中执行，结果在事件循环线程中按完成顺序写入
+        """
+        # 延迟导入，避免与 async_runner 的循环导入
+        from core.async_runner import execute_case_async
+
+        concurrency = min(self.concurrency, len(cases))
+        logger.info(f"Running {len(cases)} cases with asyncio concurrency {concurrency}...")
+
+        async def worker(pending, executor):
+            # 多个 worker 共享同一个迭代器，按顺序领取 Case
+            for case_file, suite_path in pending:
+                if self._max_failures_reached():
+                    self._skip_case(sink, case_file, suite_path)
+                    continue
+                logger.info(f"  -> Running Case: {case_file}")
+                case_result = await execute_case_async(self.global_config, case_file, suite_path, executor,
+                                                       case_timeout=self.case_timeout,
+                                                       step_timeout=self.step_timeout)
+                self._notify_case_callback(case_result)
+                record = serialize_case_result(case_result, self.result_data_keys)
+                logger.info(f"  -> Finished Case: {case_file} | Status: {record['status']}")
+                self._record_result(sink, record)
+
+        async def run_all():
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='holmes-step') as executor:
+                pending = iter(cases)
+                await asyncio.gather(*(worker(pending, executor) for _ in range(concurrency)))
+
+        asyncio.run(run_all())
+
+    def _build_plan_collectors(self, results: ResultSink):
         """
+        创建 Plan 级别的 Collectors 及其共享的 Context
+
+        case_results 为可重复迭代的 ResultSink，每次迭代从结果日志中流式读取记录；
+        result_table 为列式结果表，可直接获取状态计数、Suite 聚合和耗时分位数
+        """
+        self._plan_collectors = []
         plan_collectors_cfg = self.plan_cfg.get('plan_collectors', [])
         if not plan_collectors_cfg:
             return
 
-        logger.info("Running Plan Collectors...")
         # 创建一个临时的 Context 用于 Plan Collector，包含所有 Case 的结果
-        plan_context = TestContext(global_config=self.global_config)
-        plan_context.set('case_results', results)
-        plan_context.set('plan_config', self.plan_cfg)
+        self._plan_context = TestContext(global_config=self.global_config)
+        self._plan_context.set('case_results', results)
+        self._plan_context.set('result_table', self._results)
+        self._plan_context.set('plan_config', self.plan_cfg)
+
+        # Plan Collector 优先从 COLLECTORS 注册表查找
+        collector_factory = StepFactory([COLLECTORS, STEPS])
 
         for collector_cfg in plan_collectors_cfg:
             try:
-                collector_type = collector_cfg.get('type')
-                logger.info(f"Running Plan Collector: {collector_type}")
+                self._plan_collectors.append((collector_cfg.get('type'), collector_factory.build(collector_cfg)))
+            except Exception as e:
+                logger.error(f"Plan Collector {collector_cfg.get('type')} failed: {e}")
 
-                # 遍历注册表列表查找并构建 Collector
-                collector = None
-                registries = [COLLECTORS, STEPS]
-                for registry in registries:
-                    if collector_type in registry:
-                        collector = registry.build(collector_cfg)
-                        break
+    def _dispatch_case_result(self, record: Dict):
+        """
+        将 Case 结果推送给实现了 on_case_result 的 Plan Collectors，失败不影响 Plan 执行
+        """
+        if not self._plan_collectors:
+            return
+        result = CaseResult.from_record(record)
+        for collector_type, collector in self._plan_collectors:
+            try:
+                collector.on_case_result(result, self._plan_context)
+            except Exception as e:
+                logger.warning(f"Plan Collector {collector_type} failed to handle result of {record['case_file']}: {e}")
 
-                if collector is None:
-                    collector = STEPS.build(collector_cfg)
+    def _run_plan_collectors(self):
+        """
+        运行 Plan 级别的 Collectors
+        """
+        if not self._plan_collectors:
+            return
 
-                collector.process(plan_context)
+        logger.info("Running Plan Collectors...")
+        for collector_type, collector in self._plan_collectors:
+            try:
+                logger.info(f"Running Plan Collector: {collector_type}")
+                collector.process(self._plan_context)
             except Exception as e:
-                logger.error(f"Plan Collector {collector_cfg.get('type')} failed: {e}")
\ No newline at end of file
+                logger.error(f"Plan Collector {collector_type} failed: {e}")
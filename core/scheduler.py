@@ -0,0 +1,51 @@
+import logging
+from typing import List, Optional, Tuple
+from core.history import CaseHistory
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+# 支持的 Case 执行顺序
+ORDER_PLAN = 'plan'
+ORDER_PRIORITY = 'priority'
+ORDERS = (ORDER_PLAN, ORDER_PRIORITY)
+
+# 没有历史结果的 Case（通常是新增 Case）的先验失败率
+UNSEEN_FAIL_RATE = 0.5
+# 失败率下限：从未失败的 Case 之间按耗时由短到长排序
+MIN_FAIL_RATE = 0.01
+
+
+def order_cases(cases: List[Tuple[str, str]], order: str = ORDER_PLAN,
+                history: Optional[CaseHistory] = None) -> List[Tuple[str, str]]:
+    """
+    按指定策略对 Case 排序
+
+    - plan: 保持 Suite 列表顺序和 Case 扫描顺序
+    - priority: 最近一次失败的 Case 最先执行；其余按 失败率 / 预计耗时 从高到低排序，
+      即单位时间内最可能发现失败的 Case 优先，尽早给出失败信号
+    """
+    if order == ORDER_PLAN or not cases:
+        return list(cases)
+    if order != ORDER_PRIORITY:
+        raise ValueError(f"Unknown case order '{order}', expected one of {ORDERS}")
+
+    case_ids = [generate_case_id(case_file) for case_file, _ in cases]
+    known = []
+    if history is not None:
+        known = sorted(d for d in (history.get(case_id) for case_id in case_ids) if d)
+    default_duration = known[len(known) // 2] if known else 1.0
+
+    keyed = []
+    for position, case_id in enumerate(case_ids):
+        outcome = history.get_outcome(case_id) if history is not None else None
+        duration = (history.get(case_id) if history is not None else None) or default_duration
+        if outcome is None:
+            last_failed, fail_rate = False, UNSEEN_FAIL_RATE
+        else:
+            last_failed, fail_rate = outcome['last_failed'], outcome['fail_rate']
+        score = max(fail_rate, MIN_FAIL_RATE) / max(duration, 1e-3)
+        keyed.append((not last_failed, -score, case_id, position))
+    keyed.sort()
+
+    return [cases[position] for _, _, _, position in keyed]
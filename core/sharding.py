@@ -0,0 +1,61 @@
+import logging
+from typing import List, Optional, Tuple
+from core.history import CaseHistory
+from core.utils import generate_case_id
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """
+    解析 'i/N' 形式的分片参数（i 从 1 开始）
+
+    Returns:
+        Tuple[int, int]: (分片序号, 分片总数)
+    """
+    try:
+        index_str, total_str = spec.split('/', 1)
+        index, total = int(index_str), int(total_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}', expected format i/N (e.g. 1/4)")
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Invalid shard spec '{spec}', shard index must be within 1..{total}")
+    return index, total
+
+
+def shard_cases(cases: List[Tuple[str, str]], shard_index: int, shard_count: int,
+                history: Optional[CaseHistory] = None) -> List[Tuple[str, str]]:
+    """
+    将 Case 列表按历史耗时均衡切分为 shard_count 份，返回第 shard_index 份（从 1 开始）
+
+    使用 LPT 贪心：按耗时从大到小依次分配给当前总耗时最小的分片。
+    没有历史记录的 Case 按已知耗时的中位数估计；完全没有历史时退化为按数量均分。
+    排序和分配都以 case_id 打破平局，相同的 Plan 和历史总是得到相同的分片结果。
+    """
+    if shard_count <= 1:
+        return list(cases)
+
+    case_ids = [generate_case_id(case_file) for case_file, _ in cases]
+    known = []
+    if history is not None:
+        known = sorted(d for d in (history.get(case_id) for case_id in case_ids) if d is not None)
+    default_duration = known[len(known) // 2] if known else 1.0
+
+    weighted = []
+    for position, case_id in enumerate(case_ids):
+        duration = history.get(case_id) if history is not None else None
+        weighted.append((-(duration if duration is not None else default_duration), case_id, position))
+    weighted.sort()
+
+    loads = [0.0] * shard_count
+    assignment = [0] * len(cases)
+    for neg_duration, _, position in weighted:
+        target = min(range(shard_count), key=lambda i: (loads[i], i))
+        loads[target] -= neg_duration
+        assignment[position] = target
+
+    logger.info(f"Shard {shard_index}/{shard_count}: estimated durations per shard "
+                f"{[round(load, 2) for load in loads]} ({len(known)}/{len(cases)} cases with history)")
+
+    # 保持原有的 Suite/Case 顺序
+    return [case for position, case in enumerate(cases) if assignment[position] == shard_index - 1]
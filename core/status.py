@@ -8,6 +8,9 @@ class CaseStatus(Enum):
     FAILED = "FAILED"
     ERROR = "ERROR"
     UNKNOWN = "UNKNOWN"
+    SKIPPED = "SKIPPED"
+    # Step 或 Case 超过 timeout 后被取消
+    TIMEOUT = "TIMEOUT"
 
     def __str__(self):
         return self.value
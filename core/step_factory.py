@@ -0,0 +1,100 @@
+import json
+import inspect
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Type
+from mmengine.utils import ManagerMixin
+from core.registry import STEPS, CHECKERS, COLLECTORS
+from core.plugin_manifest import plugin_manifest
+
+logger = logging.getLogger(__name__)
+
+
+class StepFactory:
+    """
+    Step 构建工厂：缓存 step_type -> 类 的解析结果，避免每个 Case 的每个 Step
+    都遍历注册表并走 registry.build 的 scope 解析流程。
+
+    - 解析按注册表列表顺序查找，首次命中后缓存（未找到的类型不缓存，以便插件稍后注册）
+    - 注册表中找不到时按插件清单导入对应模块后重新查找（插件模块在首次被引用时才导入）
+    - 标记为 reusable 的 Step 会按 (type, 参数) 复用同一个实例
+    """
+
+    def __init__(self, registries: Optional[List] = None):
+        self.registries = registries if registries is not None else [STEPS, CHECKERS, COLLECTORS]
+        # {step_type: step_cls}
+        self._class_cache: Dict[str, Type] = {}
+        # {(step_type, args_key): step_instance}
+        self._instance_cache: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, step_type: str) -> Optional[Type]:
+        """
+        解析 step_type 对应的类，找不到时返回 None
+        """
+        step_cls = self._class_cache.get(step_type)
+        if step_cls is not None:
+            return step_cls
+
+        step_cls = self._lookup(step_type)
+        if step_cls is None and plugin_manifest.ensure(step_type):
+            step_cls = self._lookup(step_type)
+        return step_cls
+
+    def _lookup(self, step_type: str) -> Optional[Type]:
+        for registry in self.registries:
+            step_cls = registry.get(step_type)
+            if step_cls is not None:
+                with self._lock:
+                    self._class_cache[step_type] = step_cls
+                return step_cls
+        return None
+
+    def build(self, step_cfg: Dict):
+        """
+        根据 Step 配置构建实例，无法走快速路径时回退到 registry.build
+        """
+        step_type = step_cfg.get('type')
+
+        # 非字符串类型、指定了 _scope_ 的配置仍交给 mmengine 处理
+        if not isinstance(step_type, str) or '_scope_' in step_cfg:
+            return self._build_with_registry(step_cfg)
+
+        step_cls = self.resolve(step_type)
+        if step_cls is None or (inspect.isclass(step_cls) and issubclass(step_cls, ManagerMixin)):
+            return self._build_with_registry(step_cfg)
+
+        args = {k: v for k, v in step_cfg.items() if k != 'type'}
+        if not getattr(step_cls, 'reusable', False):
+            return step_cls(**args)
+
+        # 可复用（无状态）Step：相同类型和参数的实例跨 Case 复用
+        args_key = json.dumps(args, sort_keys=True, default=str)
+        cache_key = (step_type, args_key)
+        step = self._instance_cache.get(cache_key)
+        if step is None:
+            step = step_cls(**args)
+            with self._lock:
+                self._instance_cache[cache_key] = step
+        return step
+
+    def _build_with_registry(self, step_cfg: Dict):
+        """遍历注册表列表查找并构建 Step，都找不到时从第一个注册表构建以抛出明确错误"""
+        step_type = step_cfg.get('type')
+        if isinstance(step_type, str):
+            if self._lookup(step_type) is None:
+                plugin_manifest.ensure(step_type)
+            for registry in self.registries:
+                if step_type in registry:
+                    return registry.build(step_cfg)
+        return self.registries[0].build(step_cfg)
+
+    def clear(self):
+        """清空类解析缓存和复用实例缓存"""
+        with self._lock:
+            self._class_cache.clear()
+            self._instance_cache.clear()
+
+
+# 进程内共享的默认工厂（Case Pipeline 使用）
+default_step_factory = StepFactory()
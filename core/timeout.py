@@ -0,0 +1,184 @@
+import os
+import time
+import heapq
+import ctypes
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 超时后先设置 Context 的取消标记（协作式取消），超过该宽限时间 Step 仍未返回时向执行线程注入异常
+INTERRUPT_GRACE = 5.0
+
+# 进程池模式下，Case 超时后仍未返回结果（如阻塞在 C 扩展中）时强制终止 Worker 进程的宽限时间
+KILL_GRACE = 2 * INTERRUPT_GRACE
+
+
+class CaseTimeoutError(Exception):
+    """Step 或 Case 执行超时（Case 状态记为 TIMEOUT）"""
+
+
+class _Timer:
+    __slots__ = ('when', 'callback', 'cancelled')
+
+    def __init__(self, when: float, callback: Callable[[], None]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Watchdog:
+    """
+    进程内共享的超时看门狗：一个后台线程按最早到期时间依次触发回调
+
+    取消的定时器只做标记（到期时跳过），schedule / cancel 均为 O(log n) / O(1)，
+    大量 Step 的 deadline 不会为每个 Step 创建线程。
+    """
+
+    def __init__(self):
+        self._seq = itertools.count()
+        self._reset()
+        # fork 出的子进程（如进程池 Worker）不会继承看门狗线程，锁也可能处于被持有的状态，需要重新初始化
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='holmes-watchdog', daemon=True)
+            self._thread.start()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> _Timer:
+        timer = _Timer(time.monotonic() + delay, callback)
+        with self._cond:
+            self._ensure_thread()
+            heapq.heappush(self._heap, (timer.when, next(self._seq), timer))
+            self._cond.notify()
+        return timer
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                when, _, timer = self._heap[0]
+                if timer.cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = when - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            try:
+                timer.callback()
+            except Exception as e:
+                logger.error(f"Watchdog callback failed: {e}")
+
+
+def _async_raise(thread_id: int, exc_type) -> bool:
+    """在指定线程的下一条字节码处抛出 exc_type（阻塞在 C 调用中的线程需等调用返回后才会生效）"""
+    modified = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exc_type))
+    if modified > 1:
+        _clear_async_exc(thread_id)
+        return False
+    return modified == 1
+
+
+def _clear_async_exc(thread_id: int):
+    """撤销指定线程中尚未抛出的异步异常"""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+
+
+watchdog = Watchdog()
+
+
+@contextmanager
+def deadline(context, seconds: Optional[float], reason: str, grace: float = INTERRUPT_GRACE):
+    """
+    限制 with 块的执行时间（在执行 Step 的线程中进入）
+
+    到期时调用 context.cancel(reason)，协作式 Step（如通过 context.sleep 等待）会立即返回并抛出
+    CaseTimeoutError；超过 grace 秒仍未退出时向当前线程注入 CaseTimeoutError。
+    reason 为超时原因（写入 Case 的错误信息），seconds 为 None 或不大于 0 时不限制。
+    退出 with 块时撤销尚未抛出的注入异常，保证 CaseTimeoutError 只会在 with 块内抛出，
+    不会落到后续 Step、Collector 或线程池复用的线程中。
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    lock = threading.Lock()
+    # [是否仍在 with 块内, 是否已注入异常]
+    state = [True, False]
+    timers: List[_Timer] = []
+
+    def interrupt():
+        with lock:
+            if state[0] and _async_raise(thread_id, CaseTimeoutError):
+                state[1] = True
+                logger.error(f"{reason}, interrupting after {grace:g}s grace period")
+
+    def expire():
+        with lock:
+            if not state[0]:
+                return
+            logger.error(reason)
+            context.cancel(reason)
+            timers.append(watchdog.schedule(grace, interrupt))
+
+    timers.append(watchdog.schedule(seconds, expire))
+    try:
+        yield
+    except CaseTimeoutError as e:
+        # 注入的异常没有消息，补充超时原因
+        if not e.args:
+            raise CaseTimeoutError(context.cancel_reason or reason) from None
+        raise
+    finally:
+        with lock:
+            state[0] = False
+            if state[1]:
+                # with 块在注入的异常抛出前已经退出（如 Step 刚好返回），撤销该异常
+                _clear_async_exc(thread_id)
+            for timer in timers:
+                timer.cancel()
+
+
+class ExitOnDeadline:
+    """
+    单 Case 进程（python run.py case）的硬超时，作为 CaseRunner 的 deadline_callback 使用：
+
+    Step 超过 timeout + KILL_GRACE 仍未返回（如阻塞在 C 扩展中，注入的异常无法生效）时，
+    记录超时原因并以 exit_code 直接退出进程，与进程池模式强制终止 Worker 的行为一致。
+    """
+
+    def __init__(self, exit_code: int, grace: float = KILL_GRACE):
+        self.exit_code = exit_code
+        self.grace = grace
+        self._timer: Optional[_Timer] = None
+
+    def __call__(self, seconds: Optional[float], reason: Optional[str]):
+        self.cancel()
+        if seconds and seconds > 0:
+            self._timer = watchdog.schedule(seconds + self.grace, lambda: self._exit(reason))
+
+    def _exit(self, reason: Optional[str]):
+        logger.error(f"{reason}, step did not return within {self.grace:g}s grace period, exiting")
+        os._exit(self.exit_code)
+
+    def cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
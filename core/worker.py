@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import resource
+import multiprocessing
+import socketserver
+from typing import Dict, IO, List, Optional
+from core.status import CaseStatus
+from core.cache import get_cache_dir
+from core.plugin_manifest import plugin_manifest
+from core.result_sink import serialize_case_result
+from core.runner import _run_case_in_worker, _init_worker
+from core.timeout import KILL_GRACE
+
+logger = logging.getLogger(__name__)
+
+# Worker 进程执行多少个 Case 后退出并由 Supervisor 重新 fork
+DEFAULT_MAX_CASES = 1000
+
+# 等待 Worker 返回结果时检查 Step 超时的间隔（秒）
+_TIMEOUT_POLL_INTERVAL = 0.5
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB），优先读取 /proc，其他平台退化为峰值 RSS"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def _error_record(request: Dict, message: str, status: CaseStatus = CaseStatus.ERROR,
+                  duration: float = 0.0) -> Dict:
+    case_file = request.get('case')
+    return serialize_case_result({
+        'case_file': case_file,
+        'suite_path': request.get('suite'),
+        'status': status,
+        'error_message': message,
+        'duration': duration,
+    }) if case_file else {'status': status.value, 'error_message': message}
+
+
+def _worker_main(conn, max_cases: int, max_rss_growth_mb: Optional[float], cache_dir: Optional[str],
+                 step_deadlines=None):
+    """
+    Worker 进程主循环：从 Pipe 接收请求并执行 Case，返回 (record, retire)
+
+    retire 为 True 表示 Worker 已达到 Case 数或内存增长上限，回复后即退出。
+    Step 开始时通过 step_deadlines 向 Supervisor 上报其超时时间。
+    """
+    _init_worker([], cache_dir, step_deadlines)
+    # Case 中的 print 输出到 stderr，避免与 stdin 模式下 stdout 上的协议输出混在一起
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    baseline_rss = current_rss_mb()
+    executed = 0
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        record = _run_case_in_worker(request.get('global_config') or {}, request['case'],
+                                     request.get('suite'), request.get('data_keys') or [],
+                                     request.get('case_timeout'), request.get('step_timeout'))
+        executed += 1
+
+        retire = executed >= max_cases
+        if not retire and max_rss_growth_mb is not None:
+            growth = current_rss_mb() - baseline_rss
+            if growth > max_rss_growth_mb:
+                logger.info(f"Worker {os.getpid()} RSS grew by {growth:.1f}MB, recycling")
+                retire = True
+        conn.send((record, retire))
+        if retire:
+            break
+    conn.close()
+
+
+class WorkerSupervisor:
+    """
+    常驻 Worker 的 Supervisor：预先导入插件并构建注册表，再 fork 出执行 Case 的 Worker 进程
+
+    Worker 继承已预热的解释器（mmengine、插件、注册表），每个 Case 只需加载配置并执行 Pipeline；
+    Worker 执行 max_cases 个 Case 或常驻内存增长超过 max_rss_growth_mb 后退出，
+    Supervisor 在下一个请求到达时重新 fork，Worker 异常退出时该请求记为 ERROR。
+    Step 超时且超过 KILL_GRACE 仍未返回（如阻塞在 C 扩展中）时强制终止 Worker，该请求记为 TIMEOUT。
+    """
+
+    def __init__(self, max_cases: int = DEFAULT_MAX_CASES, max_rss_growth_mb: Optional[float] = None,
+                 data_keys: Optional[List[str]] = None):
+        self.max_cases = max(1, max_cases)
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.data_keys = list(data_keys or [])
+        # fork 继承父进程已导入的模块；不支持 fork 的平台上退化为每个 Worker 重新导入
+        methods = multiprocessing.get_all_start_methods()
+        self._mp = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self._process = None
+        self._conn = None
+        self._deadlines = None
+        self.recycled = 0
+        plugin_manifest.load_all()
+
+    def _spawn(self):
+        parent_conn, child_conn = self._mp.Pipe()
+        self._deadlines = self._mp.Queue()
+        self._process = self._mp.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_cases, self.max_rss_growth_mb, get_cache_dir(), self._deadlines),
+            daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        logger.info(f"Started worker {self._process.pid}")
+
+    def _retire(self):
+        if self._conn is not None:
+            self._conn.close()
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        if self._deadlines is not None:
+            self._deadlines.close()
+        self._process = None
+        self._conn = None
+        self._deadlines = None
+
+    def _wait_result(self, request: Dict):
+        """
+        等待 Worker 返回 (record, retire)；当前 Step 超时且超过 KILL_GRACE 仍未返回时终止 Worker，
+        返回 TIMEOUT 记录。Worker 退出时抛出 EOFError
+        """
+        # 当前设置了超时的 Step：(timeout, reason, Step 开始时间)
+        running = None
+        while not self._conn.poll(_TIMEOUT_POLL_INTERVAL):
+            while True:
+                try:
+                    _, _, _, timeout, reason = self._deadlines.get_nowait()
+                except queue.Empty:
+                    break
+                # 上一个 Case 迟到的上报以 None 结尾，不会影响当前 Case
+                running = (timeout, reason, time.monotonic()) if timeout else None
+            if running is None:
+                continue
+            timeout, reason, started = running
+            if time.monotonic() - started > timeout + KILL_GRACE:
+                pid = self._process.pid
+                logger.error(f"Case timed out: {request['case']} | Killing worker {pid}")
+                self._process.kill()
+                return _error_record(request, f"{reason}, worker {pid} killed", status=CaseStatus.TIMEOUT,
+                                     duration=time.monotonic() - started), True
+        return self._conn.recv()
+
+    def execute(self, request: Dict) -> Dict:
+        """
+        执行一个请求并返回结构化结果记录
+
+        请求字段：case（必填）、suite、global_config、data_keys、case_timeout、step_timeout、id（原样返回）
+        """
+        if not request.get('case'):
+            record = _error_record(request, "Request is missing 'case'")
+        else:
+            if 'data_keys' not in request:
+                request = dict(request, data_keys=self.data_keys)
+            if self._process is None or not self._process.is_alive():
+                self._spawn()
+            pid = self._process.pid
+            try:
+                self._conn.send(request)
+                record, retire = self._wait_result(request)
+            except (EOFError, OSError) as e:
+                logger.error(f"Worker {pid} died while running {request['case']}: {e}")
+                record = _error_record(request, f"Worker {pid} died: exit code {self._process.exitcode}")
+                retire = True
+            record['worker_pid'] = pid
+            if retire:
+                self._retire()
+                self.recycled += 1
+        if 'id' in request:
+            record['id'] = request['id']
+        return record
+
+    def handle_line(self, line: str) -> Optional[Dict]:
+        """处理一行 JSON 请求，空行返回 None"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return _error_record({}, f"Invalid JSON request: {e}")
+        if not isinstance(request, dict):
+            return _error_record({}, "Request must be a JSON object")
+        return self.execute(request)
+
+    def serve_stream(self, reader: IO[str], writer: IO[str]):
+        """JSON Lines 协议：每行一个请求，按请求顺序每行返回一条结果记录"""
+        for line in reader:
+            response = self.handle_line(line)
+            if response is not None:
+                writer.write(json.dumps(response, ensure_ascii=False) + '\n')
+                writer.flush()
+
+    def serve_unix_socket(self, path: str):
+        """在 Unix Socket 上提供 JSON Lines 协议，连接依次处理（同一时刻只有一个 Case 在执行）"""
+        supervisor = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = (line.decode('utf-8') for line in self.rfile)
+                writer = _SocketWriter(self.wfile)
+                try:
+                    supervisor.serve_stream(reader, writer)
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.warning("Client disconnected")
+
+        if os.path.exists(path):
+            os.unlink(path)
+        with socketserver.UnixStreamServer(path, _Handler) as server:
+            logger.info(f"Serving on unix socket {path}")
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(path)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+        self._retire()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text: str):
+        self._wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self._wfile.flush()
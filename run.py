@@ -1,42 +1,55 @@
 import sys
 import os
 import json
-import csv
 import logging
 import click
-import yaml
 from mmengine.config import Config
 from core.runner import CaseRunner
 from core.context import TestContext
-from core.env_manager import DockerEnvironment
-from core.registry import STEPS
-
-# 重要：注册插件 到 Registry 中，不能删
+from core.cache import DEFAULT_CACHE_DIR, set_cache_dir, load_config
+from core.profiler import PlanProfiler
+from core.history import load_case_history
+from core.sharding import parse_shard_spec, shard_cases
+from core.scheduler import ORDERS
+from core.case_export import EXPORT_FORMATS, infer_export_format, iter_case_rows, open_row_writer
+from core.exec_config import EXEC_CONFIG_FIELDS
+from core.timeout import CaseTimeoutError, ExitOnDeadline
+
+# 重要：注册插件包（只定义 Scope 注册表并加载插件清单，插件模块在 Pipeline 首次引用时才导入），不能删
 import sample_project.plugins
 
-# Debug: 打印当前注册的所有步骤，确认 ModelLoader 是否存在
-print(f"DEBUG: Registered STEPS keys: {list(STEPS.module_dict.keys())}")
-
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s')
 logger = logging.getLogger('HolmesCLI')
 
 @click.group()
-def cli():
+@click.option('--cache-dir', default=None, envvar='HOLMES_CACHE_DIR',
+              help=f'启用磁盘缓存并指定缓存目录（如 {DEFAULT_CACHE_DIR}），也可通过 HOLMES_CACHE_DIR 环境变量设置')
+def cli(cache_dir):
     """Holmes - 通用自动化测试框架"""
-    pass
+    if cache_dir:
+        set_cache_dir(cache_dir)
 
 from core.utils import parse_options, generate_case_id
 from core.runner import PlanRunner  # Ensure PlanRunner is imported if not already
 
+# 单 Case 模式下 Case 超时的退出码（与 timeout 命令一致），以便调度方区分 TIMEOUT 与 FAILED
+TIMEOUT_EXIT_CODE = 124
+
 @cli.command()
 @click.argument('case_path')
 @click.option('--env', default=None, help='指定运行环境')
 @click.option('--options', default=None, help='覆盖配置 (key=value, space separated)')
-def case(case_path, env, options):
+@click.option('--case-timeout', default=None, type=float,
+              help='Case 的默认超时时间（秒），Case 配置中的 timeout 字段优先')
+@click.option('--step-timeout', default=None, type=float,
+              help='Step 的默认超时时间（秒），Step 配置中的 timeout 字段优先')
+def case(case_path, env, options, case_timeout, step_timeout):
     """单例模式：运行单个 Test Case"""
     logger.info(f"Mode: Single Case | Path: {case_path}")
 
+    # Step 超时后仍阻塞（如在 C 扩展中）超过 KILL_GRACE 时直接以 TIMEOUT_EXIT_CODE 退出
+    exit_on_deadline = ExitOnDeadline(TIMEOUT_EXIT_CODE)
     try:
         # 1. 加载配置
         cfg = Config.fromfile(case_path)
@@ -54,16 +67,61 @@ def case(case_path, env, options):
         ctx.set('case_file', case_path)
 
         # 4. 执行
-        runner = CaseRunner(ctx)
+        runner = CaseRunner(ctx, step_timeout=step_timeout, case_timeout=cfg.get('timeout', case_timeout),
+                            deadline_callback=exit_on_deadline)
         runner.run(cfg.pipeline)
-        
+
+    except CaseTimeoutError as e:
+        logger.error(f"Case timed out: {e}")
+        sys.exit(TIMEOUT_EXIT_CODE)
     except Exception as e:
         logger.error(f"Execution failed: {e}")
         sys.exit(1)
+    finally:
+        exit_on_deadline.cancel()
+
+def _case_cmd_options(plan_cfg) -> list:
+    """导出的 cmd 列需要携带的 Plan 级默认值（python run.py case 不读取 Plan）"""
+    cmd_options = []
+    for field in ('case_timeout', 'step_timeout'):
+        if plan_cfg.get(field) is not None:
+            cmd_options += [f"--{field.replace('_', '-')}", str(plan_cfg.get(field))]
+    return cmd_options
+
+
+def _parse_shard_option(ctx, param, value):
+    """click 回调：将 --shard i/N 解析为 (i, N)"""
+    if value is None:
+        return None
+    try:
+        return parse_shard_spec(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
 
 @cli.command()
 @click.argument('plan_path')
-def plan(plan_path):
+@click.option('--workers', default=None, type=int, help='并行执行 Case 的进程数（覆盖 Plan 中的 parallelism 字段）')
+@click.option('--profile', is_flag=True, default=False, help='开启性能分析（强制串行执行）')
+@click.option('--profile-dir', default='profile', help='性能分析结果输出目录')
+@click.option('--shard', default=None, callback=_parse_shard_option,
+              help='只运行第 i 个分片，格式为 i/N（按历史耗时均衡切分）')
+@click.option('--history', 'history_paths', multiple=True,
+              help='历史结果文件（JUnit XML 或 JSONL 结果日志），用于分片均衡和优先级排序，可指定多次')
+@click.option('--incremental', is_flag=True, default=None,
+              help='增量模式：输入未变化的 Case 复用上一次 PASSED 的结果（也可在 Plan 中配置 incremental=True）')
+@click.option('--order', type=click.Choice(ORDERS), default=None,
+              help='Case 执行顺序：plan 按 Plan 中的顺序，priority 按历史失败率和耗时优先执行最可能失败的 Case')
+@click.option('--max-failures', default=None, type=int,
+              help='失败数达到该值后停止执行，剩余 Case 记录为 SKIPPED')
+@click.option('--async-concurrency', 'concurrency', default=None, type=int,
+              help='asyncio 模式下同时执行的 Case 数（适用于 I/O 密集的 Plan，覆盖 Plan 中的 async_concurrency 字段）')
+@click.option('--case-timeout', default=None, type=float,
+              help='Case 的默认超时时间（秒，覆盖 Plan 中的 case_timeout 字段），超时的 Case 记录为 TIMEOUT')
+@click.option('--step-timeout', default=None, type=float,
+              help='Step 的默认超时时间（秒，覆盖 Plan 中的 step_timeout 字段）')
+def plan(plan_path, workers, profile, profile_dir, shard, history_paths, incremental, order, max_failures,
+         concurrency, case_timeout, step_timeout):
     """计划模式：运行 Test Plan"""
     logger.info(f"Mode: Test Plan | Path: {plan_path}")
     
@@ -81,6 +139,8 @@ def plan(plan_path):
 
         if env_cfg and env_cfg.get('type') == 'docker' and not in_docker:
             logger.info("Docker environment detected. Preparing to run in container...")
+            # docker SDK 导入较慢，仅在需要启动容器时导入
+            from core.env_manager import DockerEnvironment
             workspace_root = os.getcwd()
             env_manager = DockerEnvironment(env_cfg, workspace_root)
 
@@ -92,9 +152,32 @@ def plan(plan_path):
             # 简单起见，我们重新构造命令
             cmd_args = ['python', 'run.py', 'plan', plan_path]
             # 如果有其他参数需要透传，这里可能需要更复杂的解析，目前只处理最基本的
-
-            # 启动容器运行
-            exit_code = env_manager.run(cmd_args)
+            if workers:
+                cmd_args += ['--workers', str(workers)]
+            if profile:
+                cmd_args += ['--profile', '--profile-dir', profile_dir]
+            if shard:
+                cmd_args += ['--shard', f'{shard[0]}/{shard[1]}']
+            for history_path in history_paths:
+                cmd_args += ['--history', history_path]
+            if incremental:
+                cmd_args += ['--incremental']
+            if order:
+                cmd_args += ['--order', order]
+            if max_failures is not None:
+                cmd_args += ['--max-failures', str(max_failures)]
+            if concurrency:
+                cmd_args += ['--async-concurrency', str(concurrency)]
+            if case_timeout is not None:
+                cmd_args += ['--case-timeout', str(case_timeout)]
+            if step_timeout is not None:
+                cmd_args += ['--step-timeout', str(step_timeout)]
+
+            # 启动容器运行：配置了 pool_size 时使用常驻容器池（可跨 Plan 复用）
+            if env_manager.pool_size:
+                exit_code = env_manager.run_in_pool([cmd_args])
+            else:
+                exit_code = env_manager.run(cmd_args)
             sys.exit(exit_code)
 
         # 3. 如果在容器内 或 没有配置 Docker 环境，则直接运行
@@ -102,7 +185,12 @@ def plan(plan_path):
             logger.info("Running INSIDE Docker container.")
 
         # 4. 初始化 Runner
-        runner = PlanRunner(plan_cfg)
+        profiler = PlanProfiler(output_dir=profile_dir) if profile else None
+        runner = PlanRunner(plan_cfg, workers=workers, profiler=profiler,
+                            shard=shard, history=load_case_history(history_paths),
+                            shard_history=load_case_history(history_paths, include_auto=False),
+                            incremental=incremental, order=order, max_failures=max_failures,
+                            concurrency=concurrency, case_timeout=case_timeout, step_timeout=step_timeout)
 
         # 5. 执行
         success = runner.run()
@@ -192,10 +280,9 @@ def _has_exec_config_fields(cfg) -> bool:
     """
     检查配置中是否定义了执行配置相关字段
     """
-    exec_fields = ['environment', 'runtime', 'config_files', 'env_file', 'setup_script']
     if cfg is None:
         return False
-    for field in exec_fields:
+    for field in EXEC_CONFIG_FIELDS:
         if field in cfg and cfg.get(field):
             return True
     return False
@@ -327,93 +414,94 @@ def _build_exec_config_dict(plan_environment, suite_environment, merged_runtime,
     return exec_config
 
 
-def _generate_exec_config_files(csv_path, plan_cfg, suite_configs: dict) -> dict:
+def _merge_environment_override(suite_env, case_env) -> dict:
+    """
+    合并 Suite 与 Case 的 environment（Case 覆盖 Suite），结果作为覆盖 Plan 的 environment 使用。
+    docker_id 和 docker_image 作为同一个概念处理：Case 定义了其中之一时，不再保留 Suite 的另一个字段
+    """
+    if not case_env:
+        return suite_env or {}
+    merged = _deep_merge_dicts(suite_env, case_env)
+    if case_env.get('docker_id') or case_env.get('docker_image'):
+        for key in ('docker_id', 'docker_image'):
+            if not case_env.get(key):
+                merged.pop(key, None)
+    return merged
+
+
+def _build_case_exec_config(plan_cfg, plan_name: str, suite_overrides: dict, case_overrides: dict) -> dict:
     """
-    生成 exec_config YAML 文件（K8s CRD 格式）
+    按 Case > Suite > Plan 的优先级合并执行配置字段并构建 exec_config 字典
 
     Args:
-        csv_path: CSV 文件路径，用于确定 exec_config 文件夹位置
+        plan_cfg: Plan 配置
+        plan_name: Plan 名称，用于 metadata.namespace
+        suite_overrides: Suite 定义的执行配置字段（为空时表示 Plan 级别的默认配置）
+        case_overrides: Case 定义的执行配置字段
+    """
+    environment = _merge_environment_override(suite_overrides.get('environment'), case_overrides.get('environment'))
+    return _build_exec_config_dict(
+        plan_cfg.get('environment', {}),
+        environment,
+        _merge_hierarchical_config(case_overrides, suite_overrides, plan_cfg, 'runtime', {}),
+        _merge_hierarchical_config(case_overrides, suite_overrides, plan_cfg, 'config_files', {}),
+        _merge_config_field(case_overrides, suite_overrides, plan_cfg, 'env_file', ''),
+        _merge_config_field(case_overrides, suite_overrides, plan_cfg, 'setup_script', ''),
+        plan_name=plan_name
+    )
+
+
+def _create_exec_config_resolver(output_path, plan_cfg, suite_configs: dict):
+    """
+    创建 exec_config 解析器，YAML 文件（K8s CRD 格式）按内容哈希去重写入 exec_config/<plan_name>/<hash>.yaml
+
+    Args:
+        output_path: 导出文件路径，用于确定 exec_config 文件夹位置
         plan_cfg: Plan 配置
         suite_configs: Suite 配置字典 {suite_path: suite_cfg}
 
     Returns:
-        dict: {suite_path 或 'default': yaml_file_path} 的映射
+        ExecConfigResolver: resolve(suite_path, case_overrides) -> (yaml_file_path, exec_config_hash)
     """
+    from functools import partial
+    from core.exec_config import ExecConfigStore, ExecConfigResolver
+
     # 获取 Plan 名称（用于 metadata.namespace 和子文件夹名称）
     plan_metadata = plan_cfg.get('metadata', {})
     plan_name = plan_metadata.get('name') or 'default'
 
-    # 创建 exec_config/<plan_name> 文件夹
-    csv_dir = os.path.dirname(csv_path) if os.path.dirname(csv_path) else '.'
-    exec_config_dir = os.path.join(csv_dir, 'exec_config', plan_name)
-    if not os.path.exists(exec_config_dir):
-        os.makedirs(exec_config_dir)
+    output_dir = os.path.dirname(output_path) if os.path.dirname(output_path) else '.'
+    store = ExecConfigStore(os.path.join(output_dir, 'exec_config', plan_name), plan_name)
+    resolver = ExecConfigResolver(store, suite_configs, partial(_build_case_exec_config, plan_cfg, plan_name))
 
-    exec_config_mapping = {}
-
-    # 1. 生成 Plan 级别的 default.yaml
-    plan_environment = plan_cfg.get('environment', {})
-    plan_runtime = plan_cfg.get('runtime', {})
-    plan_config_files = plan_cfg.get('config_files', {})
-    plan_env_file = plan_cfg.get('env_file', '')
-    plan_setup_script = plan_cfg.get('setup_script', '')
-
-    default_exec_config = _build_exec_config_dict(
-        plan_environment, None, plan_runtime, plan_config_files, plan_env_file, plan_setup_script,
-        plan_name=plan_name, suite_name='default'
-    )
-
-    default_yaml_path = os.path.join(exec_config_dir, 'default.yaml')
-    with open(default_yaml_path, 'w', encoding='utf-8') as f:
-        yaml.dump(default_exec_config, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-    exec_config_mapping['default'] = default_yaml_path
-
-    # 2. 为每个有执行配置的 Suite 生成 YAML 文件
-    for suite_path, suite_cfg in suite_configs.items():
-        # 获取 Suite 名称
-        suite_metadata = suite_cfg.get('metadata', {}) if suite_cfg else {}
-        suite_name = suite_metadata.get('name') or os.path.splitext(os.path.basename(suite_path))[0]
-
-        if not _has_exec_config_fields(suite_cfg):
-            # Suite 没有定义执行配置字段，使用 default
-            exec_config_mapping[suite_path] = default_yaml_path
-            continue
-
-        # 合并 Plan 和 Suite 的配置
-        plan_environment = plan_cfg.get('environment', {})
-        suite_environment = suite_cfg.get('environment', {}) if suite_cfg else {}
-        merged_runtime = _deep_merge_dicts(
-            plan_cfg.get('runtime', {}),
-            suite_cfg.get('runtime', {}) if suite_cfg else {}
-        )
-        merged_config_files = _deep_merge_dicts(
-            plan_cfg.get('config_files', {}),
-            suite_cfg.get('config_files', {}) if suite_cfg else {}
-        )
-        merged_env_file = suite_cfg.get('env_file') if suite_cfg and suite_cfg.get('env_file') else plan_cfg.get('env_file', '')
-        merged_setup_script = suite_cfg.get('setup_script') if suite_cfg and suite_cfg.get('setup_script') else plan_cfg.get('setup_script', '')
-
-        suite_exec_config = _build_exec_config_dict(
-            plan_environment, suite_environment, merged_runtime, merged_config_files, merged_env_file, merged_setup_script,
-            plan_name=plan_name, suite_name=suite_name
-        )
-
-        suite_yaml_path = os.path.join(exec_config_dir, f'{suite_name}.yaml')
-
-        with open(suite_yaml_path, 'w', encoding='utf-8') as f:
-            yaml.dump(suite_exec_config, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
-        exec_config_mapping[suite_path] = suite_yaml_path
-
-    return exec_config_mapping
+    # Plan 级别的默认配置及各 Suite 的配置总是生成，Case 级别的配置在导出时按需生成
+    resolver.resolve()
+    for suite_path in suite_configs:
+        resolver.resolve(suite_path)
+    return resolver
 
 
 @cli.command()
 @click.argument('plan_path')
-@click.option('--csv', 'csv_path', help='Dump result to CSV file')
-def list_cases(plan_path, csv_path):
+@click.option('--csv', 'csv_path', help='Dump result to CSV file（等价于 --output PATH --format csv）')
+@click.option('--output', '-o', 'output_path', default=None,
+              help='导出 Case 列表的文件路径（同时生成 exec_config YAML 文件）')
+@click.option('--format', 'output_format', type=click.Choice(EXPORT_FORMATS), default=None,
+              help='导出格式，默认按 --output 的扩展名推断，否则为 csv（parquet 需要安装 pyarrow）')
+@click.option('--jobs', '-j', default=1, type=int, help='并行解析 Case 配置的进程数')
+@click.option('--shard', default=None, callback=_parse_shard_option,
+              help='只列出第 i 个分片的 Case，格式为 i/N（与 plan --shard 的切分结果一致）')
+@click.option('--history', 'history_paths', multiple=True,
+              help='用于分片均衡的历史结果文件（JUnit XML 或 JSONL 结果日志），可指定多次')
+def list_cases(plan_path, csv_path, output_path, output_format, jobs, shard, history_paths):
     """列出 Plan 中包含的所有 Case"""
     logger.info(f"Listing cases for Plan: {plan_path}")
 
+    if csv_path:
+        output_path, output_format = csv_path, 'csv'
+    if output_path and not output_format:
+        output_format = infer_export_format(output_path)
+
     try:
         # 1. 加载 Plan 配置
         plan_cfg = Config.fromfile(plan_path)
@@ -428,111 +516,228 @@ def list_cases(plan_path, csv_path):
         from core.loader import SuiteLoader
 
         total_cases = 0
-        case_data_list = []
         suite_configs = {}  # 用于存储所有 suite 配置，供生成 exec_config 使用
 
+        # 先加载所有 Suite 的 Case 列表，分片需要基于整个 Plan 的 Case 集合
+        suite_cases = {}
         for suite_path in suites:
-            print(f"\nSuite: {suite_path}")
             try:
                 # 使用新方法同时获取 case 列表和 suite 配置
-                case_files, suite_cfg = SuiteLoader.load_cases_with_config(suite_path)
-                suite_configs[suite_path] = suite_cfg  # 保存 suite 配置
-
-                # 获取 Suite 的 metadata 中的 domain
-                suite_metadata = suite_cfg.get('metadata', {}) if suite_cfg else {}
-                suite_domain = suite_metadata.get('domain', '')
-
-                if not case_files:
-                     print("  (No cases found)")
-                for case_file in case_files:
-                    print(f"  - {case_file}")
-                    total_cases += 1
-
-                    if csv_path:
-                        try:
-                            # 加载 Case 详情用于导出
-                            case_cfg = Config.fromfile(case_file)
-                            metadata = case_cfg.get('metadata', {})
-
-                            # Extract Case-level info
-                            labels = case_cfg.get('labels', [])
-                            labels_str = '|'.join(labels) if isinstance(labels, list) else str(labels)
-                            cmd = f"python run.py case {case_file}"
-
-                            # 自动生成 Case ID
-                            auto_case_id = generate_case_id(case_file)
-
-                            # 收集数据（去掉 config_files, env_file, setup_scripts, vm_image, docker_image, global config）
-                            # 新增 component, domain, exec_config（exec_config 稍后填充）
-                            case_data_list.append({
-                                'case ID': auto_case_id,
-                                'name': metadata.get('name', ''),
-                                'component': plan_component,
-                                'domain': suite_domain,
-                                'suite': suite_path,
-                                'case path': case_file,
-                                'labels': labels_str,
-                                'cmd': cmd,
-                                'exec_config': ''  # 稍后填充
-                            })
-                        except Exception as e:
-                            logger.error(f"Failed to load details for case {case_file}: {e}")
-                            # 即使加载失败也生成 Case ID
-                            auto_case_id = generate_case_id(case_file)
-
-                            case_data_list.append({
-                                'case ID': auto_case_id,
-                                'name': 'ERROR',
-                                'component': plan_component,
-                                'domain': suite_domain,
-                                'suite': suite_path,
-                                'case path': case_file,
-                                'labels': '',
-                                'cmd': f"python run.py case {case_file}",
-                                'exec_config': ''  # 稍后填充
-                            })
-
+                suite_cases[suite_path], suite_configs[suite_path] = SuiteLoader.load_cases_with_config(suite_path)
             except Exception as e:
                 logger.error(f"Failed to load suite {suite_path}: {e}")
 
+        if shard:
+            all_cases = [(case_file, suite_path)
+                         for suite_path, case_files in suite_cases.items()
+                         for case_file in case_files]
+            selected = shard_cases(all_cases, shard[0], shard[1],
+                                   load_case_history(history_paths, include_auto=False))
+            for suite_path in suite_cases:
+                suite_cases[suite_path] = [case_file for case_file, path in selected if path == suite_path]
+
+        # Plan / Suite 级别的 exec_config 在导出 Case 之前生成，Case 级别的覆盖在解析 Case 时合并
+        exec_config_resolver = None
+        if output_path:
+            exec_config_resolver = _create_exec_config_resolver(output_path, plan_cfg, suite_configs)
+
+        export_cases = []
+        for suite_path, case_files in suite_cases.items():
+            print(f"\nSuite: {suite_path}")
+            suite_cfg = suite_configs[suite_path]
+
+            # 获取 Suite 的 metadata 中的 domain
+            suite_metadata = suite_cfg.get('metadata', {}) if suite_cfg else {}
+            suite_domain = suite_metadata.get('domain', '')
+
+            if not case_files:
+                 print("  (No cases found)")
+            for case_file in case_files:
+                print(f"  - {case_file}")
+                total_cases += 1
+                if output_path:
+                    export_cases.append((case_file, suite_path, plan_component, suite_domain))
+
         print(f"\nTotal Cases: {total_cases}")
 
-        # 如果指定了 CSV 输出路径，则写入文件
-        if csv_path and case_data_list:
+        # 如果指定了输出路径：并行解析 Case 配置，按 Case 顺序流式写入文件
+        if output_path and export_cases:
             try:
-                # 确保目录存在
-                output_dir = os.path.dirname(csv_path)
-                if output_dir and not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-
-                # 生成 exec_config YAML 文件
-                exec_config_mapping = _generate_exec_config_files(csv_path, plan_cfg, suite_configs)
-
-                # 填充每个 case 的 exec_config 路径
-                for case_data in case_data_list:
-                    suite_path = case_data['suite']
-                    if suite_path in exec_config_mapping:
-                        case_data['exec_config'] = exec_config_mapping[suite_path]
-                    else:
-                        case_data['exec_config'] = exec_config_mapping.get('default', '')
-
-                with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = ['case ID', 'name', 'component', 'domain', 'suite', 'case path', 'labels', 'cmd', 'exec_config']
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                    writer.writeheader()
-                    for row in case_data_list:
-                        writer.writerow(row)
-
-                logger.info(f"Successfully dumped cases to {csv_path}")
-                print(f"CSV exported to: {csv_path}")
+                writer = open_row_writer(output_path, output_format)
+                try:
+                    for row in iter_case_rows(export_cases, jobs=jobs,
+                                              resolve_exec_config=exec_config_resolver.resolve,
+                                              cmd_options=_case_cmd_options(plan_cfg)):
+                        writer.write(row)
+                finally:
+                    writer.close()
+
+                logger.info(f"Generated {len(exec_config_resolver.store)} unique exec configs "
+                            f"({exec_config_resolver.merges} merges) for {len(export_cases)} cases")
+
+                output_dir = os.path.dirname(output_path)
+                logger.info(f"Successfully dumped cases to {output_path}")
+                print(f"{output_format.upper()} exported to: {output_path}")
                 print(f"Exec config files generated in: {os.path.join(output_dir if output_dir else '.', 'exec_config')}")
             except Exception as e:
-                logger.error(f"Failed to write CSV file: {e}")
+                logger.error(f"Failed to write {output_format} file: {e}")
 
     except Exception as e:
         logger.error(f"Failed to list cases: {e}")
         sys.exit(1)
 
+@cli.command()
+@click.argument('paths', nargs=-1, required=True)
+def index(paths):
+    """构建或刷新 Case Label 索引（支持 Plan/Suite 文件或 Case 根目录）"""
+    from core.label_index import get_label_index
+
+    try:
+        # 1. 解析所有需要索引的 Case 根目录
+        case_roots = []
+        for path in paths:
+            if os.path.isdir(path):
+                case_roots.append(path)
+                continue
+
+            cfg = load_config(path)
+            if 'suites' in cfg:
+                suite_paths = cfg.get('suites', [])
+            else:
+                suite_paths = [path]
+            for suite_path in suite_paths:
+                suite_cfg = cfg if suite_path == path else load_config(suite_path)
+                case_roots.append(suite_cfg.get('case_root', '.'))
+
+        # 2. 增量刷新索引
+        # 索引需要持久化：未指定缓存目录时保存在默认目录，list-cases / plan 会按同一路径读取
+        label_index = get_label_index(persist=True)
+        for case_root in dict.fromkeys(case_roots):
+            case_files = label_index.refresh(case_root)
+            print(f"Indexed {case_root}: {len(case_files)} cases, {label_index.parsed_count} re-parsed")
+
+        label_index.save()
+        print(f"Label index saved to: {label_index.index_path}")
+    except Exception as e:
+        logger.error(f"Failed to build label index: {e}")
+        sys.exit(1)
+
+@cli.group()
+def goldens():
+    """Golden 参考结果管理"""
+    pass
+
+
+@goldens.command('update')
+@click.argument('plan_path')
+@click.option('--store', 'store_path', default=None,
+              help='Golden 仓库目录（默认使用 Plan global_config 中的 golden_store，否则为 goldens）')
+@click.option('--output', 'output_keys', multiple=True,
+              help='需要采集为 golden 的 Context 数据 key，可指定多次（默认 output_tensor）')
+def goldens_update(plan_path, store_path, output_keys):
+    """运行 Plan 并将各 Case 当前的输出批量保存为新的 golden"""
+    from core.golden_store import GoldenStore
+
+    logger.info(f"Mode: Golden Update | Path: {plan_path}")
+    try:
+        plan_cfg = Config.fromfile(plan_path)
+        plan_cfg.setdefault('plan_name', os.path.splitext(os.path.basename(plan_path))[0])
+
+        global_config = plan_cfg.get('global_config') or {}
+        store_path = store_path or global_config.get('golden_store') or 'goldens'
+        if os.path.isfile(store_path):
+            raise click.ClickException(f"{store_path} is a packed golden file (read-only), "
+                                       f"update the golden directory and re-pack instead.")
+        # 更新期间不与旧 golden 对比
+        if 'golden_store' in global_config:
+            global_config['golden_store'] = None
+
+        store = GoldenStore(store_path)
+        output_keys = output_keys or ('output_tensor',)
+        captured = {'cases': 0, 'outputs': 0}
+
+        def capture(case_result):
+            ctx = case_result.get('context')
+            if ctx is None:
+                return
+            case_id = ctx.get('case_id')
+            values = {key: ctx.get(key) for key in output_keys if ctx.get(key) is not None}
+            for key, value in values.items():
+                store.put(case_id, key, value)
+            if values:
+                captured['cases'] += 1
+                captured['outputs'] += len(values)
+                logger.info(f"  -> Captured goldens for {case_id}: {list(values)}")
+
+        # 需要读取完整 Context，因此在主进程内执行，且不复用增量结果
+        runner = PlanRunner(plan_cfg, workers=1, incremental=False, max_failures=0, case_callback=capture)
+        runner.run()
+
+        print(f"Updated {captured['outputs']} goldens for {captured['cases']} cases in: {store_path}")
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Golden update failed: {e}")
+        sys.exit(1)
+
+
+@goldens.command('pack')
+@click.argument('store_path')
+@click.argument('pack_path')
+def goldens_pack(store_path, pack_path):
+    """将 golden 目录打包为单个文件（读取时按偏移 mmap）"""
+    from core.golden_store import GoldenStore
+
+    count = GoldenStore(store_path).pack(pack_path)
+    print(f"Packed {count} goldens into: {pack_path}")
+
+
+@cli.command()
+@click.option('--socket', 'socket_path', default=None,
+              help='在指定的 Unix Socket 上接收请求，默认从 stdin 读取请求并将结果写到 stdout')
+@click.option('--max-cases', default=None, type=int,
+              help='Worker 进程执行多少个 Case 后重新 fork（默认 1000）')
+@click.option('--max-rss-growth', 'max_rss_growth', default=None, type=float,
+              help='Worker 常驻内存相对启动时增长超过该值（MB）后重新 fork')
+@click.option('--data-key', 'data_keys', multiple=True,
+              help='写入结果记录的黑板数据 key（请求中未指定 data_keys 时使用），可指定多次')
+def serve(socket_path, max_cases, max_rss_growth, data_keys):
+    """常驻 Worker 模式：按 JSON Lines 协议接收 Case 执行请求，避免每个 Case 重新启动解释器"""
+    import signal
+    from core.worker import WorkerSupervisor, DEFAULT_MAX_CASES
+
+    # 收到 SIGTERM 时正常退出，由 Supervisor 关闭 Worker 并清理 Socket 文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with WorkerSupervisor(max_cases=max_cases or DEFAULT_MAX_CASES, max_rss_growth_mb=max_rss_growth,
+                          data_keys=list(data_keys)) as supervisor:
+        try:
+            if socket_path:
+                supervisor.serve_unix_socket(socket_path)
+            else:
+                logger.info("Serving on stdin (one JSON request per line)")
+                supervisor.serve_stream(sys.stdin, sys.stdout)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(f"Worker supervisor stopped ({supervisor.recycled} workers recycled)")
+
+
+
+@cli.group()
+def plugins():
+    """插件管理"""
+    pass
+
+
+@plugins.command('manifest')
+@click.argument('packages', nargs=-1)
+def plugins_manifest(packages):
+    """导入插件包的全部模块并重新生成插件清单（plugin_manifest.json），默认处理所有已注册的插件包"""
+    from core.plugin_manifest import plugin_manifest, generate_manifest
+
+    for package in packages or plugin_manifest.packages:
+        path = generate_manifest(package)
+        print(f"Plugin manifest generated: {path}")
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
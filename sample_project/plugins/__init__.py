@@ -1,5 +1,6 @@
 from mmengine.registry import Registry
 from core.registry import STEPS, COLLECTORS, CHECKERS
+from core.plugin_manifest import register_plugin_package
 
 # 定义统一的 demo scope，父注册表指向全局 STEPS/COLLECTORS
 # 这样在 Case 中可以使用 'demo.ClassName' 进行引用
@@ -7,7 +8,13 @@ DEMO_STEPS = Registry('demo_steps', scope='demo', parent=STEPS)
 DEMO_CHECKERS = Registry('demo_checkers', scope='demo', parent=CHECKERS)
 DEMO_COLLECTORS = Registry('demo_collectors', scope='demo', parent=COLLECTORS)
 
-# 自动导入所有插件模块以触发注册
-from .steps import sample, dummy, my_engine
-from .checkers import sample
-from .collectors import sample, plan_summary
\ No newline at end of file
+
+def load_all():
+    """导入所有插件模块以触发注册（生成插件清单、清单中找不到类型时使用）"""
+    from .steps import sample, dummy, my_engine
+    from .checkers import sample
+    from .collectors import sample, plan_summary
+
+
+# 插件模块按 plugin_manifest.json 在 Pipeline 首次引用时导入（新增插件后执行 python run.py plugins manifest 重新生成）
+register_plugin_package(__name__, load_all)
@@ -1,6 +1,8 @@
 import logging
 from core.interface import BaseChecker
 from core.context import TestContext
+from core.numerics import compare_tensors, load_tensor, DEFAULT_CHUNK_SIZE
+from core.golden_store import open_golden_store
 from sample_project.plugins import DEMO_CHECKERS
 from core.status import CaseStatus
 
@@ -9,15 +11,36 @@ logger = logging.getLogger(__name__)
 @DEMO_CHECKERS.register_module()
 class NumericsComparator(BaseChecker):
     """
-    模拟数值对比步骤
+    数值对比步骤：将 output_tensor 与 golden 参考结果按 rtol/atol 分块向量化对比
+
+    参数：
+        rtol/atol: 容差，语义与 np.isclose 一致
+        output_key: 待对比的 Context 数据 key，默认 output_tensor（同时作为 golden 仓库中的输出名）
+        golden_path: golden 参考结果的 .npy 文件（以 mmap 方式读取）
+                     未指定时依次使用 Context 的 golden_tensor、配置中 golden_store 仓库内该 Case 的 golden
+        max_mismatch_ratio: 允许的不匹配元素比例，默认 0
+        min_cosine: 可选，余弦相似度下限
+        chunk_size: 每次处理的元素个数
+
+    对比结果写入 Context 的 numerics 字段；没有 golden 时只检查 output_tensor 是否存在。
     """
 
     def load_context(self, context: TestContext):
-        self.output_tensor = context.get('output_tensor')
+        output_key = getattr(self, 'output_key', 'output_tensor')
+        self.output_tensor = context.get(output_key)
+        golden_path = getattr(self, 'golden_path', None)
+        self.golden = golden_path if golden_path else context.get('golden_tensor')
+
+        # golden 仓库中的数据以 mmap 方式打开，只读入对比时访问的页
+        golden_store = context.config.get('golden_store')
+        if self.golden is None and golden_store:
+            self.golden = open_golden_store(golden_store).get(context.get('case_id'), output_key)
+        self.metrics = None
 
     def action(self, context: TestContext):
         rtol = getattr(self, 'rtol', 1e-5)
-        logger.info(f"Comparing results with rtol={rtol}...")
+        atol = getattr(self, 'atol', 1e-8)
+        logger.info(f"Comparing results with rtol={rtol}, atol={atol}...")
 
         if self.output_tensor is None:
             error_msg = "output_tensor not found in context!"
@@ -25,11 +48,35 @@ class NumericsComparator(BaseChecker):
             context.status = CaseStatus.FAILED
             raise RuntimeError(error_msg)
 
-        # 模拟对比逻辑
-        logger.info("Numerics comparison passed.")
+        if self.golden is None:
+            logger.info(f"No golden reference provided, skipping numerics comparison for output: {self.output_tensor}")
+            return
+
+        self.metrics = compare_tensors(load_tensor(self.output_tensor), load_tensor(self.golden),
+                                       rtol=rtol, atol=atol,
+                                       chunk_size=getattr(self, 'chunk_size', DEFAULT_CHUNK_SIZE))
+        logger.info(f"Numerics metrics: {self.metrics}")
+
+        errors = []
+        max_mismatch_ratio = getattr(self, 'max_mismatch_ratio', 0.0)
+        if self.metrics['mismatch_ratio'] > max_mismatch_ratio:
+            errors.append(f"mismatch ratio {self.metrics['mismatch_ratio']:.6%} exceeds {max_mismatch_ratio:.6%} "
+                          f"(max abs error {self.metrics['max_abs_error']:.6g}, "
+                          f"max rel error {self.metrics['max_rel_error']:.6g})")
+        min_cosine = getattr(self, 'min_cosine', None)
+        if min_cosine is not None and not self.metrics['cosine_similarity'] >= min_cosine:
+            errors.append(f"cosine similarity {self.metrics['cosine_similarity']:.8f} is below {min_cosine}")
 
-        # 模拟对比逻辑
-        logger.info(f"Verification passed for output: {self.output_tensor}")
+        if errors:
+            error_msg = "Numerics comparison failed: " + "; ".join(errors)
+            logger.error(error_msg)
+            context.set('numerics', self.metrics)
+            context.status = CaseStatus.FAILED
+            raise RuntimeError(error_msg)
+
+        logger.info("Numerics comparison passed.")
 
     def set_context(self, context: TestContext):
+        if self.metrics is not None:
+            context.set('numerics', self.metrics)
         context.status = CaseStatus.SUCCESS
@@ -1,5 +1,6 @@
 import logging
 from core.interface import BaseStep
+from core.artifact_cache import cacheable
 from core.context import TestContext
 from sample_project.plugins import DEMO_STEPS
 
@@ -7,6 +8,7 @@ logger = logging.getLogger(__name__)
 
 # 重命名为 DummyCompiler 以避免冲突
 @DEMO_STEPS.register_module(name='DummyCompiler')
+@cacheable(inputs=('model_path', 'model_attr'), outputs=('engine_path',))
 class Compiler(BaseStep):
     def load_context(self, context: TestContext):
         self.model_path = context.get('model_path')
@@ -1,6 +1,7 @@
-import time
+import asyncio
 import logging
-from core.interface import BaseStep
+from core.interface import BaseStep, AsyncBaseStep
+from core.artifact_cache import cacheable
 from core.context import TestContext
 from sample_project.plugins import DEMO_STEPS
 from core.status import CaseStatus
@@ -8,9 +9,10 @@ from core.status import CaseStatus
 logger = logging.getLogger(__name__)
 
 @DEMO_STEPS.register_module()
-class ModelLoader(BaseStep):
+@cacheable(outputs=('model_path', 'model_attr'), config=('target_device', 'precision'))
+class ModelLoader(AsyncBaseStep):
     """
-    模拟模型加载步骤
+    模拟模型加载步骤（从远程 URI 下载属于 I/O 等待，实现为异步 Step）
     """
 
     def load_context(self, context: TestContext):
@@ -18,11 +20,11 @@ class ModelLoader(BaseStep):
         self.target_device = context.config.get('target_device', 'unknown')
         self.precision = context.config.get('precision', 'unknown')
 
-    def action(self, context: TestContext):
+    async def action(self, context: TestContext):
         uri = getattr(self, 'uri', 'unknown')
         logger.info(f"Loading model from {uri} (Target: {self.target_device}, Precision: {self.precision})...")
-        # 模拟加载耗时
-        time.sleep(0.5)
+        # 模拟下载耗时
+        await asyncio.sleep(0.5)
         logger.info("Model loaded.")
 
     def set_context(self, context: TestContext):
@@ -36,8 +38,11 @@ class SleepStep(BaseStep):
     """
     调试用的休眠步骤
     """
+    # 无状态步骤，可跨 Case 复用实例
+    reusable = True
 
     def action(self, context: TestContext):
         seconds = getattr(self, 'seconds', 1)
         logger.info(f"Sleeping for {seconds} seconds...")
-        time.sleep(seconds)
\ No newline at end of file
+        # 可被超时看门狗取消
+        context.sleep(seconds)
@@ -0,0 +1,106 @@
+import asyncio
+import gc
+import os
+import pytest
+from core.artifact_cache import ArtifactCache, cacheable, set_artifact_cache
+from core.context import TestContext as CaseContext
+from core.interface import AsyncBaseStep
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ArtifactCache(root=str(tmp_path / 'artifacts'))
+    set_artifact_cache(cache)
+    yield cache
+    set_artifact_cache(None)
+
+
+def _put_engine(cache, tmp_path, key):
+    engine = tmp_path / f'{key}.engine'
+    engine.write_bytes(b'x' * 1024)
+    cache.put(key, {'engine_path': str(engine)})
+
+
+def test_pinned_entry_survives_eviction(cache, tmp_path):
+    _put_engine(cache, tmp_path, 'a' * 64)
+    owner = CaseContext()
+    outputs = cache.get('a' * 64, owner=owner)
+    assert outputs is not None
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert os.path.exists(outputs['engine_path'])
+
+    # owner 释放后解除固定，下次淘汰时删除
+    del owner
+    gc.collect()
+    cache.evict()
+    assert not os.path.exists(outputs['engine_path'])
+    assert cache.get('a' * 64) is None
+
+
+def test_concurrent_async_steps_compute_once(cache):
+    calls = []
+
+    @cacheable(outputs=('model_attr',))
+    class SlowLoader(AsyncBaseStep):
+        async def action(self, context):
+            calls.append(1)
+            await asyncio.sleep(0.1)
+
+        def set_context(self, context):
+            context.set('model_attr', {'loaded': True})
+
+    async def run_all():
+        contexts = [CaseContext() for _ in range(3)]
+        await asyncio.gather(*(SlowLoader(uri='oss://bucket/model.onnx').aprocess(ctx) for ctx in contexts))
+        return contexts
+
+    contexts = asyncio.run(run_all())
+    assert len(calls) == 1
+    assert all(ctx.get('model_attr') == {'loaded': True} for ctx in contexts)
+
+
+def test_evicted_entries_remove_lock_files(cache, tmp_path):
+    key = 'b' * 64
+    with cache.lock(key):
+        pass
+    _put_engine(cache, tmp_path, key)
+    owner = CaseContext()
+    assert cache.get(key, owner=owner) is not None
+    del owner
+    gc.collect()
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert not os.path.exists(os.path.join(cache.root, 'locks', f'{key}.lock'))
+    assert not os.path.exists(os.path.join(cache.root, 'pins', f'{key}.lock'))
+    assert cache._read_size() == 0
+
+
+def test_put_scans_only_when_over_limit(cache, tmp_path, monkeypatch):
+    _put_engine(cache, tmp_path, 'c' * 64)
+    scans = []
+    original_evict = ArtifactCache.evict
+    monkeypatch.setattr(ArtifactCache, 'evict', lambda self: scans.append(1) or original_evict(self))
+
+    _put_engine(cache, tmp_path, 'd' * 64)
+    assert scans == []
+    assert cache._read_size() > 2048
+
+    cache.max_bytes = 3000
+    _put_engine(cache, tmp_path, 'e' * 64)
+    assert scans == [1]
+    assert cache.get('c' * 64) is None
+    assert cache.get('e' * 64) is not None
+
+
+def test_step_code_change_invalidates_key(cache):
+    @cacheable(outputs=('engine_path',))
+    class Compiler(AsyncBaseStep):
+        async def action(self, context):
+            pass
+
+    key = cache.make_key('Compiler', {}, {}, {}, code=cache.step_code_version(Compiler))
+    Compiler.cache_version = '2'
+    assert cache.make_key('Compiler', {}, {}, {}, code=cache.step_code_version(Compiler)) != key
@@ -0,0 +1,169 @@
+import itertools
+import threading
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('docker')
+from core.env_manager import DockerContainerPool
+
+
+class FakeContainer:
+    _ids = itertools.count(1)
+
+    def __init__(self, labels):
+        self.id = f"container-{next(self._ids)}"
+        self.short_id = self.id
+        self.labels = labels
+        self.status = 'running'
+        self.healthy = True
+        self.removed = False
+
+    def reload(self):
+        pass
+
+    def exec_run(self, cmd):
+        return SimpleNamespace(exit_code=0 if self.healthy else 1)
+
+    def remove(self, force=False):
+        self.removed = True
+        self.status = 'removed'
+
+
+class FakeContainers:
+    def __init__(self):
+        self.started = []
+
+    def list(self, filters=None):
+        label = filters['label']
+        return [c for c in self.started if not c.removed and
+                '='.join(next(iter(c.labels.items()))) == label]
+
+    def run(self, image, **kwargs):
+        container = FakeContainer(kwargs.get('labels', {}))
+        self.started.append(container)
+        return container
+
+
+class FakeApi:
+    """设置 stream_error 时输出流中途断开；设置 inspects 时 exec_inspect 依次返回其中的状态"""
+
+    def __init__(self):
+        self.exit_code = 0
+        self.stream_error = None
+        self.inspects = None
+        self.commands = []
+
+    def exec_create(self, container_id, cmd, **kwargs):
+        self.commands.append((container_id, cmd))
+        return {'Id': len(self.commands)}
+
+    def exec_start(self, exec_id, stream=False):
+        yield b'output\n'
+        if self.stream_error is not None:
+            raise self.stream_error
+
+    def exec_inspect(self, exec_id):
+        if self.inspects:
+            return self.inspects.pop(0)
+        return {'Running': False, 'ExitCode': self.exit_code}
+
+
+class FakeDockerClient:
+    def __init__(self):
+        self.containers = FakeContainers()
+        self.api = FakeApi()
+
+
+@pytest.fixture
+def client():
+    return FakeDockerClient()
+
+
+def _pool(client, **kwargs):
+    pool = DockerContainerPool(client, 'holmes-test:latest', '/workspace', **kwargs)
+    pool.ACQUIRE_POLL_INTERVAL = 0.01
+    pool.EXEC_POLL_INTERVAL = 0
+    pool.start()
+    return pool
+
+
+def test_acquire_release_and_reuse_running_containers(client):
+    pool = _pool(client, size=2, keep_alive=True)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    pool.release(first)
+    assert pool.acquire(timeout=0.05) is first
+    pool.shutdown()
+
+    # keep_alive 的容器被下一个相同 (image, workspace) 的容器池复用
+    reused = _pool(client, size=2)
+    assert set(reused._containers) == {first.id, second.id}
+    assert len(client.containers.started) == 2
+
+
+def test_unhealthy_container_is_replaced(client):
+    pool = _pool(client, size=1)
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.healthy = False
+
+    container = pool.acquire()
+    assert container is not broken
+    assert broken.removed
+    assert list(pool._containers) == [container.id]
+    assert container.id in pool._last_used
+
+
+def test_waiter_wakes_up_when_pool_shrinks(client):
+    pool = _pool(client, size=1)
+    held = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiter.start()
+    # 被占用的容器被丢弃后，等待者应启动新容器而不是一直阻塞
+    pool._discard(held)
+    waiter.join(timeout=5)
+    assert acquired and acquired[0] is not held
+
+
+def test_idle_containers_are_evicted(client):
+    pool = _pool(client, size=2, idle_timeout=10)
+    container = pool.acquire()
+    pool.release(container)
+    pool._last_used[container.id] -= 60
+
+    pool.evict_idle()
+    assert container.removed
+    assert container.id not in pool._containers
+    # 回收后按需补充到 size 个
+    pool.acquire()
+    pool.acquire()
+    assert len(pool._containers) == 2
+
+
+def test_exec_exit_codes(client):
+    pool = _pool(client, size=2)
+    assert pool.exec(['true']) == 0
+
+    client.api.exit_code = 3
+    assert pool.exec(['false']) == 3
+    assert pool.run_all([['a'], ['b'], ['c']]) == 3
+
+
+def test_exec_without_exit_code_fails(client):
+    pool = _pool(client, size=1)
+    client.api.inspects = [{'Running': False, 'ExitCode': None}]
+    assert pool.exec(['true']) == 1
+
+
+def test_exec_waits_for_command_after_stream_error(client):
+    pool = _pool(client, size=1)
+    client.api.stream_error = ConnectionError('stream dropped')
+    client.api.inspects = [{'Running': True, 'ExitCode': None}, {'Running': False, 'ExitCode': 0}]
+    assert pool.exec(['true']) == 0
+    assert client.api.inspects == []
+
+    client.api.inspects = [{'Running': False, 'ExitCode': 2}]
+    assert pool.exec(['true']) == 2
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from core.numerics import compare_tensors
+
+
+def _expected_mismatches(actual, golden, rtol=1e-5, atol=1e-8):
+    return int(np.count_nonzero(~np.isclose(actual, golden, rtol=rtol, atol=atol)))
+
+
+@pytest.mark.parametrize('actual, golden, expected', [
+    ([1.0], [np.inf], 1),
+    ([np.inf], [1.0], 1),
+    ([np.inf], [np.inf], 0),
+    ([-np.inf], [np.inf], 1),
+    ([np.inf], [-np.inf], 1),
+    ([np.nan], [1.0], 1),
+    ([1.0], [np.nan], 1),
+    ([np.nan], [np.nan], 1),
+    ([np.nan], [np.inf], 1),
+])
+def test_non_finite_values_match_isclose(actual, golden, expected):
+    result = compare_tensors(actual, golden)
+    assert result['mismatch_count'] == expected == _expected_mismatches(actual, golden)
+
+
+def test_mixed_values_across_chunks_match_isclose():
+    rng = np.random.default_rng(0)
+    golden = rng.standard_normal(1000)
+    actual = golden + rng.standard_normal(1000) * 1e-5
+    special = np.array([np.inf, -np.inf, np.nan, 0.0])
+    for values in (actual, golden):
+        idx = rng.choice(1000, 60, replace=False)
+        values[idx] = rng.choice(special, 60)
+
+    result = compare_tensors(actual, golden, chunk_size=64)
+    assert result['mismatch_count'] == _expected_mismatches(actual, golden)
+    assert result['nan_count'] == int(np.count_nonzero(np.isnan(actual) | np.isnan(golden)))
+
+
+def test_shape_mismatch_raises():
+    with pytest.raises(ValueError, match='shape mismatch'):
+        compare_tensors(np.zeros((2, 3)), np.zeros((3, 2)))
+
+
+@pytest.mark.parametrize('layout', ['fortran', 'strided'])
+def test_non_contiguous_memmap_matches_isclose(tmp_path, layout):
+    rng = np.random.default_rng(1)
+    golden = rng.standard_normal((40, 30))
+    actual = golden + rng.standard_normal((40, 30)) * 1e-5
+    if layout == 'fortran':
+        path = tmp_path / 'actual.npy'
+        np.save(path, np.asfortranarray(actual))
+        mapped = np.load(path, mmap_mode='r')
+        assert mapped.flags.f_contiguous and not mapped.flags.c_contiguous
+    else:
+        path = tmp_path / 'actual.npy'
+        np.save(path, np.repeat(actual, 2, axis=1))
+        mapped = np.load(path, mmap_mode='r')[:, ::2]
+    assert isinstance(mapped, np.memmap)
+
+    result = compare_tensors(mapped, golden, chunk_size=64)
+    assert result['size'] == golden.size
+    assert result['mismatch_count'] == _expected_mismatches(actual, golden)
+    assert result['max_abs_error'] == pytest.approx(float(np.max(np.abs(actual - golden))))
@@ -0,0 +1,57 @@
+import time
+from core.context import TestContext as CaseContext
+from core.interface import AsyncBaseStep, BaseStep
+from core.profiler import PlanProfiler
+from core.runner import CaseRunner
+from sample_project.plugins import DEMO_STEPS
+
+
+def _spin(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+@DEMO_STEPS.register_module(force=True)
+class ProfiledSpinStep(BaseStep):
+    def action(self, context):
+        _spin(0.2)
+
+
+@DEMO_STEPS.register_module(force=True)
+class ProfiledAsyncSpinStep(AsyncBaseStep):
+    async def action(self, context):
+        _spin(0.2)
+
+
+def _sampled_stacks(step_type):
+    profiler = PlanProfiler(interval=0.002)
+    profiler.start()
+    try:
+        with profiler.case('case'):
+            CaseRunner(CaseContext(), profiler=profiler).run([dict(type=step_type)])
+    finally:
+        profiler._stop_event.set()
+        profiler._sampler.join()
+    return [stack.split(';') for stack in profiler._stacks]
+
+
+def _names(stack):
+    return [label.split(' ', 1)[0] for label in stack[2:]]
+
+
+def test_sync_stacks_start_below_case_runner():
+    stacks = _sampled_stacks('demo.ProfiledSpinStep')
+    assert stacks
+    for stack in stacks:
+        assert stack[:2] == ['case', 'demo.ProfiledSpinStep']
+        assert _names(stack)[:2] == ['_process_step', 'process']
+    assert any('_spin' in _names(stack) for stack in stacks)
+
+
+def test_async_step_stacks_keep_process_frame():
+    stacks = _sampled_stacks('demo.ProfiledAsyncSpinStep')
+    assert stacks
+    for stack in stacks:
+        assert _names(stack)[:2] == ['_process_step', 'process']
+    assert any('action' in _names(stack) and '_spin' in _names(stack) for stack in stacks)
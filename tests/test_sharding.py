@@ -0,0 +1,49 @@
+import json
+import pytest
+from core.cache import get_cache_dir, set_cache_dir
+from core.history import CaseHistory, load_case_history
+from core.sharding import shard_cases
+from core.utils import generate_case_id
+
+CASES = [(f'cases/case_{i}.py', f'suite_{i % 3}.py') for i in range(23)]
+
+
+def _history(durations):
+    history = CaseHistory()
+    for case_file, duration in durations.items():
+        history.update(generate_case_id(case_file), duration)
+    return history
+
+
+@pytest.mark.parametrize('shard_count', [1, 2, 3, 5, 23, 30])
+@pytest.mark.parametrize('durations', [{}, {f'cases/case_{i}.py': (i * 7) % 11 + 0.5 for i in range(0, 23, 2)}])
+def test_shards_cover_each_case_exactly_once(shard_count, durations):
+    history = _history(durations)
+    shards = [shard_cases(CASES, index, shard_count, history) for index in range(1, shard_count + 1)]
+    selected = [case for shard in shards for case in shard]
+    assert sorted(selected) == sorted(CASES)
+    # 每个分片内保持 Plan 中的顺序
+    assert all(shard == sorted(shard, key=CASES.index) for shard in shards)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    previous = get_cache_dir()
+    set_cache_dir(str(tmp_path / 'cache'))
+    yield tmp_path / 'cache'
+    set_cache_dir(previous)
+
+
+def test_shard_history_ignores_local_history(cache_dir, tmp_path):
+    explicit = tmp_path / 'results.jsonl'
+    explicit.write_text(json.dumps({'case_file': CASES[0][0], 'duration': 5.0, 'status': 'PASSED'}) + '\n')
+    # 节点本地自动维护的历史与其他节点不同，不能影响切分结果
+    cache_dir.mkdir()
+    local = _history({case_file: 100.0 for case_file, _ in CASES[1:4]})
+    local.path = str(cache_dir / 'history.json')
+    local.save()
+
+    shard_history = load_case_history([str(explicit)], include_auto=False)
+    assert shard_history.path is None
+    assert shard_history.durations == {generate_case_id(CASES[0][0]): 5.0}
+    assert len(load_case_history([str(explicit)]).durations) == 4
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import pytest
+from mmengine.config import Config
+import core.runner
+import core.worker
+from core.context import TestContext as CaseContext
+from core.interface import BaseStep
+from core.runner import CaseRunner, PlanRunner
+from core.status import CaseStatus
+from core.timeout import CaseTimeoutError, deadline
+from core.worker import WorkerSupervisor
+from sample_project.plugins import DEMO_STEPS
+
+
+@DEMO_STEPS.register_module(force=True)
+class BlockStep(BaseStep):
+    """阻塞在 C 调用中的 Step，注入的异常无法打断，只能终止进程"""
+
+    def action(self, context):
+        time.sleep(getattr(self, 'seconds', 60))
+
+
+@DEMO_STEPS.register_module(force=True)
+class SpinStep(BaseStep):
+    """不检查取消标记的纯 Python 循环"""
+
+    def action(self, context):
+        end = time.monotonic() + getattr(self, 'seconds', 60)
+        while time.monotonic() < end:
+            pass
+
+
+@pytest.fixture
+def fast_kill(monkeypatch):
+    monkeypatch.setattr(core.runner, 'KILL_GRACE', 0.5)
+    monkeypatch.setattr(core.runner, '_TIMEOUT_POLL_INTERVAL', 0.1)
+    monkeypatch.setattr(core.worker, 'KILL_GRACE', 0.5)
+    monkeypatch.setattr(core.worker, '_TIMEOUT_POLL_INTERVAL', 0.1)
+
+
+def _write_case(root, name, pipeline, **fields):
+    path = root / f'{name}.py'
+    lines = [f"metadata = dict(name={name!r})", "labels = ['timeout_test']",
+             f"pipeline = {pipeline!r}"]
+    lines += [f"{key} = {value!r}" for key, value in fields.items()]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def _plan(tmp_path, cases):
+    case_root = tmp_path / 'cases'
+    case_root.mkdir()
+    for name, pipeline, fields in cases:
+        _write_case(case_root, name, pipeline, **fields)
+    suite = tmp_path / 'suite.py'
+    suite.write_text(f"case_root = {str(case_root)!r}\nselector = dict(include_labels=['timeout_test'])\n")
+    return Config(dict(suites=[str(suite)], result_log=str(tmp_path / 'results.jsonl')))
+
+
+def _statuses(plan_cfg):
+    with open(plan_cfg.result_log) as f:
+        records = [json.loads(line) for line in f]
+    return {os.path.basename(record['case_file'])[:-3]: record['status'] for record in records}
+
+
+def _run_case(pipeline, **kwargs):
+    ctx = CaseContext()
+    with pytest.raises(CaseTimeoutError):
+        CaseRunner(ctx, **kwargs).run(pipeline)
+    return ctx
+
+
+def test_cooperative_step_times_out_immediately():
+    start = time.monotonic()
+    _run_case([dict(type='demo.SleepStep', seconds=30)], step_timeout=0.2)
+    assert time.monotonic() - start < 2
+
+
+def test_case_timeout_spans_steps():
+    start = time.monotonic()
+    ctx = _run_case([dict(type='demo.SleepStep', seconds=0.3)] * 10, case_timeout=0.5)
+    assert time.monotonic() - start < 2
+    assert 'Case timed out' in ctx.cancel_reason
+
+
+def test_step_config_timeout_overrides_default():
+    CaseRunner(CaseContext(), step_timeout=0.1).run([dict(type='demo.SleepStep', seconds=0.3, timeout=5)])
+
+
+def test_deadline_interrupts_busy_step_without_leaking():
+    ctx = CaseContext()
+    with pytest.raises(CaseTimeoutError):
+        with deadline(ctx, 0.1, 'spin', grace=0.1):
+            SpinStep(seconds=30).action(ctx)
+    # 到期前已退出的 with 块不会在之后收到注入的异常
+    with deadline(CaseContext(), 0.2, 'fast', grace=0):
+        pass
+    time.sleep(0.5)
+
+
+def test_timed_out_case_recorded_as_timeout(tmp_path):
+    plan_cfg = _plan(tmp_path, [
+        ('slow', [dict(type='demo.SleepStep', seconds=30)], dict(timeout=0.3)),
+        ('fast', [dict(type='demo.SleepStep', seconds=0)], {}),
+    ])
+    runner = PlanRunner(plan_cfg, case_callback=lambda record: None)
+    assert not runner.run()
+    assert _statuses(plan_cfg) == {'slow': CaseStatus.TIMEOUT.value, 'fast': CaseStatus.SUCCESS.value}
+    assert runner._results.timeouts == 1
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_blocked_worker_is_killed_and_cases_resubmitted(tmp_path, fast_kill, workers):
+    plan_cfg = _plan(tmp_path, [
+        ('blocked', [dict(type='demo.BlockStep', seconds=60, timeout=0.3)], {}),
+    ] + [(f'ok_{i}', [dict(type='demo.SleepStep', seconds=0.2)], {}) for i in range(4)])
+    start = time.monotonic()
+    assert not PlanRunner(plan_cfg, workers=workers).run()
+    assert time.monotonic() - start < 20
+    statuses = _statuses(plan_cfg)
+    assert statuses.pop('blocked') == CaseStatus.TIMEOUT.value
+    assert statuses == {f'ok_{i}': CaseStatus.SUCCESS.value for i in range(4)}
+
+
+def test_supervisor_kills_blocked_worker(tmp_path, fast_kill):
+    blocked = _write_case(tmp_path, 'blocked', [dict(type='demo.BlockStep', seconds=60)])
+    ok = _write_case(tmp_path, 'ok', [dict(type='demo.SleepStep', seconds=0)])
+    with WorkerSupervisor() as supervisor:
+        start = time.monotonic()
+        record = supervisor.execute({'case': blocked, 'step_timeout': 0.3})
+        assert time.monotonic() - start < 10
+        assert record['status'] == CaseStatus.TIMEOUT.value
+        assert 'killed' in record['error_message']
+        assert supervisor.execute({'case': ok})['status'] == CaseStatus.SUCCESS.value
+        assert supervisor.recycled == 1